@@ -1,3 +1,4 @@
+import os
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
@@ -14,6 +15,10 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# The pipeline's database can be pointed elsewhere with GOPHERGRADES_DB_URL, migrate that one too.
+if os.environ.get("GOPHERGRADES_DB_URL"):
+    config.set_main_option("sqlalchemy.url", os.environ["GOPHERGRADES_DB_URL"])
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 from db.Models import Base
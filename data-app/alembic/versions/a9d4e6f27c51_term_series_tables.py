@@ -0,0 +1,51 @@
+"""Term series tables
+
+Revision ID: a9d4e6f27c51
+Revises: f5c1a83e6b20
+Create Date: 2026-10-19 18:41:09.215874
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d4e6f27c51'
+down_revision = 'f5c1a83e6b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Filled by ingest for the terms it loads, run `python cli.py recompute` once to fill them for existing terms.
+    op.create_table('classtermseries',
+    sa.Column('class_id', sa.Integer(), nullable=False),
+    sa.Column('term', sa.SmallInteger(), nullable=False),
+    sa.Column('students', sa.Integer(), nullable=False),
+    sa.Column('gpa', sa.Float(), nullable=True),
+    sa.Column('shares', sa.JSON(), nullable=False),
+    sa.ForeignKeyConstraint(['class_id'], ['classdistribution.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('class_id', 'term'),
+    sqlite_with_rowid=False
+    )
+    op.create_table('classprofessortermseries',
+    sa.Column('class_id', sa.Integer(), nullable=False),
+    sa.Column('dist_id', sa.Integer(), nullable=False),
+    sa.Column('professor_id', sa.Integer(), nullable=True),
+    sa.Column('term', sa.SmallInteger(), nullable=False),
+    sa.Column('students', sa.Integer(), nullable=False),
+    sa.Column('gpa', sa.Float(), nullable=True),
+    sa.Column('shares', sa.JSON(), nullable=False),
+    sa.ForeignKeyConstraint(['class_id'], ['classdistribution.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['dist_id'], ['distribution.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['professor_id'], ['professor.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('class_id', 'dist_id', 'term'),
+    sqlite_with_rowid=False
+    )
+    op.create_index('ix_classprofessortermseries_professor', 'classprofessortermseries', ['professor_id', 'class_id', 'term'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_classprofessortermseries_professor', table_name='classprofessortermseries')
+    op.drop_table('classprofessortermseries')
+    op.drop_table('classtermseries')
@@ -0,0 +1,35 @@
+"""Professor identity: unique x500 and name aliases
+
+Revision ID: b6f3a2d81c94
+Revises: d7e2f94b1a68
+Create Date: 2026-10-19 22:37:51.064219
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6f3a2d81c94'
+down_revision = 'd7e2f94b1a68'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('professoralias',
+    sa.Column('name', sa.VARCHAR(length=255), nullable=False),
+    sa.Column('professor_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['professor_id'], ['professor.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('name', 'professor_id')
+    )
+    op.create_index('ix_professoralias_professor_id', 'professoralias', ['professor_id'], unique=False)
+    # Every existing professor is known by its own name.
+    op.execute("INSERT INTO professoralias (name, professor_id) SELECT name, id FROM professor")
+    op.create_index('uq_professor_x500', 'professor', ['x500'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_professor_x500', table_name='professor')
+    op.drop_index('ix_professoralias_professor_id', table_name='professoralias')
+    op.drop_table('professoralias')
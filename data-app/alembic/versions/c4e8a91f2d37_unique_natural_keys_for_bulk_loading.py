@@ -0,0 +1,35 @@
+"""Unique natural keys for bulk loading
+
+Revision ID: c4e8a91f2d37
+Revises: b1d54180382a
+Create Date: 2026-10-19 10:12:41.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a91f2d37'
+down_revision = 'b1d54180382a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # INSERT ... ON CONFLICT needs a unique constraint on the natural key of every table the ingest loader writes to.
+    with op.batch_alter_table('termdistribution') as batch_op:
+        batch_op.create_unique_constraint('uq_termdistribution_dist_term', ['dist_id', 'term'])
+    with op.batch_alter_table('distribution') as batch_op:
+        batch_op.create_unique_constraint('uq_distribution_class_professor', ['class_id', 'professor_id'])
+    with op.batch_alter_table('classdistribution') as batch_op:
+        batch_op.create_unique_constraint('uq_classdistribution_course', ['campus', 'dept_abbr', 'course_num'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('classdistribution') as batch_op:
+        batch_op.drop_constraint('uq_classdistribution_course', type_='unique')
+    with op.batch_alter_table('distribution') as batch_op:
+        batch_op.drop_constraint('uq_distribution_class_professor', type_='unique')
+    with op.batch_alter_table('termdistribution') as batch_op:
+        batch_op.drop_constraint('uq_termdistribution_dist_term', type_='unique')
@@ -0,0 +1,30 @@
+"""Stage checkpoint table
+
+Revision ID: d7e2f94b1a68
+Revises: a9d4e6f27c51
+Create Date: 2026-10-19 21:04:12.518730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7e2f94b1a68'
+down_revision = 'a9d4e6f27c51'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('stagecheckpoint',
+    sa.Column('source', sa.VARCHAR(length=64), nullable=False),
+    sa.Column('stage', sa.VARCHAR(length=32), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=False),
+    sa.Column('seconds', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('source', 'stage')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('stagecheckpoint')
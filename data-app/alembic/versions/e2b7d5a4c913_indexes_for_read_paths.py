@@ -0,0 +1,28 @@
+"""Indexes for read paths
+
+Revision ID: e2b7d5a4c913
+Revises: c4e8a91f2d37
+Create Date: 2026-10-19 16:02:18.552140
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b7d5a4c913'
+down_revision = 'c4e8a91f2d37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Professor pages look distributions up by professor and class pages look libeds up by class, neither key leads an
+    # existing index.
+    op.create_index('ix_distribution_professor_id', 'distribution', ['professor_id'])
+    op.create_index('ix_libedassociation_right_id', 'libedAssociationTable', ['right_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_libedassociation_right_id', table_name='libedAssociationTable')
+    op.drop_index('ix_distribution_professor_id', table_name='distribution')
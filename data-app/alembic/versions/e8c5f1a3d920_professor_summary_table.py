@@ -0,0 +1,39 @@
+"""Professor summary table
+
+Revision ID: e8c5f1a3d920
+Revises: b6f3a2d81c94
+Create Date: 2026-10-19 21:12:47.530218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8c5f1a3d920'
+down_revision = 'b6f3a2d81c94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Filled by ingest for the professors of the terms it loads, run `python cli.py recompute` once to fill it for
+    # everyone already loaded.
+    op.create_table('professorsummary',
+    sa.Column('professor_id', sa.Integer(), nullable=False),
+    sa.Column('campus', sa.VARCHAR(length=8), nullable=False),
+    sa.Column('total_students', sa.Integer(), nullable=False),
+    sa.Column('total_grades', sa.JSON(), nullable=False),
+    sa.Column('gpa', sa.Float(), nullable=True),
+    sa.Column('class_count', sa.Integer(), nullable=False),
+    sa.Column('first_term', sa.SmallInteger(), nullable=False),
+    sa.Column('last_term', sa.SmallInteger(), nullable=False),
+    sa.Column('courses', sa.JSON(), nullable=False),
+    sa.ForeignKeyConstraint(['professor_id'], ['professor.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('professor_id', 'campus'),
+    sqlite_with_rowid=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('professorsummary')
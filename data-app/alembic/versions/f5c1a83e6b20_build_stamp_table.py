@@ -0,0 +1,30 @@
+"""Build stamp table
+
+Revision ID: f5c1a83e6b20
+Revises: e2b7d5a4c913
+Create Date: 2026-10-19 17:20:44.903117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5c1a83e6b20'
+down_revision = 'e2b7d5a4c913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('buildstamp',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.VARCHAR(length=32), nullable=False),
+    sa.Column('stages', sa.VARCHAR(length=255), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('buildstamp')
@@ -0,0 +1,167 @@
+import argparse
+import io
+import json
+import os
+import platform
+import runpy
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from db.Models import configure, create_schema
+from bench.synthetic import generate_terms, to_raw, generate_srt
+from bench.stubs import stub_http
+from src.metrics.metrics import metrics
+
+"""
+Benchmarks every pipeline stage against synthetic data, stubbed external sources and a temporary SQLite database.
+
+Run from the data-app folder:
+    python -m bench --terms 2 --subjects 20 --courses 30 --sections 3 --instructors 10 --output bench/results.jsonl
+
+Each run is appended to the output file as one JSON line so runs can be compared over time.
+"""
+
+STAGES = ["clean", "ingest", "enhance", "rmp", "srt"]
+# Not run by default: the whole stage graph as `main.run` runs it, on a second database.
+EXTRA_STAGES = ["pipeline"]
+
+
+@contextmanager
+def timed(results: dict, stage: str, rows: int, verbose: bool):
+    sink = sys.stdout if verbose else io.StringIO()
+    start = time.perf_counter()
+    with redirect_stdout(sink):
+        yield
+    results[stage] = {"seconds": round(time.perf_counter() - start, 4), "rows": rows}
+    print(f"[BENCH] {stage:<8} {results[stage]['seconds']:>9.3f}s  {rows} rows", file=sys.__stdout__)
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args: argparse.Namespace, workdir: str) -> dict:
+    frames = generate_terms(args.terms, args.subjects, args.courses, args.sections, args.instructors, args.campus, args.seed)
+    cleaned_files = {}
+    raw_files = {}
+    for term, df in frames.items():
+        cleaned_files[term] = os.path.join(workdir, f"{term}_cleaned_data.csv")
+        raw_files[term] = os.path.join(workdir, f"{term}_raw_data.csv")
+        df.to_csv(cleaned_files[term], index=False)
+        to_raw(df, args.missing_rate, args.seed).to_csv(raw_files[term], index=False)
+    srt_file = os.path.join(workdir, "srt.csv")
+    generate_srt(frames, args.seed).to_csv(srt_file, index=False)
+
+    db_file = os.path.join(workdir, "bench.db")
+    engine = configure(f"sqlite:///{db_file}")
+    create_schema()
+    metrics.attach(engine)
+    if args.profile_sql:
+        metrics.profile(engine)
+
+    # The pipeline entry points are imported late so the stubs and database binding are in place first.
+    import main as pipeline
+    results = {}
+    with stub_http(frames, args.latency):
+        if "clean" in args.stages:
+            sys.path.insert(0, os.path.join("src", "clean"))
+            clean = runpy.run_path(os.path.join("src", "clean", "__main__.py"), run_name="bench_clean")["clean"]
+            raw = {term: pd.read_csv(path, dtype={"CLASS_SECTION": str, "CATALOG_NBR": str}) for term, path in raw_files.items()}
+            with timed(results, "clean", sum(len(df) for df in raw.values()), args.verbose):
+                for term, df in raw.items():
+                    clean(df, term)
+
+        if "ingest" in args.stages:
+            with timed(results, "ingest", sum(len(df) for df in frames.values()), args.verbose):
+                for term in sorted(cleaned_files):
+                    df = pipeline.load_data(cleaned_files[term])
+                    pipeline.sync_dimensions(df)
+                    pipeline.add_distributions(df, args.workers)
+                pipeline.recompute_totals()
+
+        if "enhance" in args.stages:
+            with timed(results, "enhance", args.subjects, args.verbose):
+                pipeline.update_coursedog()
+
+        if "rmp" in args.stages:
+            with timed(results, "rmp", args.subjects * args.instructors, args.verbose):
+                pipeline.update_rmp()
+
+        if "srt" in args.stages:
+            with timed(results, "srt", args.subjects * args.courses, args.verbose):
+                pipeline.update_srt(srt_file)
+
+        if "pipeline" in args.stages:
+            # Independent stages overlap here, compare with the sum of the stages above.
+            combined = os.path.join(workdir, "all_cleaned_data.csv")
+            pd.concat([frames[term] for term in sorted(frames)], ignore_index=True).to_csv(combined, index=False)
+            metrics.attach(configure(f"sqlite:///{os.path.join(workdir, 'pipeline.db')}"))
+            create_schema()
+            graph = pipeline.stages(combined, workers=args.workers, srt_filename=srt_file)
+            with timed(results, "pipeline", sum(len(df) for df in frames.values()), args.verbose):
+                graph.run(graph.select())
+
+    engine.dispose()
+    report = metrics.report()
+    return {"stages": results, "metrics": report["stages"], **({"sql": report["sql"]} if "sql" in report else {}), "db_bytes": os.path.getsize(db_file)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the data pipeline on synthetic data.")
+    parser.add_argument("--terms", type=int, default=1, help="Number of terms to generate.")
+    parser.add_argument("--subjects", type=int, default=10, help="Number of subjects per term.")
+    parser.add_argument("--courses", type=int, default=20, help="Number of courses per subject.")
+    parser.add_argument("--sections", type=int, default=3, help="Number of sections per course.")
+    parser.add_argument("--instructors", type=int, default=8, help="Number of instructors per subject.")
+    parser.add_argument("--campus", type=str, default="UMNTC", help="Campus to generate data for.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the generator.")
+    parser.add_argument("--missing-rate", type=float, default=0.05, help="Fraction of raw sections without an instructor.")
+    parser.add_argument("--workers", type=int, default=None, help="Processes used to build distributions, defaults to the number of cores.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds slept per stubbed HTTP call.")
+    parser.add_argument("--stages", type=lambda s: s.split(","), default=STAGES, help=f"Comma separated stages to run, out of {','.join(STAGES + EXTRA_STAGES)}.")
+    parser.add_argument("--output", type=str, default=None, help="JSON lines file to append the result to.")
+    parser.add_argument("--keep", type=str, default=None, help="Keep the generated data and database in this folder.")
+    parser.add_argument("--profile-sql", action="store_true", help="Profile SQL statements by stage and shape and include the findings.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show stage output instead of discarding it.")
+    args = parser.parse_args()
+
+    unknown = set(args.stages) - set(STAGES + EXTRA_STAGES)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+    metrics.verbose = args.verbose
+    started = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    if args.keep:
+        os.makedirs(args.keep, exist_ok=True)
+        outcome = run(args, args.keep)
+    else:
+        with tempfile.TemporaryDirectory() as workdir:
+            outcome = run(args, workdir)
+
+    record = {
+        "timestamp": started,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "params": {key: value for key, value in vars(args).items() if key not in ("output", "keep", "verbose", "profile_sql")},
+        **outcome,
+    }
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(json.dumps(record) + "\n")
+    else:
+        print(json.dumps(record, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+import json
+import time
+from contextlib import contextmanager
+from unittest import mock
+from urllib.parse import urlparse, parse_qs
+import pandas as pd
+import requests
+from mapping.mappings import catalog_mapping
+from bench.synthetic import course_attributes
+
+"""
+Offline stand-ins for the external sources (ScheduleBuilder, ClassInfo, CourseDog and RMP).
+
+Responses are built from the generated terms so every stage finds data to work on. An optional latency is slept
+per call to approximate network round trips.
+"""
+
+
+class StubResponse:
+    def __init__(self, payload, url: str, status_code: int = 200):
+        self.status_code = status_code
+        self.url = url
+        self.content = json.dumps(payload).encode("latin-1")
+        self.headers = {}
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class StubSources:
+    """Answers requests for the generated data set."""
+
+    def __init__(self, frames: dict[int, pd.DataFrame], latency: float = 0.0):
+        self.latency = latency
+        data = pd.concat(frames.values())
+        sections = data[["TERM", "CAMPUS", "SUBJECT", "CATALOG_NBR", "CLASS_SECTION", "NAME", "INTERNET_ID", "DESCR"]].drop_duplicates(
+            ["TERM", "CAMPUS", "SUBJECT", "CATALOG_NBR", "CLASS_SECTION"]).reset_index(drop=True)
+        sections["id"] = sections.index + 10000
+        self.sections = sections
+        self.by_course = {key: group["id"].tolist() for key, group in sections.groupby(["TERM", "CAMPUS", "SUBJECT", "CATALOG_NBR"])}
+        self.by_id = sections.set_index("id")
+        self.courses = data[["CAMPUS", "SUBJECT", "CATALOG_NBR", "DESCR"]].drop_duplicates(["CAMPUS", "SUBJECT", "CATALOG_NBR"])
+        self.profs = set(data["NAME"].unique())
+
+    def get(self, url: str, params: dict = None, **kwargs) -> StubResponse:
+        if self.latency:
+            time.sleep(self.latency)
+        parsed = urlparse(url)
+        query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        query.update(params or {})
+        if parsed.netloc == "schedulebuilder.umn.edu":
+            return StubResponse(self.schedule_builder(query), url)
+        if parsed.netloc == "classinfo.umn.edu":
+            return StubResponse({}, url)
+        if parsed.netloc == "app.coursedog.com":
+            return StubResponse(self.coursedog(parsed.path, query), url)
+        return StubResponse({}, url, status_code=404)
+
+    def post(self, url: str, json: dict = None, **kwargs) -> StubResponse:
+        if urlparse(url).netloc == "www.ratemyprofessors.com":
+            return StubResponse({"data": self.rmp(json["query"], json["variables"])}, url)
+        return StubResponse({}, url, status_code=404)
+
+    def schedule_builder(self, query: dict):
+        if query["type"] == "course":
+            key = (int(query["term"]), query["campus"], query["subject"], query["catalog_nbr"])
+            return {"sections": self.by_course.get(key, [])}
+        items = []
+        for class_nbr in str(query["class_nbrs"]).split(","):
+            row = self.by_id.loc[int(class_nbr)]
+            items.append({
+                "id": int(class_nbr),
+                "section_number": row["CLASS_SECTION"],
+                "meetings": [{"instructors": [{"label_name": row["NAME"], "internet_id": row["INTERNET_ID"]}]}],
+            })
+        return items
+
+    def coursedog(self, path: str, query: dict):
+        catalog = path.split("/")[4].removeprefix("umn_").removesuffix("_peoplesoft")
+        campus = "UMNRO" if catalog == "umntc_rochester" else catalog.upper()
+        courses = self.courses[(self.courses["CAMPUS"] == campus) & (self.courses["SUBJECT"] == query["subjectCode"])]
+        return {
+            f"{row.SUBJECT}{row.CATALOG_NBR}": {
+                "courseNumber": row.CATALOG_NBR,
+                "longName": row.DESCR.replace("Topics", "Topics in"),
+                "description": f"A synthetic course offered by {row.SUBJECT}.",
+                "credits": {"creditHours": {"min": 3, "max": 4}},
+                "sisId": f"{catalog_mapping[campus]}{row.SUBJECT}{row.CATALOG_NBR}",
+                "attributes": course_attributes(row.SUBJECT, row.CATALOG_NBR),
+            }
+            for row in courses.itertuples()
+        }
+
+    def rmp(self, document: str, variable_values: dict):
+        if self.latency:
+            time.sleep(self.latency)
+        name = variable_values["professorName"]
+        edges = []
+        # Only some professors are on RMP, and only at the first school searched.
+        if name in self.profs and variable_values["schoolID"] == "U2Nob29sLTEyNTc=" and sum(map(ord, name)) % 2 == 0:
+            first, last = name.split(" ", 1)
+            edges.append({"node": {"avgDifficulty": 3.1, "avgRating": 4.2, "id": name, "firstName": first,
+                                   "lastName": last, "legacyId": sum(map(ord, name)), "school": {"id": variable_values["schoolID"]}}})
+        return {"newSearch": {"teachers": {"edges": edges}}}
+
+
+@contextmanager
+def stub_http(frames: dict[int, pd.DataFrame], latency: float = 0.0):
+    """Routes requests.get and requests.post to `StubSources` for the duration of the block."""
+    sources = StubSources(frames, latency)
+    with mock.patch.object(requests, "get", sources.get), mock.patch.object(requests, "post", sources.post):
+        yield sources
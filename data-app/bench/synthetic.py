@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+from mapping.mappings import dept_mapping, grade_mapping, libed_mapping
+
+"""
+Generates synthetic term data shaped like the registrar exports so the pipeline can be benchmarked without real data.
+
+Sizes are given as terms x subjects x courses x sections x instructors, where instructors is the pool of instructors
+per subject. Output is deterministic for a given seed.
+"""
+
+GRADES = list(grade_mapping.keys()) + ["S", "N", "W"]
+FIRST_NAMES = ["Alex", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn", "Parker", "Rowan", "Sage"]
+LAST_NAMES = ["Anderson", "Nguyen", "Johnson", "Olson", "Larson", "Garcia", "Peterson", "Schmidt", "Hansen", "Lee", "Moua", "Khan"]
+SEASONS = [(3, "Spr"), (5, "Sum"), (9, "Fall")]
+
+
+def term_codes(terms: int, last_term: int = 1253) -> list[int]:
+    """Returns `terms` consecutive term codes (spring, summer, fall) ending at `last_term`."""
+    year, season = divmod(last_term, 10)
+    idx = [code for code, _ in SEASONS].index(season)
+    codes = []
+    for _ in range(terms):
+        codes.append(year * 10 + SEASONS[idx][0])
+        idx -= 1
+        if idx < 0:
+            idx = len(SEASONS) - 1
+            year -= 1
+    return sorted(codes)
+
+
+def term_descr(term: int) -> str:
+    year, season = divmod(term, 10)
+    return f"{dict(SEASONS)[season]} {1900 + year}"
+
+
+def subjects_for(campus: str, subjects: int) -> list[str]:
+    depts = sorted(dept_mapping[campus])
+    if subjects > len(depts):
+        raise ValueError(f"Campus {campus} only has {len(depts)} departments, cannot generate {subjects}.")
+    return depts[:subjects]
+
+
+def catalog_number(course: int) -> str:
+    return f"{(course % 5 + 1) * 1000 + course // 5 + 1}"
+
+
+def instructor_pool(campus: str, subject: str, instructors: int, seed: int) -> list[tuple[str, str]]:
+    """Instructors are stable across terms so repeated terms reuse the same professors."""
+    rng = np.random.default_rng([seed, sum(map(ord, campus + subject))])
+    pool = []
+    for i in range(instructors):
+        first = FIRST_NAMES[rng.integers(len(FIRST_NAMES))]
+        last = LAST_NAMES[rng.integers(len(LAST_NAMES))]
+        last = f"{last}{subject.title()}{i}"
+        pool.append((f"{first} {last}", f"{first[0]}{last}"[:8].lower() + str(i)))
+    return pool
+
+
+def generate_term(term: int, subjects: int, courses: int, sections: int, instructors: int,
+                  campus: str = "UMNTC", seed: int = 0) -> pd.DataFrame:
+    """Generates one cleaned term in the same layout as `python -m clean` output."""
+    rng = np.random.default_rng([seed, term])
+    rows = []
+    for subject in subjects_for(campus, subjects):
+        pool = instructor_pool(campus, subject, instructors, seed)
+        for course in range(courses):
+            catalog_nbr = catalog_number(course)
+            descr = f"{subject} Topics {catalog_nbr}"
+            for section in range(1, sections + 1):
+                name, x500 = pool[rng.integers(len(pool))]
+                grades = rng.choice(GRADES, size=rng.integers(3, len(GRADES) + 1), replace=False)
+                counts = rng.integers(1, 40, size=len(grades))
+                for grade, count in zip(grades, counts):
+                    rows.append((campus, campus, subject, catalog_nbr, f"{section:03d}", descr, grade, int(count), name, x500, term))
+
+    df = pd.DataFrame(rows, columns=["INSTITUTION", "CAMPUS", "SUBJECT", "CATALOG_NBR", "CLASS_SECTION", "DESCR",
+                                     "CRSE_GRADE_OFF", "GRADE_HDCNT", "NAME", "INTERNET_ID", "TERM"])
+    df["FULL_NAME"] = df["SUBJECT"] + " " + df["CATALOG_NBR"]
+    return df
+
+
+def generate_terms(terms: int, subjects: int, courses: int, sections: int, instructors: int,
+                   campus: str = "UMNTC", seed: int = 0) -> dict[int, pd.DataFrame]:
+    return {term: generate_term(term, subjects, courses, sections, instructors, campus, seed) for term in term_codes(terms)}
+
+
+def to_raw(df: pd.DataFrame, missing_rate: float = 0.05, seed: int = 0) -> pd.DataFrame:
+    """Converts a cleaned term back to the raw registrar layout, blanking some instructors so clean has work to do."""
+    rng = np.random.default_rng(seed)
+    raw = df.drop(columns=["FULL_NAME", "TERM"]).copy()
+    raw.insert(0, "TERM_DESCR", term_descr(int(df["TERM"].iloc[0])))
+    raw["COMPONENT_MAIN"] = "LEC"
+    raw["CLASS_HDCNT"] = raw.groupby(["SUBJECT", "CATALOG_NBR", "CLASS_SECTION"])["GRADE_HDCNT"].transform("sum")
+    raw["INSTR_ROLE"] = "PI"
+    raw["JOBCODE_DESCR"] = "Instructor"
+    raw["UM_JOBCODE_GROUP"] = "FA"
+    # Registrar exports list names as "Last,First".
+    raw["NAME"] = raw["NAME"].str.split(" ", n=1).str[::-1].str.join(",")
+
+    sections = raw[["SUBJECT", "CATALOG_NBR", "CLASS_SECTION"]].drop_duplicates()
+    missing = sections.sample(frac=missing_rate, random_state=int(rng.integers(2**31)))
+    blank = raw.set_index(["SUBJECT", "CATALOG_NBR", "CLASS_SECTION"]).index.isin(missing.set_index(["SUBJECT", "CATALOG_NBR", "CLASS_SECTION"]).index)
+    raw.loc[blank, ["NAME", "INTERNET_ID"]] = None
+    return raw[["TERM_DESCR", "INSTITUTION", "CAMPUS", "SUBJECT", "CATALOG_NBR", "CLASS_SECTION", "COMPONENT_MAIN", "DESCR",
+                "CRSE_GRADE_OFF", "CLASS_HDCNT", "GRADE_HDCNT", "INSTR_ROLE", "NAME", "JOBCODE_DESCR", "UM_JOBCODE_GROUP", "INTERNET_ID"]]
+
+
+def generate_srt(frames: dict[int, pd.DataFrame], seed: int = 0) -> pd.DataFrame:
+    """Generates SRT rows for every generated course in the layout of SRT_DATA/main.csv."""
+    rng = np.random.default_rng(seed)
+    courses = pd.concat(frames.values())[["SUBJECT", "CATALOG_NBR", "DESCR", "TERM"]].drop_duplicates()
+    scores = rng.uniform(3.0, 6.0, size=(len(courses), 7)).round(2)
+    srt = courses.rename(columns={"DESCR": "TITLE"}).reset_index(drop=True)
+    for i, col in enumerate(["DEEP_UND", "STIM_INT", "TECH_EFF", "ACC_SUP", "EFFORT", "GRAD_STAND", "RECC"]):
+        srt[col] = scores[:, i]
+    srt["RESP"] = rng.integers(5, 200, size=len(courses))
+    return srt
+
+
+def course_attributes(subject: str, catalog_nbr: str) -> list[str]:
+    """Deterministic libed attributes for a generated course."""
+    attributes = list(libed_mapping.keys())
+    pick = sum(map(ord, subject + catalog_nbr))
+    return [attributes[pick % len(attributes)], attributes[(pick // 7) % len(attributes)]] if pick % 3 else []
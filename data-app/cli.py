@@ -0,0 +1,328 @@
+import argparse
+import os
+import sys
+
+"""
+Single entry point for the data pipeline. Run from the data-app folder:
+
+    python cli.py init                          # create the database schema
+    python cli.py clean <raw.xlsx> <out.csv> <term>
+    python cli.py preflight <cleaned.csv>        # check a cleaned CSV without writing anything
+    python cli.py ingest <cleaned.csv> [-dr] [-ds] [-dc] [--skipPreflight]
+    python cli.py ingest <cleaned.csv> --resume   # or --only rmp,srt / --from enhance
+    python cli.py enhance [--campus UMNTC] [--dept CSCI]
+    python cli.py rmp
+    python cli.py srt [SRT_DATA/main.csv]
+    python cli.py recompute
+    python cli.py merge [<cleaned.csv> ...]       # merge duplicate professors, optionally learning x500s first
+    python cli.py export <output.db>
+    python cli.py export <folder> --perCampus    # one database per campus plus index.json
+    python cli.py publish <output.db> [--pageSize 4096] [--withoutRowid]
+    python cli.py status
+    python cli.py serve [--port 8080]             # read API over the database
+    python cli.py --db sqlite:///scratch.db init  # any command can target another database
+
+Only argparse is imported up front. Each subcommand imports what it needs when it runs, so quick commands do not
+pay for pandas, the CourseDog stack or the RMP GraphQL client, and nothing touches the schema unless asked to.
+"""
+
+CLEAN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "clean")
+
+
+def load_clean():
+    """Loads the clean package's entry point, its modules import each other as siblings."""
+    import runpy
+    sys.path.insert(0, CLEAN_DIR)
+    return runpy.run_path(os.path.join(CLEAN_DIR, "__main__.py"), run_name="clean")
+
+
+def cmd_init(args: argparse.Namespace) -> int:
+    from db.Models import create_schema
+    create_schema()
+    print("[CLI] Database schema created.")
+    return 0
+
+
+def cmd_clean(args: argparse.Namespace) -> int:
+    return load_clean()["main"](args.clean_args)
+
+
+def cmd_ingest(args: argparse.Namespace) -> int:
+    if args.init:
+        cmd_init(args)
+    import main as pipeline
+    pipeline.run(args.clean_filename, args.DisableCD, args.DisableRMP, args.DisableSRT, args.Workers, not args.SkipPreflight,
+                 args.Only.split(",") if args.Only else None, args.From, args.Resume)
+    return 0
+
+
+def cmd_preflight(args: argparse.Namespace) -> int:
+    from src.generation.preflight import Preflight
+    preflight = Preflight(args.clean_filename).check_file()
+    print(preflight.summary())
+    if args.Report:
+        import json
+        with open(args.Report, "w") as f:
+            json.dump({"file": args.clean_filename, "rows": preflight.rows, "seconds": preflight.seconds, "violations": preflight.report()}, f, indent=2)
+    return 1 if preflight.errors else 0
+
+
+def cmd_enhance(args: argparse.Namespace) -> int:
+    from sqlalchemy import select
+    from db.Models import Session, DepartmentDistribution, DEPT_COLUMNS, stamp_build
+    from src.enhance.courseDog import CourseDogEnhance
+    from src.metrics.metrics import metrics
+    with metrics.stage("enhance"):
+        session = Session()
+        query = select(*DEPT_COLUMNS)
+        if args.campus:
+            query = query.where(DepartmentDistribution.campus == args.campus)
+        if args.dept:
+            query = query.where(DepartmentDistribution.dept_abbr == args.dept)
+        dept_dists = session.execute(query).all()
+        session.close()
+        if not dept_dists:
+            print("[CLI] No matching departments found.")
+            return 1
+        CourseDogEnhance().enhance(dept_dists)
+    stamp_build("enhance")
+    return 0
+
+
+def cmd_rmp(args: argparse.Namespace) -> int:
+    import main as pipeline
+    pipeline.update_rmp()
+    pipeline.stamp_build("rmp")
+    return 0
+
+
+def cmd_srt(args: argparse.Namespace) -> int:
+    import main as pipeline
+    pipeline.update_srt(args.srt_filename)
+    pipeline.stamp_build("srt")
+    return 0
+
+
+def cmd_recompute(args: argparse.Namespace) -> int:
+    from db.Models import stamp_build
+    from src.generation.process import Process
+    from src.metrics.metrics import metrics
+    with metrics.stage("aggregates"):
+        Process.recompute_aggregates()
+        Process.update_series()
+        Process.update_professor_summaries()
+    stamp_build("recompute")
+    return 0
+
+
+def cmd_merge(args: argparse.Namespace) -> int:
+    from db.Models import stamp_build
+    from db.loader import get_loader
+    from src.generation.process import Process
+    from src.metrics.metrics import metrics
+    import main as pipeline
+    with metrics.stage("merge"):
+        for clean_filename in args.clean_filenames:
+            # Existing rows gain x500s and aliases without adding professors, so the merge below can find duplicates.
+            for df in pipeline.load_terms(clean_filename):
+                with get_loader().engine.begin() as conn:
+                    Process.sync_professors(conn, df, create=False)
+        merged = Process.merge_professors()
+    print(f"[CLI] Merged {merged} duplicate professors.")
+    if merged:
+        stamp_build("merge")
+    return 0
+
+
+def cmd_export(args: argparse.Namespace) -> int:
+    import sqlite3
+    from db.Models import engine
+    if engine.dialect.name != "sqlite" or not engine.url.database:
+        print("[CLI] Export copies a SQLite database file, use your server's own dump tools otherwise.")
+        return 1
+    if args.PerCampus:
+        from db.partition import export_campuses
+        index = export_campuses(engine.url.database, args.output)
+        for campus, entry in index["campuses"].items():
+            print(f"[CLI] {campus}: {entry['classes']} classes, {entry['professors']} professors, {entry['bytes'] / 1e6:.1f} MB -> {os.path.join(args.output, entry['file'])}")
+        print(f"[CLI] Wrote {os.path.join(args.output, 'index.json')}")
+        return 0
+    source = sqlite3.connect(engine.url.database)
+    target = sqlite3.connect(args.output)
+    with target:
+        source.backup(target)
+    source.close()
+    target.close()
+    print(f"[CLI] Exported {engine.url.database} to {args.output}")
+    return 0
+
+
+def cmd_publish(args: argparse.Namespace) -> int:
+    import json
+    from db.Models import engine
+    from db.publish import publish
+    if engine.dialect.name != "sqlite" or not engine.url.database:
+        print("[CLI] Publish copies a SQLite database file.")
+        return 1
+    report = publish(engine.url.database, args.output, args.PageSize, args.WithoutRowid, sample=args.Sample)
+    before, after = report["before"], report["after"]
+    print(f"[CLI] Published {report['source']} to {report['target']}")
+    print(f"  size          {before['bytes'] / 1e6:>9.2f} MB -> {after['bytes'] / 1e6:.2f} MB")
+    print(f"  pages         {before['page_count']:>9} x {before['page_size']} ({before['freelist_count']} free) -> {after['page_count']} x {after['page_size']} ({after['freelist_count']} free)")
+    for step, seconds in report["steps"].items():
+        print(f"  {step:<14}{seconds:>9.3f}s")
+    if report.get("without_rowid"):
+        print(f"  without rowid {', '.join(report['without_rowid'])}")
+    if "benchmark_before" in report:
+        for name, ms in report["benchmark_before"].items():
+            print(f"  {name:<14}{ms:>9.1f}ms -> {report['benchmark_after'][name]:.1f}ms")
+    print(f"  quick_check   {'; '.join(report['quick_check'])}")
+    if args.Report:
+        with open(args.Report, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0 if report["ok"] else 1
+
+
+def cmd_status(args: argparse.Namespace) -> int:
+    from sqlalchemy import inspect, text
+    from db.Models import engine, Base
+    from mapping.mappings import term_to_name
+    print(f"[CLI] Database: {engine.url}")
+    existing = set(inspect(engine).get_table_names())
+    missing = [name for name in Base.metadata.tables if name not in existing]
+    if missing:
+        print(f"[CLI] Missing tables: {', '.join(missing)}. Run `python cli.py init` to create them.")
+    with engine.connect() as conn:
+        for name in Base.metadata.tables:
+            if name in existing:
+                count = conn.execute(text(f'SELECT COUNT(*) FROM "{name}"')).scalar()
+                print(f"  {name:<24}{count:>10}")
+        if "termdistribution" in existing:
+            terms = conn.execute(text("SELECT term, COUNT(*) FROM termdistribution GROUP BY term ORDER BY term")).all()
+            print("[CLI] Terms loaded: " + (", ".join(f"{term_to_name(term)} ({n})" for term, n in terms) or "none"))
+    return 0
+
+
+def cmd_serve(args: argparse.Namespace) -> int:
+    from db.Models import engine
+    from src.api.__main__ import main as serve
+    if engine.dialect.name != "sqlite" or not engine.url.database:
+        print("[CLI] The read API serves a SQLite database file.")
+        return 1
+    return serve(["--db", engine.url.database, *args.serve_args])
+
+
+def global_options() -> argparse.ArgumentParser:
+    """The options given before the subcommand, shared by every command."""
+    options = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    options.add_argument('--db', dest='DatabaseURL', type=str, default=None, help='SQLAlchemy URL of the database to use, e.g. sqlite:///scratch.db or sqlite:// for in-memory. Defaults to $GOPHERGRADES_DB_URL, then ../ProcessedData.db.')
+    return options
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('-v','--verbose', dest='Verbose', action='store_true', help='Logs every distribution, course and professor as it is processed.')
+    common.add_argument('--report', dest='Report', type=str, default="run_report.json", help='Where to write the JSON run report.')
+    common.add_argument('-ps','--profileSQL', dest='ProfileSQL', action='store_true', help='Profiles every SQL statement by stage and shape and flags likely N+1 loops in the run report.')
+    common.add_argument('--slowQueryMs', dest='SlowQueryMs', type=float, default=50.0, help='With --profileSQL, statements slower than this are logged with their parameters.')
+    common.add_argument('--repeatThreshold', dest='RepeatThreshold', type=int, default=50, help='With --profileSQL, a statement shape repeated this often from one call site is flagged as N+1.')
+
+    parser = argparse.ArgumentParser(description='Run Data Generation!', parents=[global_options()])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("init", help="Create the database schema.").set_defaults(func=cmd_init, quiet=True)
+
+    clean = commands.add_parser("clean", help="Clean a raw registrar export, see `clean -h`.", add_help=False)
+    clean.add_argument("clean_args", nargs=argparse.REMAINDER)
+    clean.set_defaults(func=cmd_clean, quiet=True)
+
+    ingest = commands.add_parser("ingest", parents=[common], help="Load a cleaned CSV and run the enhancements.")
+    ingest.add_argument("clean_filename", type=str, help="The filename of the CSV file to process.")
+    ingest.add_argument('-dr','--disableRMP', dest='DisableRMP', action='store_true', help='Disables RMP Search.')
+    ingest.add_argument('-ds','--disableSRT', dest='DisableSRT', action='store_true', help='Disables SRT Updating for Class Distributions.')
+    ingest.add_argument('-dc','--disableCD', dest='DisableCD', action='store_true', help='Disables CourseDog Updating for Class Libeds, Titles, and Onestop Links.')
+    ingest.add_argument('--init', action='store_true', help='Create the database schema before ingesting.')
+    ingest.add_argument('--workers', dest='Workers', type=int, default=None, help='Processes used to build distributions, defaults to the number of cores.')
+    ingest.add_argument('--skipPreflight', dest='SkipPreflight', action='store_true', help='Skip checking the whole file for bad rows before anything is written.')
+    ingest.add_argument('--only', dest='Only', type=str, default=None, help='Comma separated stages to run, e.g. rmp,srt. Stages are preflight, ingest, aggregates, enhance, rmp and srt.')
+    ingest.add_argument('--from', dest='From', type=str, default=None, help='Run this stage and every stage that depends on it.')
+    ingest.add_argument('--resume', dest='Resume', action='store_true', help='Skip the stages that already finished for this file.')
+    ingest.set_defaults(func=cmd_ingest)
+
+    preflight = commands.add_parser("preflight", help="Check a cleaned CSV for every row ingest would reject, without writing anything.")
+    preflight.add_argument("clean_filename", type=str, help="The cleaned CSV to check.")
+    preflight.add_argument("--report", dest="Report", type=str, default=None, help="Also write the violations as JSON.")
+    preflight.set_defaults(func=cmd_preflight, quiet=True)
+
+    enhance = commands.add_parser("enhance", parents=[common], help="Update titles, credits, links and libeds from CourseDog.")
+    enhance.add_argument("--campus", type=str, default=None, help="Only enhance departments on this campus.")
+    enhance.add_argument("--dept", type=str, default=None, help="Only enhance this department.")
+    enhance.set_defaults(func=cmd_enhance)
+
+    commands.add_parser("rmp", parents=[common], help="Update professors from Rate My Professor.").set_defaults(func=cmd_rmp)
+
+    srt = commands.add_parser("srt", parents=[common], help="Update class distributions with SRT data.")
+    srt.add_argument("srt_filename", type=str, nargs="?", default="SRT_DATA/main.csv", help="The SRT CSV to load.")
+    srt.set_defaults(func=cmd_srt)
+
+    commands.add_parser("recompute", parents=[common], help="Recompute class totals, term series and professor summaries from term distributions.").set_defaults(func=cmd_recompute)
+
+    merge = commands.add_parser("merge", parents=[common], help="Merge duplicate professors into the professor with their x500.")
+    merge.add_argument("clean_filenames", type=str, nargs="*", help="Cleaned CSVs to learn x500s and name aliases from first.")
+    merge.set_defaults(func=cmd_merge)
+
+    export = commands.add_parser("export", help="Copy the database to a new file.")
+    export.add_argument("output", type=str, help="Path of the exported database, or the folder for --perCampus.")
+    export.add_argument("--perCampus", dest="PerCampus", action="store_true", help="Write one database per campus with only its rows, plus index.json, into the output folder.")
+    export.set_defaults(func=cmd_export, quiet=True)
+
+    publish = commands.add_parser("publish", help="Write a compacted, analyzed, read-optimized copy of the database.")
+    publish.add_argument("output", type=str, help="Path of the published database.")
+    publish.add_argument("--pageSize", dest="PageSize", type=int, default=4096, help="Page size of the published file.")
+    publish.add_argument("--withoutRowid", dest="WithoutRowid", action="store_true", help="Rebuild the libed link and department tables as WITHOUT ROWID tables.")
+    publish.add_argument("--sample", dest="Sample", type=int, default=200, help="Classes sampled to time the frontend's queries before and after, 0 skips the benchmark.")
+    publish.add_argument("--report", dest="Report", type=str, default=None, help="Also write the publish report as JSON.")
+    publish.set_defaults(func=cmd_publish, quiet=True)
+
+    commands.add_parser("status", help="Show table sizes and loaded terms.").set_defaults(func=cmd_status, quiet=True)
+
+    # serve passes its options through to the API's own parser.
+    commands.add_parser("serve", help="Serve the read API over the database, see `python -m src.api -h`.", add_help=False).set_defaults(func=cmd_serve, quiet=True)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    _, rest = global_options().parse_known_args(argv)
+    if rest[:1] == ["clean"]:
+        # clean parses its own arguments, including -h, so everything after the subcommand is passed through.
+        return cmd_clean(argparse.Namespace(clean_args=rest[1:]))
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command == "serve":
+        args.serve_args = extra
+    elif extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    if args.DatabaseURL:
+        from db.Models import configure
+        configure(args.DatabaseURL)
+    if getattr(args, "quiet", False):
+        return args.func(args)
+
+    from db.Models import engine
+    from src.metrics.metrics import metrics
+    metrics.verbose = args.Verbose
+    metrics.attach(engine)
+    if args.ProfileSQL:
+        metrics.profile(engine, args.SlowQueryMs, args.RepeatThreshold)
+
+    try:
+        return args.func(args)
+    finally:
+        metrics.write_report(args.Report)
+        print(metrics.summary())
+        print(f"[CLI] Run report written to {args.Report}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
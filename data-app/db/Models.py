@@ -1,12 +1,23 @@
-from sqlalchemy import Column, ForeignKeyConstraint, Integer, PrimaryKeyConstraint, SmallInteger, ForeignKey, VARCHAR, JSON, Float, Table, create_engine, and_
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from sqlalchemy import Column, DateTime, ForeignKeyConstraint, Index, Integer, PrimaryKeyConstraint, SmallInteger, ForeignKey, VARCHAR, JSON, Float, Table, UniqueConstraint, create_engine, event, and_, insert
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
+from sqlalchemy.pool import StaticPool
 from mapping.mappings import term_to_name
 
 """
 This file establishes the ORM for SqlAlchemy.
 
-Has definitions for Libeds, Distributions, Class Distributions, Professors, and Department Distributions.
+Has definitions for Libeds, Distributions, Class Distributions, Professors and their name aliases, Department
+Distributions, term series, professor summaries, Build Stamps and Stage Checkpoints.
+
+Relationships load lazily. Pipeline stages select the columns they need (see `DEPT_COLUMNS` and `PROF_COLUMNS`) and only
+ask for related objects with an explicit loader option where they actually walk them.
 """
 
 
@@ -17,13 +28,15 @@ libedAssociationTable = Table(
     Base.metadata,
     Column("left_id", ForeignKey("libed.id"),primary_key=True),
     Column("right_id", ForeignKey("classdistribution.id"),primary_key=True),
+    # The primary key leads with left_id, class pages look libeds up by right_id.
+    Index("ix_libedassociation_right_id", "right_id"),
 )
 
 class Libed(Base):
     __tablename__ = "libed"
     id = Column(Integer,primary_key=True)
     name = Column(VARCHAR(128),nullable=False,unique=True)
-    class_dists = relationship('ClassDistribution',secondary=libedAssociationTable,back_populates="libeds",lazy='selectin')
+    class_dists = relationship('ClassDistribution',secondary=libedAssociationTable,back_populates="libeds")
     def __str__(self) -> str:
         retVal = f"Libed: {self.name}"
         for class_dist in self.class_dists:
@@ -40,6 +53,10 @@ class TermDistribution(Base):
     term = Column(SmallInteger,nullable=False)
     grades = Column(JSON,nullable=False)
 
+    __table_args__ = (
+        UniqueConstraint('dist_id','term',name='uq_termdistribution_dist_term'),
+    )
+
     def __str__(self) -> str:
         return f"{self.classdist.dept_abbr} {self.classdist.course_num} taught by {self.dist.prof.name} in {term_to_name(self.term)} for {self.students} students with a grade distribution of {self.grades}"
     def __repr__(self) -> str:
@@ -54,6 +71,11 @@ class Distribution(Base):
     # There are ocassionally classes that do not have a professor listed, hence why this is nullable
     # It will be displayed as unlisted professor in class distributions.
     term_dists = relationship('TermDistribution',backref="dist")
+
+    __table_args__ = (
+        UniqueConstraint('class_id','professor_id',name='uq_distribution_class_professor'),
+        Index('ix_distribution_professor_id','professor_id'),
+    )
     def __str__(self) -> str:
         return f"{self.classdist.dept_abbr} {self.classdist.course_num} taught by {self.prof.name} over {len(self.term_dists)} terms."
     def __repr__(self) -> str:
@@ -70,6 +92,12 @@ class Professor(Base):
     x500 = Column(VARCHAR(16),nullable=True)
 
     dists = relationship('Distribution',backref="prof")
+    aliases = relationship('ProfessorAlias',backref="prof")
+
+    __table_args__ = (
+        # Ingest resolves professors by x500 first, names only identify those without one.
+        Index('uq_professor_x500','x500',unique=True),
+    )
 
     def __repr__(self) -> str:
         retVal = f"{self.name} has a RMP of {self.RMP_score} and has the following distributions\n"
@@ -78,6 +106,23 @@ class Professor(Base):
         return retVal
 
 
+class ProfessorAlias(Base):
+    """
+    Every name a professor has appeared under. Rows without an x500 are matched to a professor through this table, and
+    a professor whose x500 shows up under a new name gets the name added rather than a second professor.
+    """
+    __tablename__ = "professoralias"
+    name = Column(VARCHAR(255),nullable=False)
+    professor_id = Column(Integer,ForeignKey('professor.id',ondelete='CASCADE'),nullable=False)
+    __table_args__ = (
+        PrimaryKeyConstraint('name','professor_id'),
+        Index('ix_professoralias_professor_id','professor_id'),
+    )
+
+    def __repr__(self) -> str:
+        return f"{self.name} is professor {self.professor_id}"
+
+
 class ClassDistribution(Base):
     __tablename__ = "classdistribution"
     id = Column(Integer,primary_key=True)
@@ -98,10 +143,11 @@ class ClassDistribution(Base):
     srt_vals = Column(JSON,nullable=True)
 
     dists = relationship('Distribution',backref="classdist")
-    libeds = relationship('Libed',secondary=libedAssociationTable,back_populates="class_dists",lazy='selectin')
+    libeds = relationship('Libed',secondary=libedAssociationTable,back_populates="class_dists")
 
     __table_args__ = (
         ForeignKeyConstraint(['campus','dept_abbr'], ['departmentdistribution.campus','departmentdistribution.dept_abbr']),
+        UniqueConstraint('campus','dept_abbr','course_num',name='uq_classdistribution_course'),
     )
 
     def __str__(self) -> str:
@@ -116,10 +162,10 @@ class ClassDistribution(Base):
 class DepartmentDistribution(Base):
     __tablename__ = "departmentdistribution"
     campus = Column(VARCHAR(8),nullable=True)
-    dept_abbr = Column(VARCHAR(4),nullable=False, unique=True)
+    dept_abbr = Column(VARCHAR(4),nullable=False)
     
     dept_name = Column(VARCHAR(255),nullable=False)
-    class_dists = relationship('ClassDistribution',backref="dept",lazy="selectin")
+    class_dists = relationship('ClassDistribution',backref="dept")
 
     __table_args__ = (
         PrimaryKeyConstraint('campus','dept_abbr'),
@@ -132,8 +178,183 @@ class DepartmentDistribution(Base):
         return retVal
 
 
-engine = create_engine("sqlite:///../ProcessedData.db",echo=False,future=True)
+class ClassTermSeries(Base):
+    """
+    Per-term grade series of a class across all of its instructors, maintained by ingest. Rows are stored in
+    (class_id, term) order without a rowid, so a class's trend is one range scan.
+    """
+    __tablename__ = "classtermseries"
+    class_id = Column(Integer,ForeignKey('classdistribution.id',ondelete='CASCADE'),nullable=False)
+    term = Column(SmallInteger,nullable=False)
+    students = Column(Integer,nullable=False)
+    # Average over letter grades, None when a term only has S/N/W style grades.
+    gpa = Column(Float,nullable=True)
+    shares = Column(JSON,nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('class_id','term'),
+        {'sqlite_with_rowid': False},
+    )
+
+    def __repr__(self) -> str:
+        return f"Class {self.class_id} in {term_to_name(self.term)}: {self.students} students, GPA {self.gpa}"
+
+
+class ClassProfessorTermSeries(Base):
+    """The same series per distribution, i.e. per (class, professor), stored in (class_id, dist_id, term) order."""
+    __tablename__ = "classprofessortermseries"
+    class_id = Column(Integer,ForeignKey('classdistribution.id',ondelete='CASCADE'),nullable=False)
+    dist_id = Column(Integer,ForeignKey('distribution.id',ondelete='CASCADE'),nullable=False)
+    professor_id = Column(Integer,ForeignKey('professor.id',ondelete='CASCADE'),nullable=True)
+    term = Column(SmallInteger,nullable=False)
+    students = Column(Integer,nullable=False)
+    gpa = Column(Float,nullable=True)
+    shares = Column(JSON,nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('class_id','dist_id','term'),
+        Index('ix_classprofessortermseries_professor','professor_id','class_id','term'),
+        {'sqlite_with_rowid': False},
+    )
+
+    def __repr__(self) -> str:
+        return f"Class {self.class_id} by professor {self.professor_id} in {term_to_name(self.term)}: {self.students} students, GPA {self.gpa}"
+
+
+class ProfessorSummary(Base):
+    """
+    A professor's totals on one campus, maintained by ingest so instructor pages read one row instead of aggregating
+    every term distribution. Stored in (professor_id, campus) order without a rowid.
+    """
+    __tablename__ = "professorsummary"
+    professor_id = Column(Integer,ForeignKey('professor.id',ondelete='CASCADE'),nullable=False)
+    campus = Column(VARCHAR(8),nullable=False)
+    total_students = Column(Integer,nullable=False)
+    total_grades = Column(JSON,nullable=False)
+    # Average over letter grades, None when the professor only gave S/N/W style grades.
+    gpa = Column(Float,nullable=True)
+    class_count = Column(Integer,nullable=False)
+    first_term = Column(SmallInteger,nullable=False)
+    last_term = Column(SmallInteger,nullable=False)
+    # Class codes such as "CSCI 1133", sorted.
+    courses = Column(JSON,nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('professor_id','campus'),
+        {'sqlite_with_rowid': False},
+    )
+
+    def __repr__(self) -> str:
+        return f"Professor {self.professor_id} on {self.campus}: {self.class_count} classes, {self.total_students} students, GPA {self.gpa}"
+
+
+class BuildStamp(Base):
+    """
+    One row per pipeline run that changed the data. Readers key their caches on the latest `version`, so a new build
+    invalidates everything they hold at once.
+    """
+    __tablename__ = "buildstamp"
+    id = Column(Integer,primary_key=True)
+    version = Column(VARCHAR(32),nullable=False)
+    stages = Column(VARCHAR(255),nullable=False)
+    created_at = Column(DateTime,nullable=False)
+
+    def __repr__(self) -> str:
+        return f"Build {self.version} ({self.stages}) at {self.created_at}"
+
+
+class StageCheckpoint(Base):
+    """A pipeline stage that finished for one input file, identified by a hash of its contents."""
+    __tablename__ = "stagecheckpoint"
+    source = Column(VARCHAR(64),nullable=False)
+    stage = Column(VARCHAR(32),nullable=False)
+    finished_at = Column(DateTime,nullable=False)
+    seconds = Column(Float,nullable=False)
+    __table_args__ = (
+        PrimaryKeyConstraint('source','stage'),
+    )
+
+    def __repr__(self) -> str:
+        return f"Stage {self.stage} of {self.source} finished at {self.finished_at} in {self.seconds:.1f}s"
+
+
+# Loading profiles for the work lists of the pipeline stages, rows come back as named tuples.
+DEPT_COLUMNS = (DepartmentDistribution.campus, DepartmentDistribution.dept_abbr)
+PROF_COLUMNS = (Professor.id, Professor.name)
+
+
+DEFAULT_DATABASE_URL = "sqlite:///../ProcessedData.db"
+# Tuned for a single writer loading large batches, readers (the frontend) open the published file separately.
+SQLITE_PRAGMAS = {
+    "synchronous": "NORMAL",
+    "cache_size": -65536,
+    "temp_store": "MEMORY",
+    "busy_timeout": 30000,
+}
+
+
+def make_engine(url: str) -> Engine:
+    """Creates an engine for `url` with pool settings suited to its dialect."""
+    if url.startswith("sqlite"):
+        if url in ("sqlite://", "sqlite:///:memory:"):
+            # Every session has to share the one in-memory database.
+            new_engine = create_engine(url, echo=False, future=True, poolclass=StaticPool, connect_args={"check_same_thread": False})
+        else:
+            new_engine = create_engine(url, echo=False, future=True, connect_args={"check_same_thread": False})
+
+        @event.listens_for(new_engine, "connect")
+        def set_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma, value in SQLITE_PRAGMAS.items():
+                cursor.execute(f"PRAGMA {pragma}={value}")
+            cursor.close()
+
+        return new_engine
+    return create_engine(url, echo=False, future=True, pool_size=5, max_overflow=10, pool_pre_ping=True)
+
+
+engine = make_engine(os.environ.get("GOPHERGRADES_DB_URL", DEFAULT_DATABASE_URL))
+# Objects are read after commit all over the pipeline, so they are not expired on commit.
+Session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+
+def configure(url: str) -> Engine:
+    """
+    Points the models at another database, e.g. a scratch file or `sqlite://` for an in-memory database. Modules
+    should read `db.Models.engine` at call time rather than holding on to it so they follow the change.
+    """
+    global engine
+    engine.dispose()
+    engine = make_engine(url)
+    Session.configure(bind=engine)
+    return engine
+
+
+# SQLite takes one write transaction at a time. Stages running side by side in threads take turns here instead of
+# waiting out busy_timeout on each other's locks.
+_write_lock = threading.RLock()
+
+
+@contextmanager
+def write_lock():
+    """Held around a write transaction by anything that may run next to another pipeline stage."""
+    with _write_lock:
+        yield
+
+
+def stamp_build(stages: str) -> str:
+    """Records a new build version after `stages` changed the data and returns it."""
+    version = uuid.uuid4().hex
+    with write_lock(), engine.begin() as conn:
+        conn.execute(insert(BuildStamp).values(version=version, stages=stages, created_at=datetime.now(timezone.utc).replace(tzinfo=None)))
+    return version
+
+
+def create_schema() -> None:
+    """Creates any missing tables. Only run on explicit request (`python cli.py init`), never on import."""
+    Base.metadata.create_all(engine)
+
+
 if __name__ == "__main__":
     Base.metadata.drop_all(engine)
-Base.metadata.create_all(engine)
-Session = sessionmaker(bind=engine, autoflush=False)
+    create_schema()
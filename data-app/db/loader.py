@@ -0,0 +1,156 @@
+from abc import ABC, abstractmethod
+from sqlalchemy import Column, MetaData, Table, insert, select, tuple_
+from sqlalchemy.sql import Select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Engine
+
+"""
+Bulk loading for ingest writes.
+
+Stage code hands whole batches of rows to a `BulkLoader` instead of adding ORM objects one at a time. The loader for
+an engine is picked by dialect, SQLite and PostgreSQL use multi-row `INSERT ... ON CONFLICT` statements. Other dialects
+fall back to a portable implementation until they register their own fast path with `register_loader`.
+
+Larger loads copy their rows into a temporary staging table with `stage` and then `merge` them into the real tables
+with set-based `INSERT ... SELECT` statements, so the joins and key lookups run inside the database.
+"""
+
+
+MAX_PARAMETERS = 32000
+
+
+class BulkLoader(ABC):
+    """Writes batches of rows to a table, skipping or updating rows whose natural key already exists."""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+
+    @abstractmethod
+    def insert(self, conn: Connection, table: Table, rows: list[dict], keys: list[str] | None = None, update: list[str] | None = None) -> None:
+        """
+        Inserts `rows` into `table` in as few statements as the dialect allows.
+
+        :param keys: Natural key columns. Rows whose key already exists are skipped, or updated when `update` is given.
+        :param update: Columns to overwrite from the incoming row when its key already exists.
+        """
+        pass
+
+    @abstractmethod
+    def merge(self, conn: Connection, table: Table, source: Select, columns: list[str], keys: list[str], update: list[str] | None = None) -> int:
+        """
+        Inserts the rows selected by `source` into `columns` of `table` with one `INSERT ... SELECT`, and returns how many
+        rows were written.
+
+        :param keys: Natural key columns. Selected rows whose key already exists are skipped, or updated when `update` is given.
+        :param update: Columns to overwrite from the selected row when its key already exists.
+        """
+        pass
+
+    def stage(self, conn: Connection, name: str, columns: list[Column], rows: list[dict]) -> Table:
+        """
+        Creates a temporary table called `name` on `conn` and bulk-copies `rows` into it. The table only lives as long as
+        the connection, drop it with `unstage` once merged.
+        """
+        staging = Table(name, MetaData(), *columns, prefixes=["TEMPORARY"])
+        staging.drop(conn, checkfirst=True)
+        staging.create(conn)
+        if rows:
+            conn.execute(insert(staging), rows)
+        return staging
+
+    def unstage(self, conn: Connection, staging: Table) -> None:
+        staging.drop(conn)
+
+    def key_map(self, conn: Connection, table: Table, keys: list[str], wanted: set[tuple] | None = None, value: str = "id") -> dict[tuple, int]:
+        """
+        Maps natural keys to `value` (the surrogate id by default) with one query. Should a key not be unique in the
+        table, the lowest `value` wins, matching what `query(...).first()` returned before.
+
+        :param wanted: Only look these keys up. Large multi-column sets fall back to reading the whole table.
+        """
+        columns = [table.c[key] for key in keys]
+        query = select(*columns, table.c[value]).order_by(table.c[value].desc())
+        if wanted is not None and len(keys) == 1:
+            query = query.where(columns[0].in_([key[0] for key in wanted]))
+        elif wanted is not None and len(wanted) <= 500:
+            query = query.where(tuple_(*columns).in_(list(wanted)))
+        return {tuple(row[:-1]): row[-1] for row in conn.execute(query)}
+
+
+class OnConflictBulkLoader(BulkLoader):
+    """Shared implementation for dialects with `INSERT ... ON CONFLICT` (SQLite and PostgreSQL)."""
+
+    dialect_insert = None
+
+    def insert(self, conn: Connection, table: Table, rows: list[dict], keys: list[str] | None = None, update: list[str] | None = None) -> None:
+        # One multi-row INSERT per batch, batches stay below the bound parameter limit (32766 on SQLite).
+        batch_size = max(1, MAX_PARAMETERS // max(1, len(rows[0]))) if rows else 1
+        for start in range(0, len(rows), batch_size):
+            stmt = self.dialect_insert(table).values(rows[start:start + batch_size])
+            if keys and update:
+                stmt = stmt.on_conflict_do_update(index_elements=keys, set_={column: stmt.excluded[column] for column in update})
+            elif keys:
+                stmt = stmt.on_conflict_do_nothing(index_elements=keys)
+            conn.execute(stmt)
+
+    def merge(self, conn: Connection, table: Table, source: Select, columns: list[str], keys: list[str], update: list[str] | None = None) -> int:
+        stmt = self.dialect_insert(table).from_select(columns, source)
+        if update:
+            stmt = stmt.on_conflict_do_update(index_elements=keys, set_={column: stmt.excluded[column] for column in update})
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=keys)
+        return conn.execute(stmt).rowcount
+
+
+class SQLiteBulkLoader(OnConflictBulkLoader):
+    dialect_insert = staticmethod(sqlite.insert)
+
+
+class PostgreSQLBulkLoader(OnConflictBulkLoader):
+    dialect_insert = staticmethod(postgresql.insert)
+
+
+class GenericBulkLoader(BulkLoader):
+    """Portable fallback, looks up existing keys first and then issues plain executemany inserts and updates."""
+
+    def insert(self, conn: Connection, table: Table, rows: list[dict], keys: list[str] | None = None, update: list[str] | None = None) -> None:
+        if not rows:
+            return
+        if not keys:
+            conn.execute(insert(table), rows)
+            return
+        existing = set(self.key_map(conn, table, keys, value=keys[0]))
+        new_rows = [row for row in rows if tuple(row[key] for key in keys) not in existing]
+        if new_rows:
+            conn.execute(insert(table), new_rows)
+        if update:
+            changed = [row for row in rows if tuple(row[key] for key in keys) in existing]
+            for row in changed:
+                conn.execute(table.update().where(*[table.c[key] == row[key] for key in keys]).values({column: row[column] for column in update}))
+
+    def merge(self, conn: Connection, table: Table, source: Select, columns: list[str], keys: list[str], update: list[str] | None = None) -> int:
+        # Keys repeated within the selection keep their first row, as ON CONFLICT DO NOTHING would.
+        first_rows = {}
+        for row in conn.execute(source):
+            row = dict(zip(columns, row))
+            first_rows.setdefault(tuple(row[key] for key in keys), row)
+        self.insert(conn, table, list(first_rows.values()), keys, update)
+        return len(first_rows)
+
+
+LOADERS: dict[str, type[BulkLoader]] = {
+    "sqlite": SQLiteBulkLoader,
+    "postgresql": PostgreSQLBulkLoader,
+}
+
+
+def register_loader(dialect: str, loader: type[BulkLoader]) -> None:
+    """Plugs in a native fast path for another dialect."""
+    LOADERS[dialect] = loader
+
+
+def get_loader(engine: Engine | None = None) -> BulkLoader:
+    if engine is None:
+        from db import Models
+        engine = Models.engine
+    return LOADERS.get(engine.dialect.name, GenericBulkLoader)(engine)
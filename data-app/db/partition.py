@@ -0,0 +1,107 @@
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+from urllib.parse import quote
+from sqlalchemy import create_engine
+from db.Models import Base
+
+"""
+Per-campus database artifacts.
+
+`export_campuses` splits a SQLite database into one file per campus holding only that campus's departments, classes,
+distributions, term data and series, plus the professors and libeds those rows reference. Ids are copied unchanged so
+a professor or class keeps its id in every file. An `index.json` next to the files lists each campus's file, size and
+contents, and the build version it was cut from.
+"""
+
+# Rows each campus file keeps, in insert order. Every filter runs against the source (`src`) and may refer to tables
+# already copied into the campus file (`main`).
+CAMPUS_ROWS = {
+    "departmentdistribution": "campus = :campus",
+    "classdistribution": "campus = :campus",
+    "distribution": "class_id IN (SELECT id FROM main.classdistribution)",
+    "termdistribution": "dist_id IN (SELECT id FROM main.distribution)",
+    "professor": "id IN (SELECT professor_id FROM main.distribution)",
+    "libedAssociationTable": "right_id IN (SELECT id FROM main.classdistribution)",
+    "libed": "id IN (SELECT left_id FROM main.libedAssociationTable)",
+    "classtermseries": "class_id IN (SELECT id FROM main.classdistribution)",
+    "classprofessortermseries": "class_id IN (SELECT id FROM main.classdistribution)",
+    "professorsummary": "campus = :campus",
+    "buildstamp": "1",
+}
+
+
+def campus_file(out_dir: str, campus: str) -> str:
+    return os.path.join(out_dir, f"{campus}.db")
+
+
+def export_campus(source: str, target: str, campus: str) -> dict[str, int]:
+    """Writes `campus`'s rows of `source` to a new database at `target` and returns the row count per table."""
+    if os.path.exists(target):
+        os.remove(target)
+    engine = create_engine(f"sqlite:///{target}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    conn = sqlite3.connect(f"file:{quote(target)}", uri=True)
+    # The file is written once from scratch, a failed export is simply rerun.
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("ATTACH DATABASE ? AS src", (f"file:{quote(source)}?mode=ro",))
+    existing = {name for (name,) in conn.execute("SELECT name FROM src.sqlite_master WHERE type = 'table'")}
+    counts = {}
+    with conn:
+        for table, where in CAMPUS_ROWS.items():
+            if table not in existing:
+                continue
+            columns = ", ".join(f'"{column.name}"' for column in Base.metadata.tables[table].columns)
+            order = ", ".join(f'"{column.name}"' for column in Base.metadata.tables[table].primary_key.columns)
+            cursor = conn.execute(
+                f'INSERT INTO main."{table}" ({columns}) SELECT {columns} FROM src."{table}" WHERE {where} ORDER BY {order}',
+                {"campus": campus})
+            counts[table] = cursor.rowcount
+    conn.execute("DETACH DATABASE src")
+    conn.close()
+    return counts
+
+
+def export_campuses(source: str, out_dir: str, campuses: list[str] | None = None) -> dict:
+    """
+    Writes `<campus>.db` for every campus in `source` (or just `campuses`) into `out_dir`, followed by `index.json`,
+    and returns the index.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    conn = sqlite3.connect(f"file:{quote(source)}?mode=ro", uri=True)
+    if campuses is None:
+        campuses = [campus for (campus,) in conn.execute("SELECT DISTINCT campus FROM departmentdistribution WHERE campus IS NOT NULL ORDER BY campus")]
+    try:
+        stamp = conn.execute("SELECT version, created_at FROM buildstamp ORDER BY id DESC LIMIT 1").fetchone()
+    except sqlite3.OperationalError:
+        stamp = None
+
+    index = {
+        "version": stamp[0] if stamp else None,
+        "built_at": stamp[1] if stamp else None,
+        "exported_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "campuses": {},
+    }
+    for campus in campuses:
+        target = campus_file(out_dir, campus)
+        counts = export_campus(source, target, campus)
+        terms = [term for (term,) in conn.execute(
+            "SELECT DISTINCT t.term FROM termdistribution t JOIN distribution d ON d.id = t.dist_id "
+            "JOIN classdistribution c ON c.id = d.class_id WHERE c.campus = ? ORDER BY t.term", (campus,))]
+        index["campuses"][campus] = {
+            "file": os.path.basename(target),
+            "bytes": os.path.getsize(target),
+            "departments": counts.get("departmentdistribution", 0),
+            "classes": counts.get("classdistribution", 0),
+            "professors": counts.get("professor", 0),
+            "terms": terms,
+        }
+    conn.close()
+
+    with open(os.path.join(out_dir, "index.json"), "w") as f:
+        json.dump(index, f, indent=2)
+    return index
@@ -0,0 +1,153 @@
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from urllib.parse import quote
+from src.api import queries
+
+"""
+Publishes a read-optimized copy of a SQLite database for the frontend and the read API.
+
+Ingest leaves the database fragmented by many small transactions and without planner statistics. `publish` writes a
+fresh copy with `VACUUM INTO` at the chosen page size, can rebuild the link and lookup tables as `WITHOUT ROWID`
+tables clustered on their natural keys, runs `ANALYZE` and `PRAGMA quick_check`, and times the frontend's standard
+queries against the source and the copy. The copy is built in a temporary file beside the target and renamed onto it
+only when the check passes, so readers of the target never see a half-written file.
+"""
+
+# Tables keyed by a natural composite primary key that are only ever looked up by it.
+WITHOUT_ROWID_TABLES = ("libedAssociationTable", "departmentdistribution")
+PAGE_SIZES = (1024, 2048, 4096, 8192, 16384, 32768, 65536)
+
+
+def open_readonly(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def rebuild_without_rowid(conn: sqlite3.Connection, table: str) -> bool:
+    """Recreates `table` as a WITHOUT ROWID table with the same columns, keys and indexes. False if it can't be."""
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+    if row is None or row[0].rstrip().upper().endswith("WITHOUT ROWID"):
+        return False
+    primary_key = [info[1] for info in conn.execute(f'PRAGMA table_info("{table}")') if info[5]]
+    # WITHOUT ROWID primary keys are NOT NULL, rows with a NULL key part have to stay in a rowid table.
+    if not primary_key or conn.execute(f'SELECT 1 FROM "{table}" WHERE ' + " OR ".join(f'"{column}" IS NULL' for column in primary_key) + " LIMIT 1").fetchone():
+        return False
+    indexes = [sql for (sql,) in conn.execute("SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (table,))]
+    staging = f"{table}_without_rowid"
+    create = row[0].rstrip().replace(f'CREATE TABLE "{table}"', f'CREATE TABLE "{staging}"', 1).replace(f"CREATE TABLE {table}", f'CREATE TABLE "{staging}"', 1)
+    with conn:
+        conn.execute(create + " WITHOUT ROWID")
+        conn.execute(f'INSERT INTO "{staging}" SELECT * FROM "{table}"')
+        conn.execute(f'DROP TABLE "{table}"')
+        conn.execute(f'ALTER TABLE "{staging}" RENAME TO "{table}"')
+        for sql in indexes:
+            conn.execute(sql)
+    return True
+
+
+def sample_workload(conn: sqlite3.Connection, campus: str, size: int, seed: int = 0) -> list[tuple]:
+    """A fixed mix of the frontend's class, professor, department and search queries over sampled keys."""
+    rng = random.Random(seed)
+    classes = [f"{dept}{num}" for dept, num in conn.execute("SELECT dept_abbr, course_num FROM classdistribution WHERE campus = ? ORDER BY id", (campus,))]
+    profs = [prof_id for (prof_id,) in conn.execute("SELECT id FROM professor ORDER BY id")]
+    depts = [dept for (dept,) in conn.execute("SELECT dept_abbr FROM departmentdistribution WHERE campus = ? ORDER BY dept_abbr", (campus,))]
+    workload = []
+    for code in rng.sample(classes, min(size, len(classes))):
+        workload += [(queries.class_info, code, campus), (queries.class_detail, code, campus)]
+    for prof_id in rng.sample(profs, min(size // 2, len(profs))):
+        workload.append((queries.prof_detail, prof_id, campus))
+    for dept in rng.sample(depts, min(size // 4, len(depts))):
+        workload.append((queries.dept_detail, dept, campus))
+    for code in rng.sample(classes, min(size // 4, len(classes))):
+        workload.append((queries.search, code[:rng.randint(2, 5)], campus))
+    return workload
+
+
+def benchmark(path: str, workload: list[tuple], rounds: int = 3) -> dict[str, float]:
+    """Milliseconds per query kind for `workload` on `path`, the best of `rounds` runs on a fresh connection each."""
+    best = {}
+    for _ in range(rounds):
+        conn = open_readonly(path)
+        timings = {}
+        for fn, *args in workload:
+            start = time.perf_counter()
+            fn(conn, *args)
+            timings[fn.__name__] = timings.get(fn.__name__, 0.0) + time.perf_counter() - start
+        conn.close()
+        for name, seconds in timings.items():
+            best[name] = min(best.get(name, float("inf")), seconds * 1000)
+    best["total"] = sum(best.values())
+    return {name: round(ms, 2) for name, ms in best.items()}
+
+
+def file_stats(path: str) -> dict[str, int]:
+    conn = open_readonly(path)
+    stats = {name: conn.execute(f"PRAGMA {name}").fetchone()[0] for name in ("page_size", "page_count", "freelist_count")}
+    conn.close()
+    stats["bytes"] = os.path.getsize(path)
+    return stats
+
+
+def publish(source: str, target: str, page_size: int = 4096, without_rowid: bool = False, campus: str = queries.DEFAULT_CAMPUS,
+            sample: int = 200, rounds: int = 3) -> dict:
+    """
+    Writes the read-optimized copy of `source` to `target` and returns a report of sizes, timings and checks. The
+    target is left as it was when the copy fails `PRAGMA quick_check`.
+
+    :param sample: Classes sampled for the query benchmark, 0 skips it.
+    """
+    if page_size not in PAGE_SIZES:
+        raise ValueError(f"[PUBLISH] Page size must be one of {', '.join(map(str, PAGE_SIZES))}.")
+    if os.path.abspath(source) == os.path.abspath(target):
+        raise ValueError("[PUBLISH] The published copy has to go to a new file.")
+    report = {"source": os.path.abspath(source), "target": os.path.abspath(target), "before": file_stats(source), "steps": {}}
+
+    if sample:
+        conn = open_readonly(source)
+        workload = sample_workload(conn, campus, sample)
+        conn.close()
+        report["benchmark_before"] = benchmark(source, workload, rounds)
+
+    # The copy is built next to the target and only moved onto it once it checks out, so a server reading the
+    # target keeps serving the previous build until the new one replaces it in one rename.
+    fd, staging = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(target)), prefix=f".{os.path.basename(target)}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        start = time.perf_counter()
+        conn = open_readonly(source)
+        conn.execute(f"PRAGMA page_size={page_size}")
+        conn.execute("VACUUM INTO ?", (staging,))
+        conn.close()
+        report["steps"]["vacuum_into"] = round(time.perf_counter() - start, 3)
+
+        conn = sqlite3.connect(staging)
+        if without_rowid:
+            start = time.perf_counter()
+            report["without_rowid"] = [table for table in WITHOUT_ROWID_TABLES if rebuild_without_rowid(conn, table)]
+            if report["without_rowid"]:
+                conn.execute("VACUUM")
+            report["steps"]["without_rowid"] = round(time.perf_counter() - start, 3)
+        start = time.perf_counter()
+        conn.execute("ANALYZE")
+        conn.commit()
+        report["steps"]["analyze"] = round(time.perf_counter() - start, 3)
+        start = time.perf_counter()
+        report["quick_check"] = [message for (message,) in conn.execute("PRAGMA quick_check")]
+        report["steps"]["quick_check"] = round(time.perf_counter() - start, 3)
+        conn.close()
+
+        report["ok"] = report["quick_check"] == ["ok"]
+        report["after"] = file_stats(staging)
+        if sample:
+            report["benchmark_after"] = benchmark(staging, workload, rounds)
+        # A copy that fails its check never replaces the target.
+        if report["ok"]:
+            os.replace(staging, target)
+    finally:
+        if os.path.exists(staging):
+            os.remove(staging)
+    return report
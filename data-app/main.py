@@ -1,102 +1,193 @@
-import argparse
+import sys
+from typing import Iterator
 import pandas as pd
-import numpy as np
-from db.Models import Session, Professor, DepartmentDistribution, TermDistribution
+from sqlalchemy import select
+from db.Models import Session, TermDistribution, DEPT_COLUMNS, stamp_build
 
+from src.generation.preflight import Preflight
 from src.generation.process import Process
-from src.enhance.courseDog import CourseDogEnhance
-from src.rmp.rmp import RMP
-from src.srt.srt import SRT
+from src.pipeline.dag import Stage, StageGraph, file_key, finished_stages
+from src.metrics.metrics import metrics
 
-# Add all libeds as defined in libed_mapping. This is a constant addition as there are a finite amount of libed requirements.
+# CourseDog, RMP and SRT are imported inside their stages so runs that disable them skip their dependencies.
 
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description='Run Data Generation!')
-    parser.add_argument("clean_filename", type=str, help="The filename of the CSV file to process.")
-    parser.add_argument('-dr','--disableRMP', dest='DisableRMP', action='store_true', help='Disables RMP Search.')
-    parser.add_argument('-ds','--disableSRT', dest='DisableSRT', action='store_true', help='Disables SRT Updating for Class Distributions.')
-    parser.add_argument('-dc','--disableCD', dest='DisableCD', action='store_true', help='Disables CourseDog Updating for Class Libeds, Titles, and Onestop Links.')
 
-    args = parser.parse_args()
-    clean_filename = args.clean_filename
+# Columns ingest reads from a cleaned CSV, everything else (INSTITUTION, CLASS_SECTION) is skipped.
+CLEAN_DTYPES = {
+    "TERM": "int16",
+    "CAMPUS": "category",
+    "SUBJECT": "category",
+    "CATALOG_NBR": "category",
+    "DESCR": "category",
+    "CRSE_GRADE_OFF": "category",
+    "GRADE_HDCNT": "int32",
+    "NAME": "category",
+    "INTERNET_ID": "category",
+    "FULL_NAME": "category",
+}
+# Older exports have no x500 column, their professors are matched by name only.
+OPTIONAL_COLUMNS = {"INTERNET_ID"}
+CHUNK_ROWS = 250_000
 
-    print(f"[MAIN] Loading Data")
-    df = pd.read_csv(clean_filename, dtype={"CLASS_SECTION": str})
-    print(f"[MAIN] Loaded Data from {clean_filename}")
 
-    print("[MAIN] Defining Libeds")
-    Process.process_libeds()
-    print("[MAIN] Libeds Defined")
+def load_terms(clean_filename: str, skip_terms: set[int] = frozenset(), chunksize: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Streams a cleaned CSV one term at a time, reading only the columns ingest needs with compact dtypes. The TERM column
+    is scanned first so each term can be handed on as soon as its last row has been read, which keeps memory to about
+    one term for files written term by term. Terms in `skip_terms` are dropped as they are read.
+    """
+    columns = pd.read_csv(clean_filename, nrows=0).columns
+    # Older exports name the instructor column HR_NAME.
+    name_column = "NAME" if "NAME" in columns else "HR_NAME"
+    dtypes = {(name_column if column == "NAME" else column): dtype for column, dtype in CLEAN_DTYPES.items()
+              if column not in OPTIONAL_COLUMNS or column in columns}
+    missing = {column: pd.Series(dtype=CLEAN_DTYPES[column]) for column in OPTIONAL_COLUMNS - set(columns)}
 
-    print("[MAIN] Adding Instructors")
-    # Add All Instructors Including an "Unknown Instructor" for non-attributed values to the Database
-    session = Session()
-    prof_list = np.array([prof.name for prof in session.query(Professor).all()])
-    session.close()
-    data_list = df["NAME"].unique()
-    diff_list = np.setdiff1d(data_list,prof_list)
-    if diff_list.size > 0:
-        print(f"[MAIN] Adding {len(diff_list)} new instructors: {diff_list}")
-        for x in diff_list:
-            Process.process_prof(x)
-    else:
-        print("[MAIN] No new instructors found.")
+    with metrics.stage("load"):
+        remaining = pd.read_csv(clean_filename, usecols=["TERM"], dtype={"TERM": "int16"})["TERM"].value_counts().to_dict()
+    buffered: dict[int, list[pd.DataFrame]] = {}
+    reader = pd.read_csv(clean_filename, usecols=list(dtypes), dtype=dtypes, chunksize=chunksize)
+    while remaining:
+        with metrics.stage("load"):
+            chunk = next(reader, None)
+            if chunk is None:
+                break
+            metrics.count(rows=len(chunk))
+            ready = []
+            for term, part in chunk.groupby("TERM", sort=False):
+                remaining[term] -= len(part)
+                if term not in skip_terms:
+                    buffered.setdefault(term, []).append(part)
+                if remaining[term] == 0:
+                    del remaining[term]
+                    ready.append(term)
+            # Chunks carry their own categories, so a term's parts are recombined and re-encoded once complete.
+            frames = [pd.concat(buffered.pop(term), ignore_index=True).astype(dtypes).rename(columns={name_column: "NAME"}).assign(**missing)
+                      for term in ready if term in buffered]
+        for df in frames:
+            metrics.item(f"[MAIN] Loaded {len(df)} rows for term {df['TERM'].iloc[0]} from {clean_filename}")
+            yield df
 
-    session = Session()
-    if session.query(Professor).filter(Professor.name == "Unknown Instructor").first() == None:
-        session.add(Professor(name="Unknown Instructor"))
-        session.commit()
-        print("[MAIN] Added 'Unknown Instructor' to Instructors.")
-    session.close()
 
-    print("[MAIN] Finished Instructor Insertion")
+def load_data(clean_filename: str) -> pd.DataFrame:
+    """Loads every term of a cleaned CSV into one frame."""
+    frames = list(load_terms(clean_filename))
+    if not frames:
+        return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in CLEAN_DTYPES.items()})
+    return pd.concat(frames, ignore_index=True).astype(CLEAN_DTYPES)
 
-    print("[MAIN] Adding Departments")
-    session = Session()
-    dept_list = [(dept.campus, dept.dept_abbr) for dept in session.query(DepartmentDistribution).all()]
-    session.close()
-    diff_list = set(zip(df['CAMPUS'], df["SUBJECT"])).difference(set(dept_list))
-    if len(diff_list) > 0:
-        missingDepts = []
-        for x in diff_list:
-            print(f"[MAIN] Processing Department: {x[0], x[1]}")
-            try:
-                Process.process_dept(x)
-            except ValueError as e:
-                hasError = True
-                missingDepts.append(x)
-
-        if len(missingDepts) > 0:
-            print(f"[MAIN] The following departments failed to process: {sorted(missingDepts)}")
-            raise ValueError("[MAIN] One or more departments failed to process. See errors above.")
-    
-    else:
-        print("[MAIN] No new departments found.")
-    
-    print("[MAIN] Finished Department Insertion")
-
-    print("[MAIN] Generating Distributions")
+
+def loaded_terms() -> set[int]:
     session = Session()
-    new_additions = df[~df["TERM"].isin(list(set(TermDist.term for TermDist in session.query(TermDistribution).all())))]
+    terms = {term for (term,) in session.query(TermDistribution.term).distinct()}
     session.close()
-    new_additions.groupby(["TERM", "NAME", "FULL_NAME", "CAMPUS"], group_keys=False).apply(Process.process_dist)
-    print("[MAIN] Finished Generating Distributions")
+    return terms
 
-    if not args.DisableCD:
-        print("[MAIN] Beginning CourseDog Updating")
+
+def sync_dimensions(df: pd.DataFrame) -> None:
+    # Libeds, professors and departments the term needs, computed with set differences and added in one transaction.
+    with metrics.stage("dimensions"):
+        Process.sync_dimensions(df)
+    metrics.item("[MAIN] Finished Syncing Libeds, Instructors and Departments")
+
+
+def add_distributions(df: pd.DataFrame, workers: int | None = None) -> None:
+    with metrics.stage("distributions"):
+        new_additions = df[~df["TERM"].isin(loaded_terms())]
+        metrics.count(rows=len(new_additions))
+        # Histograms are built per (campus, subject) in a pool, then written by this process in one transaction along
+        # with the new terms' series and the summaries of professors who taught in them. Everything else is left as is.
+        Process.load_dists(Process.build_dists_partitioned(new_additions, workers))
+    metrics.item("[MAIN] Finished Generating Distributions")
+
+
+def recompute_totals() -> None:
+    with metrics.stage("aggregates"):
+        Process.recompute_aggregates()
+    metrics.item("[MAIN] Finished Recomputing Class Totals")
+
+
+def update_coursedog() -> None:
+    from src.enhance.courseDog import CourseDogEnhance
+    with metrics.stage("enhance"):
         session = Session()
-        dept_dists = session.query(DepartmentDistribution).all()
+        dept_dists = session.execute(select(*DEPT_COLUMNS)).all()
         session.close()
         CourseDogEnhance().enhance(dept_dists)
-        print("[MAIN] Finished CourseDog Updating")
-    
-    if not args.DisableRMP:
-        print("[MAIN] RMP Update For Instructors")
+    metrics.item("[MAIN] Finished CourseDog Updating")
+
+
+def update_rmp() -> None:
+    from src.rmp.rmp import RMP
+    with metrics.stage("rmp"):
         RMP().update_profs()
-        print("[MAIN] RMP Updated")
-    
-    if not args.DisableSRT:
-        print("[MAIN] Beginning SRT Updating")
-        SRT.initialize("SRT_DATA/main.csv")
+    metrics.item("[MAIN] RMP Updated")
+
+
+def update_srt(srt_filename: str = "SRT_DATA/main.csv") -> None:
+    from src.srt.srt import SRT
+    with metrics.stage("srt"):
+        SRT.initialize(srt_filename)
         SRT.insertReviews()
-        print("[MAIN] Finished SRT Updating")
\ No newline at end of file
+    metrics.item("[MAIN] Finished SRT Updating")
+
+
+def stages(clean_filename: str, disable_cd: bool = False, disable_rmp: bool = False, disable_srt: bool = False, workers: int | None = None,
+           preflight: bool = True, srt_filename: str = "SRT_DATA/main.csv") -> StageGraph:
+    """
+    The pipeline for one cleaned CSV. Preflight checks come first and the distributions second. Class totals,
+    CourseDog, RMP and SRT only need the distributions, so they run side by side.
+    """
+
+    def ingest() -> None:
+        for df in load_terms(clean_filename, skip_terms=loaded_terms()):
+            sync_dimensions(df)
+            add_distributions(df, workers)
+
+    graph = []
+    if preflight:
+        graph.append(Stage("preflight", lambda: Preflight.run(clean_filename), changes_data=False))
+    graph.append(Stage("ingest", ingest, after=("preflight",) if preflight else (), exclusive=True))
+    graph.append(Stage("aggregates", recompute_totals, after=("ingest",), exclusive=True))
+    if not disable_cd:
+        graph.append(Stage("enhance", update_coursedog, after=("ingest",)))
+    if not disable_rmp:
+        graph.append(Stage("rmp", update_rmp, after=("ingest",)))
+    if not disable_srt:
+        graph.append(Stage("srt", lambda: update_srt(srt_filename), after=("ingest",)))
+    return StageGraph(graph)
+
+
+def run(clean_filename: str, disable_cd: bool = False, disable_rmp: bool = False, disable_srt: bool = False, workers: int | None = None,
+        preflight: bool = True, only: list[str] | None = None, start: str | None = None, resume: bool = False) -> None:
+    """
+    Runs the pipeline for one cleaned CSV (see `stages`) and ends by stamping a new build version if any stage that
+    changes data ran.
+
+    :param preflight: Check the whole file before anything is written and stop if it has errors.
+    :param only: Run just these stages.
+    :param start: Run this stage and every stage after it.
+    :param resume: Skip the stages that already finished for this file.
+    """
+    graph = stages(clean_filename, disable_cd, disable_rmp, disable_srt, workers, preflight)
+    source = file_key(clean_filename)
+    skip = finished_stages(source) if resume else set()
+    selected = graph.select(only, start, skip)
+    print(f"[PIPELINE] Running {', '.join(selected) or 'nothing'}" + (f", already finished: {', '.join(sorted(skip & set(graph.stages)))}" if skip else ""))
+    try:
+        graph.run(selected, source)
+    finally:
+        # Stages that finished before a failure have still changed the data.
+        ran = [name for name in graph.order if name in graph.finished and graph.stages[name].changes_data]
+        if ran:
+            stamp_build(",".join(ran))
+
+
+def main() -> int:
+    # Kept for `python main.py <clean_filename>`, which is the same as `python cli.py ingest <clean_filename>`.
+    from cli import main as cli_main
+    return cli_main(["ingest", *sys.argv[1:]])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
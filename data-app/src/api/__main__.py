@@ -0,0 +1,39 @@
+import argparse
+import sys
+from aiohttp import web
+from src.api.server import create_app
+
+"""
+Runs the read API. From the data-app folder:
+
+    python -m src.api [--db ../ProcessedData.db] [--port 8080] [--pool 4]
+
+The database defaults to the file of `$GOPHERGRADES_DB_URL`, then ../ProcessedData.db, and is only ever opened read-only.
+"""
+
+
+def default_path() -> str | None:
+    from db.Models import engine
+    return engine.url.database if engine.dialect.name == "sqlite" else None
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve class, professor, department and search lookups from a GopherGrades database.")
+    parser.add_argument("--db", dest="Path", type=str, default=None, help="SQLite file to serve, defaults to the pipeline's database.")
+    parser.add_argument("--host", dest="Host", type=str, default="127.0.0.1", help="Interface to listen on.")
+    parser.add_argument("--port", dest="Port", type=int, default=8080, help="Port to listen on.")
+    parser.add_argument("--pool", dest="Pool", type=int, default=4, help="Read-only connections, and so queries run at once.")
+    parser.add_argument("--maxAge", dest="MaxAge", type=int, default=60, help="Seconds clients may reuse a response before revalidating.")
+    parser.add_argument("--cacheSize", dest="CacheSize", type=int, default=4096, help="Query results cached for the current build, 0 disables the cache.")
+    args = parser.parse_args(argv)
+
+    path = args.Path or default_path()
+    if not path:
+        print("[API] The read API serves a SQLite file, pass one with --db.")
+        return 1
+    web.run_app(create_app(path, args.Pool, args.MaxAge, args.CacheSize), host=args.Host, port=args.Port)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
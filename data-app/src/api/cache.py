@@ -0,0 +1,50 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable
+
+"""
+Query result cache keyed on the build version.
+
+Reads of a published database are pure functions of its build, so results never need invalidating one by one. The
+cache remembers which version its entries belong to and empties itself the first time it is asked about another.
+"""
+
+MISSING = object()
+
+
+class BuildCache:
+    """Size-bounded, thread-safe LRU of query results for one build version."""
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.version = None
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _switch(self, version: str) -> None:
+        if version != self.version:
+            self.version = version
+            self.entries.clear()
+
+    def get(self, version: str, key: Hashable) -> Any:
+        """The cached result for `key` under `version`, or `MISSING`. Results are shared, treat them as read-only."""
+        with self._lock:
+            self._switch(version)
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            self.misses += 1
+            return MISSING
+
+    def put(self, version: str, key: Hashable, value: Any) -> None:
+        with self._lock:
+            # A result read just before a new build was noticed belongs to the old one, drop it.
+            if version != self.version or self.maxsize <= 0:
+                return
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
@@ -0,0 +1,110 @@
+import argparse
+import asyncio
+import random
+import sqlite3
+import sys
+import time
+from collections import Counter
+from urllib.parse import quote
+import aiohttp
+
+"""
+Load test for a running read API. Request targets are sampled from the database being served:
+
+    python -m src.api.loadtest --db ../ProcessedData.db --requests 5000 --concurrency 32
+    python -m src.api.loadtest --db ../ProcessedData.db --revalidate    # clients holding ETags, mostly 304s
+
+Prints throughput, latency percentiles and the status codes seen.
+"""
+
+
+def sample_paths(path: str, campus: str, count: int, batch: int, seed: int) -> list[str]:
+    conn = sqlite3.connect(f"file:{quote(path)}?mode=ro", uri=True)
+    classes = [f"{dept}{num}" for dept, num in conn.execute("SELECT dept_abbr, course_num FROM classdistribution WHERE campus = ?", (campus,))]
+    profs = [str(prof_id) for (prof_id,) in conn.execute("SELECT id FROM professor")]
+    depts = [dept for (dept,) in conn.execute("SELECT dept_abbr FROM departmentdistribution WHERE campus = ?", (campus,))]
+    conn.close()
+    if not classes:
+        raise SystemExit(f"[LOADTEST] No {campus} classes in {path}.")
+
+    rng = random.Random(seed)
+    # Roughly the mix of a browsing session: mostly class pages, some professors, departments, searches and batches.
+    makers = [
+        (0.5, lambda: f"/class/{rng.choice(classes)}"),
+        (0.15, lambda: f"/prof/{rng.choice(profs)}"),
+        (0.1, lambda: f"/dept/{rng.choice(depts)}"),
+        (0.15, lambda: f"/search?q={rng.choice(classes)[:rng.randint(2, 5)]}"),
+        (0.1, lambda: "/classes?codes=" + ",".join(rng.sample(classes, min(batch, len(classes))))),
+    ]
+    weights = [weight for weight, _ in makers]
+    return [rng.choices(makers, weights)[0][1]() for _ in range(count)]
+
+
+async def worker(session: aiohttp.ClientSession, base: str, queue: asyncio.Queue, latencies: list, statuses: Counter,
+                 etags: dict | None) -> None:
+    while True:
+        try:
+            path = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        headers = {"If-None-Match": etags[path]} if etags is not None and path in etags else {}
+        start = time.perf_counter()
+        try:
+            async with session.get(base + path, headers=headers) as response:
+                await response.read()
+                statuses[response.status] += 1
+                if etags is not None and "ETag" in response.headers:
+                    etags[path] = response.headers["ETag"]
+        except aiohttp.ClientError as e:
+            statuses[type(e).__name__] += 1
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(base: str, paths: list[str], concurrency: int, revalidate: bool) -> tuple[float, list[float], Counter]:
+    queue = asyncio.Queue()
+    for path in paths:
+        queue.put_nowait(path)
+    latencies, statuses = [], Counter()
+    etags = {} if revalidate else None
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        if revalidate:
+            # Prime the ETags so the measured requests are revalidations.
+            for path in set(paths):
+                async with session.get(base + path) as response:
+                    await response.read()
+                    etags[path] = response.headers.get("ETag", "")
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(session, base, queue, latencies, statuses, etags) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return elapsed, latencies, statuses
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the read API.")
+    parser.add_argument("--url", dest="Url", type=str, default="http://127.0.0.1:8080", help="Base URL of the running API.")
+    parser.add_argument("--db", dest="Path", type=str, default="../ProcessedData.db", help="The database the API serves, used to pick request targets.")
+    parser.add_argument("--campus", dest="Campus", type=str, default="UMNTC", help="Campus to sample classes and departments from.")
+    parser.add_argument("--requests", dest="Requests", type=int, default=2000, help="Total requests to send.")
+    parser.add_argument("--concurrency", dest="Concurrency", type=int, default=32, help="Requests in flight at once.")
+    parser.add_argument("--batch", dest="Batch", type=int, default=20, help="Classes per /classes batch request.")
+    parser.add_argument("--revalidate", dest="Revalidate", action="store_true", help="Send If-None-Match with ETags from earlier responses.")
+    parser.add_argument("--seed", dest="Seed", type=int, default=0, help="Seed for sampling request targets.")
+    args = parser.parse_args(argv)
+
+    paths = sample_paths(args.Path, args.Campus, args.Requests, args.Batch, args.Seed)
+    elapsed, latencies, statuses = asyncio.run(run(args.Url.rstrip("/"), paths, args.Concurrency, args.Revalidate))
+    print(f"[LOADTEST] {len(latencies)} requests in {elapsed:.2f}s, {len(latencies) / elapsed:.0f} req/s at concurrency {args.Concurrency}")
+    print(f"[LOADTEST] latency p50 {percentile(latencies, 0.5) * 1000:.1f}ms  p95 {percentile(latencies, 0.95) * 1000:.1f}ms  "
+          f"p99 {percentile(latencies, 0.99) * 1000:.1f}ms  max {max(latencies) * 1000:.1f}ms")
+    print("[LOADTEST] statuses " + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items(), key=str)))
+    return 0 if all(isinstance(status, int) and status < 500 for status in statuses) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+import asyncio
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Concatenate, ParamSpec, TypeVar
+from urllib.parse import quote
+from src.api import queries
+from src.api.cache import BuildCache, MISSING
+
+"""
+A fixed pool of read-only SQLite connections for the API.
+
+Queries run on a thread pool with one thread per connection, so the event loop never blocks on SQLite and at most
+`size` queries run at once. Connections are opened with `mode=ro` and `query_only`, and keep a statement cache large
+enough for every query in `queries.py`.
+
+`BuildWatcher` follows the build version ingest stamps into the database. Results are cached per version in a
+`BuildCache`, so a new build drops them all at once. When the file is replaced (a new publish) connections are
+reopened as they are handed back, so requests move to the new build without a restart.
+"""
+
+STATEMENT_CACHE = 64
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+def connect(path: str) -> sqlite3.Connection:
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"[API] Database {path} does not exist.")
+    conn = sqlite3.connect(f"file:{quote(path)}?mode=ro", uri=True, check_same_thread=False, cached_statements=STATEMENT_CACHE)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA query_only=1")
+    return conn
+
+
+class BuildWatcher:
+    """Tracks the build version of a database file and notices when the file is replaced."""
+
+    def __init__(self, path: str, check_interval: float = 1.0):
+        """
+        :param check_interval: Seconds between checks for a new build.
+        """
+        self.path = os.path.abspath(path)
+        self.check_interval = check_interval
+        self.generation = 0
+        self.version = ""
+        self.modified = datetime.now(timezone.utc)
+        self._conn = None
+        self._file = None
+        self._checked = 0.0
+
+    def refresh(self, force: bool = False) -> str:
+        """Re-reads the build version, at most once per `check_interval`."""
+        now = time.monotonic()
+        if not force and now - self._checked < self.check_interval:
+            return self.version
+        self._checked = now
+        stat = os.stat(self.path)
+        if (stat.st_dev, stat.st_ino) != self._file:
+            if self._file is not None:
+                self.generation += 1
+            self._file = (stat.st_dev, stat.st_ino)
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = connect(self.path)
+        stamp = queries.build_stamp(self._conn)
+        if stamp is not None:
+            self.version = stamp["version"]
+            self.modified = stamp["created_at"]
+        else:
+            # Databases built before build stamps fall back to the file itself.
+            self.version = f"{stat.st_ino:x}-{stat.st_mtime_ns:x}-{stat.st_size:x}"
+            self.modified = datetime.fromtimestamp(int(stat.st_mtime), timezone.utc)
+        return self.version
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class ReadPool:
+    def __init__(self, path: str, size: int = 4, check_interval: float = 1.0, cache_size: int = 4096):
+        self.path = os.path.abspath(path)
+        self.size = size
+        self.executor = ThreadPoolExecutor(size, thread_name_prefix="api-read")
+        self.build = BuildWatcher(self.path, check_interval)
+        self.cache = BuildCache(cache_size)
+        self.idle: asyncio.Queue | None = None
+
+    async def open(self) -> None:
+        self.build.refresh(force=True)
+        self.idle = asyncio.Queue()
+        for _ in range(self.size):
+            self.idle.put_nowait((self.build.generation, connect(self.path)))
+
+    async def close(self) -> None:
+        while self.idle is not None and not self.idle.empty():
+            _, conn = self.idle.get_nowait()
+            conn.close()
+        self.build.close()
+        self.executor.shutdown(wait=True)
+
+    async def run(self, fn: Callable[Concatenate[sqlite3.Connection, P], T], *args: P.args) -> T:
+        """
+        Returns `fn(conn, *args)` for the current build, from the cache when it has been read before, otherwise run on
+        a pooled connection in the pool's threads.
+        """
+        version = self.build.version
+        key = (fn.__qualname__, args)
+        result = self.cache.get(version, key)
+        if result is MISSING:
+            result = await self.execute(fn, *args)
+            self.cache.put(version, key, result)
+        return result
+
+    async def run_batch(self, fn: Callable[..., T], calls: list[tuple]) -> list[T]:
+        """`run` for many argument tuples at once, the uncached calls share one connection and one trip to the threads."""
+        version = self.build.version
+        keys = [(fn.__qualname__, args) for args in calls]
+        results = [self.cache.get(version, key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is MISSING]
+        if missing:
+            fresh = await self.execute(lambda conn: [fn(conn, *calls[i]) for i in missing])
+            for i, result in zip(missing, fresh):
+                results[i] = result
+                self.cache.put(version, keys[i], result)
+        return results
+
+    async def execute(self, fn: Callable[Concatenate[sqlite3.Connection, P], T], *args: P.args) -> T:
+        """Runs `fn(conn, *args)` uncached on a pooled connection in the pool's threads."""
+        generation, conn = await self.idle.get()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, conn, *args)
+        finally:
+            if generation != self.build.generation:
+                try:
+                    fresh = connect(self.path)
+                    conn.close()
+                    generation, conn = self.build.generation, fresh
+                except (OSError, sqlite3.Error):
+                    # Mid-publish the new file may not be readable yet, keep the old connection and retry next time.
+                    pass
+            self.idle.put_nowait((generation, conn))
@@ -0,0 +1,428 @@
+import json
+import re
+import sqlite3
+from datetime import datetime, timezone
+from itertools import groupby
+from typing import TypedDict
+
+"""
+Typed read queries, ported from the frontend's `lib/db.js`. The API serves them, and Python callers can use them
+through `src.api.read.Reader`.
+
+Every function takes a read-only `sqlite3.Connection` whose rows are `sqlite3.Row`. The SQL is kept in module
+constants and only ever bound with parameters, so each connection prepares a statement once and reuses it from its
+statement cache. Class codes are split into department and course number so lookups go through the
+(campus, dept_abbr, course_num) key instead of concatenating columns for every row.
+"""
+
+DEFAULT_CAMPUS = "UMNTC"
+SEARCH_LIMIT = 10
+
+CLASS_CODE = re.compile(r"([A-Z]+)\s*(\d[0-9A-Z]*)")
+
+CLASS_SQL = """
+    SELECT c.*, d.dept_name
+    FROM classdistribution c
+             LEFT JOIN departmentdistribution d ON c.campus = d.campus AND c.dept_abbr = d.dept_abbr
+    WHERE c.campus = ? AND c.dept_abbr = ? AND c.course_num = ?"""
+
+CLASS_LIBEDS_SQL = """
+    SELECT l.id, l.name
+    FROM libedAssociationTable lat
+             JOIN libed l ON lat.left_id = l.id
+    WHERE lat.right_id = ?
+    ORDER BY l.id"""
+
+CLASS_DISTRIBUTIONS_SQL = """
+    SELECT d.id AS distribution_id, d.professor_id, p.name AS professor_name, p.RMP_score AS professor_RMP_score,
+           t.term, t.students, t.grades
+    FROM distribution d
+             JOIN termdistribution t ON t.dist_id = d.id
+             LEFT JOIN professor p ON d.professor_id = p.id
+    WHERE d.class_id = ?
+    ORDER BY d.professor_id IS NULL, d.professor_id, t.term"""
+
+PROF_SQL = """
+    SELECT *
+    FROM professor
+    WHERE id = ?"""
+
+PROF_CLASSES_SQL = """
+    SELECT c.id AS class_id, c.dept_abbr, c.course_num, c.class_desc, c.total_students, d.id AS distribution_id,
+           t.term, t.students, t.grades
+    FROM distribution d
+             JOIN classdistribution c ON d.class_id = c.id
+             JOIN termdistribution t ON t.dist_id = d.id
+    WHERE d.professor_id = ? AND c.campus = ?
+    ORDER BY c.id, t.term"""
+
+PROF_SUMMARY_SQL = """
+    SELECT p.*, s.total_students, s.total_grades, s.gpa, s.class_count, s.first_term, s.last_term, s.courses
+    FROM professorsummary s
+             JOIN professor p ON s.professor_id = p.id
+    WHERE s.professor_id = ? AND s.campus = ?"""
+
+DEPT_SQL = """
+    SELECT *
+    FROM departmentdistribution
+    WHERE campus = ? AND dept_abbr = ?"""
+
+DEPT_CLASSES_SQL = """
+    SELECT *
+    FROM classdistribution
+    WHERE campus = ? AND dept_abbr = ?
+    ORDER BY course_num"""
+
+SEARCH_CLASSES_SQL = """
+    SELECT id, dept_abbr || ' ' || course_num AS class_name, class_desc, total_students
+    FROM classdistribution
+    WHERE campus = ? AND (dept_abbr || course_num LIKE ? OR REPLACE(class_desc, ' ', '') LIKE ?)
+    ORDER BY total_students DESC
+    LIMIT ?"""
+
+SEARCH_PROFS_SQL = """
+    SELECT *
+    FROM professor
+    WHERE REPLACE(name, ' ', '') LIKE ? AND EXISTS (
+        SELECT 1
+        FROM distribution d
+                 JOIN classdistribution c ON d.class_id = c.id
+        WHERE d.professor_id = professor.id AND c.campus = ?
+    )
+    ORDER BY RMP_score DESC
+    LIMIT ?"""
+
+SEARCH_DEPTS_SQL = """
+    SELECT *
+    FROM departmentdistribution
+    WHERE campus = ? AND (dept_name LIKE ? OR dept_abbr LIKE ?)
+    LIMIT ?"""
+
+CLASS_ID_SQL = """
+    SELECT id
+    FROM classdistribution
+    WHERE campus = ? AND dept_abbr = ? AND course_num = ?"""
+
+CLASS_SERIES_SQL = """
+    SELECT term, students, gpa, shares
+    FROM classtermseries
+    WHERE class_id = ?
+    ORDER BY term"""
+
+CLASS_PROFESSOR_SERIES_SQL = """
+    SELECT s.professor_id, p.name AS professor_name, s.term, s.students, s.gpa, s.shares
+    FROM classprofessortermseries s
+             LEFT JOIN professor p ON s.professor_id = p.id
+    WHERE s.class_id = ?
+    ORDER BY s.dist_id, s.term"""
+
+PROF_SERIES_SQL = """
+    SELECT s.class_id, c.dept_abbr, c.course_num, s.term, s.students, s.gpa, s.shares
+    FROM classprofessortermseries s
+             JOIN classdistribution c ON s.class_id = c.id
+    WHERE s.professor_id = ? AND c.campus = ?
+    ORDER BY s.professor_id, s.class_id, s.term"""
+
+BUILD_STAMP_SQL = """
+    SELECT version, created_at
+    FROM buildstamp
+    ORDER BY id DESC
+    LIMIT 1"""
+
+JSON_COLUMNS = ("grades", "total_grades", "srt_vals", "shares", "courses")
+
+
+class BuildStamp(TypedDict):
+    version: str
+    created_at: datetime
+
+
+class TermGrades(TypedDict):
+    term: int
+    grades: dict[str, int]
+    students: int
+
+
+class GradeSummary(TypedDict):
+    grades: dict[str, int]
+    students: int
+    terms: list[TermGrades]
+
+
+class LibedRef(TypedDict):
+    id: int
+    name: str
+
+
+class ClassRow(TypedDict):
+    id: int
+    campus: str
+    dept_abbr: str
+    course_num: str
+    class_desc: str
+    total_students: int
+    total_grades: dict[str, int]
+    onestop: str | None
+    onestop_desc: str | None
+    cred_min: int | None
+    cred_max: int | None
+    srt_vals: dict[str, float] | None
+
+
+class ClassInfo(ClassRow):
+    dept_name: str | None
+    libEds: list[LibedRef]
+
+
+class ProfessorDistribution(GradeSummary):
+    distribution_id: int
+    professor_id: int | None
+    professor_name: str | None
+    professor_RMP_score: float | None
+
+
+class ClassDetail(ClassInfo):
+    distributions: list[ProfessorDistribution]
+
+
+class ProfessorInfo(TypedDict):
+    id: int
+    name: str
+    RMP_score: float | None
+    RMP_diff: float | None
+    RMP_link: str | None
+    x500: str | None
+
+
+class ProfessorClass(GradeSummary):
+    class_id: int
+    distribution_id: int
+    dept_abbr: str
+    course_num: str
+    class_desc: str
+    total_students: int
+
+
+class ProfessorDetail(ProfessorInfo):
+    distributions: list[ProfessorClass]
+
+
+class ProfessorSummary(ProfessorInfo):
+    total_students: int
+    total_grades: dict[str, int]
+    gpa: float | None
+    class_count: int
+    first_term: int
+    last_term: int
+    courses: list[str]
+
+
+class DepartmentInfo(TypedDict):
+    campus: str
+    dept_abbr: str
+    dept_name: str
+
+
+class DepartmentDetail(DepartmentInfo):
+    distributions: list[ClassRow]
+
+
+class ClassMatch(TypedDict):
+    id: int
+    class_name: str
+    class_desc: str
+    total_students: int
+
+
+class SeriesPoint(TypedDict):
+    term: int
+    students: int
+    gpa: float | None
+    shares: dict[str, float]
+
+
+class ProfessorSeries(TypedDict):
+    professor_id: int | None
+    professor_name: str | None
+    series: list[SeriesPoint]
+
+
+class ClassTrend(TypedDict):
+    series: list[SeriesPoint]
+    professors: list[ProfessorSeries]
+
+
+class ProfessorClassTrend(TypedDict):
+    class_id: int
+    dept_abbr: str
+    course_num: str
+    series: list[SeriesPoint]
+
+
+class SearchResult(TypedDict):
+    departments: list[DepartmentInfo]
+    classes: list[ClassMatch]
+    professors: list[ProfessorInfo]
+
+
+def split_code(code: str) -> tuple[str, str] | None:
+    """Splits a class code such as "CSCI 1133" or "csci1133" into ("CSCI", "1133"), None if it is not one."""
+    match = CLASS_CODE.fullmatch(code.strip().upper())
+    return match.groups() if match else None
+
+
+def to_dict(row: sqlite3.Row) -> dict:
+    """Converts a row to a dict with its JSON columns decoded."""
+    record = dict(row)
+    for column in JSON_COLUMNS:
+        if isinstance(record.get(column), str):
+            record[column] = json.loads(record[column])
+    return record
+
+
+def summarize_terms(rows: list[sqlite3.Row], key: str, fields: tuple[str, ...]) -> list[GradeSummary]:
+    """
+    Groups term rows, already ordered by `key`, into one entry per `key` holding `fields` of its first row, the summed
+    grades and students, and the per-term breakdown.
+    """
+    summaries = []
+    for _, group in groupby(rows, key=lambda row: row[key]):
+        group = list(group)
+        grades = {}
+        terms = []
+        for row in group:
+            term_grades = json.loads(row["grades"])
+            for grade, count in term_grades.items():
+                grades[grade] = grades.get(grade, 0) + count
+            terms.append({"term": row["term"], "grades": term_grades, "students": row["students"]})
+        summary = {field: group[0][field] for field in fields}
+        summary.update(grades=grades, students=sum(term["students"] for term in terms), terms=terms)
+        summaries.append(summary)
+    return summaries
+
+
+def build_stamp(conn: sqlite3.Connection) -> BuildStamp | None:
+    """The latest build version ingest stamped, None for databases built before stamps or without any build."""
+    try:
+        row = conn.execute(BUILD_STAMP_SQL).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    if row is None:
+        return None
+    created_at = datetime.fromisoformat(row["created_at"]).replace(microsecond=0, tzinfo=timezone.utc)
+    return {"version": row["version"], "created_at": created_at}
+
+
+def class_info(conn: sqlite3.Connection, code: str, campus: str = DEFAULT_CAMPUS) -> ClassInfo | None:
+    """Mirrors getClassInfo, the class with its department name and libeds."""
+    parts = split_code(code)
+    if parts is None:
+        return None
+    row = conn.execute(CLASS_SQL, (campus, *parts)).fetchone()
+    if row is None:
+        return None
+    info = to_dict(row)
+    info["libEds"] = [dict(libed) for libed in conn.execute(CLASS_LIBEDS_SQL, (info["id"],))]
+    return info
+
+
+def class_distributions(conn: sqlite3.Connection, class_id: int) -> list[ProfessorDistribution]:
+    """Mirrors getDistribution, one entry per professor who taught the class."""
+    rows = conn.execute(CLASS_DISTRIBUTIONS_SQL, (class_id,)).fetchall()
+    return summarize_terms(rows, "professor_id", ("distribution_id", "professor_id", "professor_name", "professor_RMP_score"))
+
+
+def class_detail(conn: sqlite3.Connection, code: str, campus: str = DEFAULT_CAMPUS) -> ClassDetail | None:
+    """A class with its distributions, the payload of the class page."""
+    info = class_info(conn, code, campus)
+    if info is None:
+        return None
+    info["distributions"] = class_distributions(conn, info["id"])
+    return info
+
+
+def series_points(rows: list[sqlite3.Row]) -> list[SeriesPoint]:
+    return [{"term": row["term"], "students": row["students"], "gpa": row["gpa"], "shares": json.loads(row["shares"])} for row in rows]
+
+
+def grouped_series(rows, key: str, fields: tuple[str, ...]) -> list[dict]:
+    """Groups series rows, already ordered by `key`, into `fields` of each group's first row and the group's series."""
+    grouped = []
+    for _, group in groupby(rows, key=lambda row: row[key]):
+        group = list(group)
+        entry = {field: group[0][field] for field in fields}
+        entry["series"] = series_points(group)
+        grouped.append(entry)
+    return grouped
+
+
+def class_trend(conn: sqlite3.Connection, code: str, campus: str = DEFAULT_CAMPUS) -> ClassTrend | None:
+    """Term-ordered series of a class overall and per professor, read from the materialized series tables."""
+    parts = split_code(code)
+    row = conn.execute(CLASS_ID_SQL, (campus, *parts)).fetchone() if parts is not None else None
+    if row is None:
+        return None
+    return {
+        "series": series_points(conn.execute(CLASS_SERIES_SQL, (row["id"],)).fetchall()),
+        "professors": grouped_series(conn.execute(CLASS_PROFESSOR_SERIES_SQL, (row["id"],)), "professor_id", ("professor_id", "professor_name")),
+    }
+
+
+def prof_info(conn: sqlite3.Connection, prof_id: int) -> ProfessorInfo | None:
+    """Mirrors getInstructorInfo."""
+    row = conn.execute(PROF_SQL, (prof_id,)).fetchone()
+    return to_dict(row) if row is not None else None
+
+
+def prof_classes(conn: sqlite3.Connection, prof_id: int, campus: str = DEFAULT_CAMPUS) -> list[ProfessorClass]:
+    """Mirrors getInstructorClasses, one entry per class the professor taught on `campus`."""
+    rows = conn.execute(PROF_CLASSES_SQL, (prof_id, campus)).fetchall()
+    return summarize_terms(rows, "class_id", ("class_id", "distribution_id", "dept_abbr", "course_num", "class_desc", "total_students"))
+
+
+def prof_detail(conn: sqlite3.Connection, prof_id: int, campus: str = DEFAULT_CAMPUS) -> ProfessorDetail | None:
+    info = prof_info(conn, prof_id)
+    if info is None:
+        return None
+    info["distributions"] = prof_classes(conn, prof_id, campus)
+    return info
+
+
+def prof_trend(conn: sqlite3.Connection, prof_id: int, campus: str = DEFAULT_CAMPUS) -> list[ProfessorClassTrend]:
+    """Term-ordered series of every class the professor taught on `campus`."""
+    return grouped_series(conn.execute(PROF_SERIES_SQL, (prof_id, campus)), "class_id", ("class_id", "dept_abbr", "course_num"))
+
+
+def prof_summary(conn: sqlite3.Connection, prof_id: int, campus: str = DEFAULT_CAMPUS) -> ProfessorSummary | None:
+    """A professor with their precomputed totals on `campus`, None if they haven't taught there."""
+    row = conn.execute(PROF_SUMMARY_SQL, (prof_id, campus)).fetchone()
+    return to_dict(row) if row is not None else None
+
+
+def dept_info(conn: sqlite3.Connection, dept: str, campus: str = DEFAULT_CAMPUS) -> DepartmentInfo | None:
+    """Mirrors getDeptInfo."""
+    row = conn.execute(DEPT_SQL, (campus, dept.strip().upper())).fetchone()
+    return to_dict(row) if row is not None else None
+
+
+def dept_classes(conn: sqlite3.Connection, dept: str, campus: str = DEFAULT_CAMPUS) -> list[ClassRow]:
+    """Mirrors getClassDistribtionsInDept."""
+    return [to_dict(row) for row in conn.execute(DEPT_CLASSES_SQL, (campus, dept.strip().upper()))]
+
+
+def dept_detail(conn: sqlite3.Connection, dept: str, campus: str = DEFAULT_CAMPUS) -> DepartmentDetail | None:
+    info = dept_info(conn, dept, campus)
+    if info is None:
+        return None
+    info["distributions"] = dept_classes(conn, dept, campus)
+    return info
+
+
+def search(conn: sqlite3.Connection, query: str, campus: str = DEFAULT_CAMPUS) -> SearchResult:
+    """Mirrors getSearch, the top matching departments, classes and professors."""
+    pattern = f"%{query.replace(' ', '')}%"
+    return {
+        "departments": [to_dict(row) for row in conn.execute(SEARCH_DEPTS_SQL, (campus, pattern, pattern, SEARCH_LIMIT))],
+        "classes": [to_dict(row) for row in conn.execute(SEARCH_CLASSES_SQL, (campus, pattern, pattern, SEARCH_LIMIT))],
+        "professors": [to_dict(row) for row in conn.execute(SEARCH_PROFS_SQL, (pattern, campus, SEARCH_LIMIT))],
+    }
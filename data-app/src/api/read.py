@@ -0,0 +1,63 @@
+import sqlite3
+import threading
+from typing import Callable, Concatenate, ParamSpec, TypeVar
+from src.api import queries
+from src.api.cache import BuildCache, MISSING
+from src.api.pool import BuildWatcher, connect
+
+"""
+Cached read access to a published database for Python callers, scripts and notebooks.
+
+    from src.api import queries
+    from src.api.read import Reader
+
+    reader = Reader("../ProcessedData.db")
+    detail = reader.read(queries.class_detail, "CSCI 1133")   # ClassDetail | None
+    reader.read(queries.search, "calc")                       # SearchResult
+
+Results come from the same typed functions the API serves and are cached per build version, so repeated reads skip
+SQLite until ingest stamps a new build.
+"""
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+class Reader:
+    """Thread-safe, each thread reads through its own read-only connection."""
+
+    def __init__(self, path: str, cache_size: int = 4096, check_interval: float = 1.0):
+        self.build = BuildWatcher(path, check_interval)
+        self.cache = BuildCache(cache_size)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def connection(self) -> sqlite3.Connection:
+        local = self._local
+        if getattr(local, "generation", None) != self.build.generation:
+            if getattr(local, "conn", None) is not None:
+                local.conn.close()
+            local.conn = connect(self.build.path)
+            local.generation = self.build.generation
+        return local.conn
+
+    def version(self) -> str:
+        with self._lock:
+            return self.build.refresh()
+
+    def read(self, fn: Callable[Concatenate[sqlite3.Connection, P], T], *args: P.args) -> T:
+        """Returns `fn(conn, *args)` for the current build, from the cache when it has been read before."""
+        version = self.version()
+        key = (fn.__qualname__, args)
+        result = self.cache.get(version, key)
+        if result is MISSING:
+            result = fn(self.connection(), *args)
+            self.cache.put(version, key, result)
+        return result
+
+    def close(self) -> None:
+        """Closes the calling thread's connection and the version check connection."""
+        if getattr(self._local, "conn", None) is not None:
+            self._local.conn.close()
+            self._local.conn = None
+        self.build.close()
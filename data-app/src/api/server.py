@@ -0,0 +1,179 @@
+import json
+from functools import partial
+from aiohttp import web
+from src.api import queries
+from src.api.pool import ReadPool
+
+"""
+Async read API over a published database, for the chrome extension and anything else that should not go through
+the Next.js frontend.
+
+    GET  /class/{code}              class info, libeds and per-professor distributions
+    GET  /class/{code}/trend        per-term students, GPA and grade shares, overall and per professor
+    GET  /classes?codes=A,B         the same for up to MAX_BATCH classes at once, also as POST {"codes": [...]}
+    GET  /prof/{id}                 professor and their classes
+    GET  /prof/{id}/trend           per-term series of each of their classes
+    GET  /prof/{id}/summary         totals, grades, GPA, terms and courses, precomputed by ingest
+    GET  /dept/{code}               department and its classes
+    GET  /search?q=                 top departments, classes and professors
+
+Every endpoint takes an optional `campus` (UMNTC by default). Responses use the frontend's `{success, data}` shape.
+GET responses carry an ETag and Last-Modified taken from the build version, so clients that revalidate get a 304
+without a query being run. Query results are cached per build version in the pool.
+"""
+
+MAX_BATCH = 100
+
+POOL = web.AppKey("pool", ReadPool)
+MAX_AGE = web.AppKey("max_age", int)
+
+dumps = partial(json.dumps, separators=(",", ":"))
+routes = web.RouteTableDef()
+
+
+def ok(data) -> web.Response:
+    return web.json_response({"success": True, "data": data}, dumps=dumps)
+
+
+def fail(status: int, error: str) -> web.Response:
+    return web.json_response({"success": False, "error": error}, status=status, dumps=dumps)
+
+
+def not_modified(request: web.Request, version: str, pool: ReadPool) -> bool:
+    if request.if_none_match:
+        return any(tag.value in (version, "*") for tag in request.if_none_match)
+    return request.if_modified_since is not None and pool.build.modified <= request.if_modified_since
+
+
+@web.middleware
+async def conditional(request: web.Request, handler) -> web.StreamResponse:
+    """Answers revalidations with 304 before the handler runs and stamps cacheable responses with the build version."""
+    pool = request.app[POOL]
+    version = pool.build.refresh()
+    cacheable = request.method in ("GET", "HEAD")
+    if cacheable and not_modified(request, version, pool):
+        response = web.Response(status=304)
+    else:
+        response = await handler(request)
+    response.headers["Access-Control-Allow-Origin"] = "*"
+    if cacheable and response.status in (200, 304):
+        response.etag = version
+        response.last_modified = pool.build.modified
+        response.headers["Cache-Control"] = f"public, max-age={request.app[MAX_AGE]}"
+    return response
+
+
+def campus_of(request: web.Request) -> str:
+    return request.query.get("campus", queries.DEFAULT_CAMPUS).upper()
+
+
+@routes.get("/class/{code}")
+async def get_class(request: web.Request) -> web.Response:
+    data = await request.app[POOL].run(queries.class_detail, request.match_info["code"], campus_of(request))
+    if data is None:
+        return fail(404, "Class not found")
+    return ok(data)
+
+
+@routes.get("/class/{code}/trend")
+async def get_class_trend(request: web.Request) -> web.Response:
+    data = await request.app[POOL].run(queries.class_trend, request.match_info["code"], campus_of(request))
+    if data is None:
+        return fail(404, "Class not found")
+    return ok(data)
+
+
+@routes.get("/classes")
+@routes.post("/classes")
+async def get_classes(request: web.Request) -> web.Response:
+    if request.method == "POST":
+        try:
+            codes = (await request.json())["codes"]
+        except (ValueError, KeyError, TypeError):
+            return fail(400, 'Expected a JSON body of the form {"codes": [...]}')
+    else:
+        codes = request.query.get("codes", "").split(",")
+    if not isinstance(codes, list) or not all(isinstance(code, str) for code in codes):
+        return fail(400, "codes must be a list of class codes")
+    codes = list(dict.fromkeys(code.strip() for code in codes if code.strip()))
+    if not codes:
+        return fail(400, "Missing codes in query string")
+    if len(codes) > MAX_BATCH:
+        return fail(400, f"At most {MAX_BATCH} codes per request")
+    campus = campus_of(request)
+    details = await request.app[POOL].run_batch(queries.class_detail, [(code, campus) for code in codes])
+    return ok(dict(zip(codes, details)))
+
+
+@routes.get("/prof/{id}")
+async def get_prof(request: web.Request) -> web.Response:
+    try:
+        prof_id = int(request.match_info["id"])
+    except ValueError:
+        return fail(400, "Professor id must be a number")
+    data = await request.app[POOL].run(queries.prof_detail, prof_id, campus_of(request))
+    if data is None:
+        return fail(404, "Professor not found")
+    return ok(data)
+
+
+@routes.get("/prof/{id}/trend")
+async def get_prof_trend(request: web.Request) -> web.Response:
+    try:
+        prof_id = int(request.match_info["id"])
+    except ValueError:
+        return fail(400, "Professor id must be a number")
+    if await request.app[POOL].run(queries.prof_info, prof_id) is None:
+        return fail(404, "Professor not found")
+    return ok(await request.app[POOL].run(queries.prof_trend, prof_id, campus_of(request)))
+
+
+@routes.get("/prof/{id}/summary")
+async def get_prof_summary(request: web.Request) -> web.Response:
+    try:
+        prof_id = int(request.match_info["id"])
+    except ValueError:
+        return fail(400, "Professor id must be a number")
+    data = await request.app[POOL].run(queries.prof_summary, prof_id, campus_of(request))
+    if data is None:
+        return fail(404, "Professor not found")
+    return ok(data)
+
+
+@routes.get("/dept/{code}")
+async def get_dept(request: web.Request) -> web.Response:
+    data = await request.app[POOL].run(queries.dept_detail, request.match_info["code"], campus_of(request))
+    if data is None:
+        return fail(404, "Department not found")
+    return ok(data)
+
+
+@routes.get("/search")
+async def get_search(request: web.Request) -> web.Response:
+    query = request.query.get("q", "")
+    if not query:
+        return fail(400, "Missing query (q) in query string")
+    return ok(await request.app[POOL].run(queries.search, query, campus_of(request)))
+
+
+def create_app(path: str, pool_size: int = 4, max_age: int = 60, cache_size: int = 4096) -> web.Application:
+    """
+    :param path: SQLite database file to serve, opened read-only.
+    :param max_age: Seconds clients may reuse a response before revalidating it.
+    :param cache_size: Query results kept for the current build.
+    """
+    app = web.Application(middlewares=[conditional])
+    pool = ReadPool(path, pool_size, cache_size=cache_size)
+    app[POOL] = pool
+    app[MAX_AGE] = max_age
+    app.add_routes(routes)
+
+    async def open_pool(app: web.Application) -> None:
+        await pool.open()
+
+    async def close_pool(app: web.Application) -> None:
+        await pool.close()
+
+    app.on_startup.append(open_pool)
+    app.on_cleanup.append(close_pool)
+    return app
@@ -1,6 +1,16 @@
+import argparse
+import os
 import sys
 import pandas as pd
+# The cleaners are imported as siblings, the data-app root is needed for the shared metrics module.
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
 from scheduleBuilder import ScheduleBuilderCleaner
+from rawExport import read_raw
+from src.metrics.metrics import metrics
+
+# The columns a chunk has once prepared, and so the columns of the cleaned CSV.
+PREPARED_COLUMNS = ["INSTITUTION", "CAMPUS", "SUBJECT", "CATALOG_NBR", "CLASS_SECTION", "DESCR", "CRSE_GRADE_OFF",
+                    "GRADE_HDCNT", "NAME", "INTERNET_ID", "TERM", "FULL_NAME"]
 
 def drop_columns(x: pd.DataFrame) -> pd.DataFrame:
     columns_to_drop = [
@@ -23,30 +33,60 @@ def add_columns(x: pd.DataFrame) -> pd.DataFrame:
     x["CLASS_SECTION"] = x["CLASS_SECTION"].apply(lambda section: section.zfill(3))
     return x
 
-def main():
-    if len(sys.argv) != 4:
-        print("Usage: python -m clean <file_name> <output_file> <term>")
-        return 1
-    
-    fileName = sys.argv[1]
-    outputFile = sys.argv[2]
-    term = int(sys.argv[3])
-    print(f"Processing file: {fileName} for term: {term}")
-
-    df = pd.read_csv(fileName, dtype={"CLASS_SECTION": str})
+def prepare(df: pd.DataFrame, term: int) -> pd.DataFrame:
+    """The row-by-row part of cleaning, which can run on each chunk of an export as it is read."""
     df = drop_columns(df)
     df = add_term(df, term)
-    df = add_columns(df)
+    return add_columns(df)
 
+def fill_instructors(df: pd.DataFrame, prefetch: bool = True) -> pd.DataFrame:
+    """Looks up missing instructors and formats every name, this needs the whole term at once."""
     cleaner = ScheduleBuilderCleaner()
-    df = df.groupby(["TERM", "FULL_NAME", "CAMPUS"]).apply(
-        cleaner.fetch_unknown_prof
-    )
+    with metrics.stage("clean.instructors"):
+        if prefetch:
+            # One section table for the whole term instead of two API calls and a merge per course.
+            df = cleaner.fill_unknown_profs(df)
+        else:
+            df = df.groupby(["TERM", "FULL_NAME", "CAMPUS"]).apply(
+                cleaner.fetch_unknown_prof
+            )
+
+        df["NAME"] = df["NAME"].apply(cleaner.format_name)
+    return df
+
+def clean(df: pd.DataFrame, term: int, prefetch: bool = True) -> pd.DataFrame:
+    return fill_instructors(prepare(df, term), prefetch)
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Clean a raw registrar export.", usage="python -m clean <file_name> <output_file> <term>")
+    parser.add_argument("file_name", type=str, help="The raw export to clean, the registrar's .xlsx workbook or a CSV of it.")
+    parser.add_argument("output_file", type=str, help="Where to write the cleaned CSV.")
+    parser.add_argument("term", type=int, help="The term code of the export, e.g. 1253.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Logs every course as it is looked up.")
+    parser.add_argument("--no-prefetch", dest="prefetch", action="store_false", help="Look instructors up course by course instead of prefetching each subject's sections.")
+    parser.add_argument("--no-cache", dest="cache", action="store_false", help="Convert a workbook again instead of using, or writing, its cached conversion.")
+    parser.add_argument("--report", type=str, default="clean_report.json", help="Where to write the JSON run report.")
+    args = parser.parse_args(argv)
+    metrics.verbose = args.verbose
+    print(f"Processing file: {args.file_name} for term: {args.term}")
+
+    with metrics.stage("clean.load"):
+        # Each chunk is reduced as it is read, only the prepared rows of the whole term are held together.
+        chunks = []
+        for chunk in read_raw(args.file_name, args.cache):
+            metrics.count(rows=len(chunk))
+            chunks.append(prepare(chunk, args.term))
+        # An export without any rows yields no chunks, it still cleans to a CSV with the usual header.
+        df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=PREPARED_COLUMNS)
+    df = fill_instructors(df, args.prefetch)
 
-    df["NAME"] = df["NAME"].apply(cleaner.format_name)
+    with metrics.stage("clean.write"):
+        df.to_csv(args.output_file, index=False)
+        metrics.count(rows=len(df))
+    print(f"Output written to: {args.output_file}")
 
-    df.to_csv(outputFile, index=False)
-    print(f"Output written to: {outputFile}")
+    metrics.write_report(args.report)
+    print(metrics.summary())
     return 0
 
 
@@ -1,14 +1,18 @@
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 import pandas as pd
 from nameparser import HumanName
+from src.metrics.metrics import metrics
 
 class CleanBase(ABC):
     """Base class for data cleaning operations."""
 
+    # Subjects whose listings are kept in memory, a term's courses are grouped by subject so few are needed at once.
+    SUBJECT_CACHE_SIZE = 32
+
     def __init__(self):
         """Initialize cleaners with an empty cache to speed up lookups."""
-        self.CACHED_REQ = {}
-        self.CACHED_LINK = ""
+        self.subject_cache: OrderedDict[tuple[str, str], dict] = OrderedDict()
     
     @abstractmethod
     def fetch_unknown_prof(self, x: pd.DataFrame) -> pd.DataFrame:
@@ -34,7 +38,7 @@ class CleanBase(ABC):
                 name.string_format = "{first} {last}"
                 retVal = str(name)
             except TypeError:
-                print(f"Failed to parse {x}")
+                metrics.error(f"[CLEAN] Failed to parse {x}")
                 retVal = x
         else:
             retVal = x
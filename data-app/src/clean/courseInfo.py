@@ -1,62 +1,83 @@
 from abstract import CleanBase
 import pandas as pd
-import requests
 import json
 import re
-import sys
+from src.metrics.metrics import metrics
+from src.outbound.scheduler import scheduler
 
 class CourseInfoCleaner(CleanBase):
+    LECTURE_COMPONENTS = ("Lecture", "LEC", "Independent Study", "Field Work")
+
+    @staticmethod
+    def build_index(listing: dict) -> dict[str, tuple[str, str | None, str | None]]:
+        """
+        Pre-parses a classinfo subject listing into section key ("term-subject-catalog-section") ->
+        (class component, instructor, section it auto enrolls with).
+        """
+        index = {}
+        for key, section in listing.items():
+            if not isinstance(section, dict):
+                continue
+            instructor = re.findall("\\t(.*)", section.get("Instructor Data", ""))
+            auto_enroll = re.findall(r"Section (\d+)", section.get("Auto Enrolls With", ""))
+            index[key] = (section.get("Class Component"), instructor[0] if instructor else None, auto_enroll[0] if auto_enroll else None)
+        return index
+
+    def subject_index(self, term: str, dept: str) -> dict:
+        """Section index for one subject's classinfo listing, fetched once and kept in a bounded LRU cache."""
+        cache_key = (term, dept)
+        if cache_key in self.subject_cache:
+            metrics.count(cache_hits=1)
+            self.subject_cache.move_to_end(cache_key)
+            return self.subject_cache[cache_key]
+
+        link = "http://classinfo.umn.edu/?term=" + term + "&subject=" + dept + "&json=1"
+        with scheduler.get(link) as url:
+            try:
+                decodedContent = url.content.decode("latin-1")
+                listing = json.loads(decodedContent, strict=False)
+            except ValueError:
+                # print("Json malformed, icky!")
+                listing = {}
+        index = self.build_index(listing)
+        self.subject_cache[cache_key] = index
+        if len(self.subject_cache) > self.SUBJECT_CACHE_SIZE:
+            self.subject_cache.popitem(last=False)
+        return index
+
     def fetch_unknown_prof(self, x:pd.DataFrame) -> pd.DataFrame:
         if not x["NAME"].isnull().all():
             # If an NAME is already defined don't make any modifications.
             return x
 
-        global CACHED_REQ
-        global CACHED_LINK
         dept = x["SUBJECT"].iloc[0]
         catalog_nbr = x["CATALOG_NBR"].iloc[0]
         term = str(x["TERM"].iloc[0])
         section = x["CLASS_SECTION"].iloc[0]
-        level = catalog_nbr[0]
         professor = "Unknown Instructor"
-
-        link = "http://classinfo.umn.edu/?term=" + term + "&subject=" + dept + "&json=1"
-        # classLink = f"http://classinfo.umn.edu/?term={term}&subject={dept}&level={level}"
+        # classLink = f"http://classinfo.umn.edu/?term={term}&subject={dept}&level={catalog_nbr[0]}"
         # print(f"Link to class: " + classLink)
 
-        if link != self.CACHED_LINK:
-            with requests.get(link) as url:
-                CACHED_LINK = link
-                try:
-                    decodedContent = url.content.decode("latin-1")
-                    CACHED_REQ = json.loads(decodedContent, strict=False)
-                except ValueError:
-                    # print("Json malformed, icky!")
-                    CACHED_REQ = {}
+        index = self.subject_index(term, dept)
 
         # Go through lecutres and find professors
         key = ""
         try:
             key = term + "-" + dept + "-" + catalog_nbr + "-" + section
-            classComp = self.CACHED_REQ[key]["Class Component"]
-            if (
-                classComp == "Lecture"
-                or classComp == "LEC"
-                or classComp == "Independent Study"
-                or classComp == "Field Work"
-            ):
-                professor = re.findall("\\t(.*)", self.CACHED_REQ[key]["Instructor Data"])[0]
-            else:
-                profSec = re.findall(r"Section (\d+)", self.CACHED_REQ[key]["Auto Enrolls With"])[
-                    0
-                ]
+            classComp, instructor, profSec = index[key]
+            if classComp not in self.LECTURE_COMPONENTS:
+                if profSec is None:
+                    raise KeyError("Auto Enrolls With")
                 profKey = term + "-" + dept + "-" + catalog_nbr + "-" + profSec
-                professor = re.findall("\\t(.*)", self.CACHED_REQ[profKey]["Instructor Data"])[0]
-                print(f"[CI SEARCH] Filled data for {dept} {catalog_nbr}")
+                instructor = index[profKey][1]
+            if instructor is None:
+                raise KeyError("Instructor Data")
+            professor = instructor
+            metrics.item(f"[CI SEARCH] Filled data for {dept} {catalog_nbr}")
         except KeyError as e:
-            print(f"[CI SEARCH] Failed to update {dept} {catalog_nbr} {section}")
+            metrics.error(f"[CI SEARCH] Failed to update {dept} {catalog_nbr} {section}")
             with open("No-Instructor-data.txt", "a") as f:
                 f.write(f"Failed to update {dept} {catalog_nbr} {section} with Outdated with error: {e}\n")
 
         x["NAME"] = professor
-        return x
\ No newline at end of file
+        return x
@@ -0,0 +1,111 @@
+import glob
+import hashlib
+import os
+import pickle
+from typing import Iterator
+import pandas as pd
+from openpyxl import load_workbook
+from src.metrics.metrics import metrics
+
+"""
+Loads raw registrar exports, either the `*_raw_data.xlsx` workbook as it arrives or a CSV converted from it.
+
+Workbooks are streamed with openpyxl's read-only reader: rows come straight from the sheet XML as plain values and are
+typed a chunk at a time, and `read_raw` hands the chunks on one by one so the caller can reduce each before the next
+is read. The whole workbook is never held at once, neither as cell objects nor as a frame. The typed chunks are also
+pickled one after another into a cache next to the workbook, named after the workbook's hash, so later runs on the
+same file stream the cache instead of converting again and a changed file is converted again.
+"""
+
+CHUNK_ROWS = 50_000
+# Codes that look like numbers in the workbook but are text everywhere downstream ("001", "1101").
+TEXT_COLUMNS = ["INSTITUTION", "CAMPUS", "SUBJECT", "CATALOG_NBR", "CLASS_SECTION"]
+COUNT_COLUMNS = ["CLASS_HDCNT", "GRADE_HDCNT"]
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_path(path: str, digest: str) -> str:
+    return f"{os.path.splitext(path)[0]}.{digest[:16]}.pkl"
+
+
+def type_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """Gives one chunk the dtypes `clean` expects whatever the cells held: text codes as strings, counts as integers."""
+    for column in TEXT_COLUMNS:
+        if column in df:
+            df[column] = df[column].map(lambda value: value if value is None or isinstance(value, str) else str(value))
+    for column in COUNT_COLUMNS:
+        if column in df:
+            df[column] = pd.to_numeric(df[column]).astype("Int64")
+    return df
+
+
+def read_workbook(path: str, chunksize: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Streams the first sheet of a workbook as typed chunks of `chunksize` rows."""
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        header = next(sheet.iter_rows(max_row=1, values_only=True), ())
+        # Exports declare far more columns than they fill, only read up to the last named one.
+        columns = [column for column in header if column is not None]
+        rows = []
+        for row in sheet.iter_rows(min_row=2, max_col=len(columns), values_only=True):
+            if any(value is not None for value in row):
+                rows.append(row)
+            if len(rows) == chunksize:
+                yield type_chunk(pd.DataFrame.from_records(rows, columns=columns))
+                rows = []
+        if rows or not columns:
+            yield type_chunk(pd.DataFrame.from_records(rows, columns=columns))
+    finally:
+        workbook.close()
+
+
+def read_cache(cached: str) -> Iterator[pd.DataFrame]:
+    with open(cached, "rb") as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+def read_raw(path: str, use_cache: bool = True) -> Iterator[pd.DataFrame]:
+    """
+    Streams a raw export as typed chunks. CSVs are read in chunks through the same typing as workbooks; workbooks are
+    streamed from their cache when it matches the file's hash, and converted and cached otherwise. A cache is only
+    kept once the whole workbook has gone through.
+    """
+    if not path.lower().endswith(".xlsx"):
+        for chunk in pd.read_csv(path, dtype={column: str for column in TEXT_COLUMNS}, chunksize=CHUNK_ROWS):
+            yield type_chunk(chunk)
+        return
+
+    digest = file_hash(path)
+    cached = cache_path(path, digest)
+    if use_cache and os.path.exists(cached):
+        metrics.count(cache_hits=1)
+        yield from read_cache(cached)
+        return
+    if not use_cache:
+        yield from read_workbook(path)
+        return
+
+    partial = f"{cached}.partial"
+    try:
+        with open(partial, "wb") as f:
+            for chunk in read_workbook(path):
+                pickle.dump(chunk, f, protocol=pickle.HIGHEST_PROTOCOL)
+                yield chunk
+        for stale in glob.glob(f"{glob.escape(os.path.splitext(path)[0])}.*.pkl"):
+            os.remove(stale)
+        os.replace(partial, cached)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
@@ -1,24 +1,130 @@
 import pandas as pd
 from courseInfo import CourseInfoCleaner
-import requests
 import warnings
+from src.metrics.metrics import metrics
+from src.outbound.scheduler import scheduler
 
 warnings.filterwarnings("ignore")
 
+SB_API = "https://schedulebuilder.umn.edu/api.php"
+COURSE_KEY = ["TERM", "CAMPUS", "SUBJECT", "CATALOG_NBR"]
+SECTION_KEY = COURSE_KEY + ["CLASS_SECTION"]
+
 class ScheduleBuilderCleaner(CourseInfoCleaner):
+    # Class numbers sent per `type=sections` call, keeps the query string well under common URL limits.
+    SECTIONS_PER_CALL = 100
+
+    def fetch_sb(self, params: dict, what: str):
+        """One ScheduleBuilder API call, returns the decoded JSON or None if the call failed."""
+        resp = scheduler.get(SB_API, params=params)
+        if resp.status_code != 200:
+            metrics.error(f"[SB SEARCH] Failed to fetch section data for {what}")
+            return None
+        return resp.json()
+
+    @staticmethod
+    def section_instructors(items: list[dict]) -> tuple[list, list]:
+        """Splits a `type=sections` response into (id, name, internet id, section) for sections that list an instructor
+        and (section, root id) for auto-enroll children, which are taught by their root section's instructor."""
+        root = []
+        children = []
+        for item in items:
+            if not item.get("auto_enroll_sections?"):
+                for meeting in item.get("meetings") or []:
+                    if meeting.get("instructors"):
+                        instructor_info = meeting["instructors"][0]
+                        root.append((item["id"], instructor_info.get("label_name", "Unknown Instructor"), instructor_info.get("internet_id", ""), item.get("section_number", "")))
+                        break
+            else:
+                children.append((item["id"], item["section_number"], item["auto_enroll_sections"][0]))
+        return root, children
+
+    def prefetch_sections(self, df: pd.DataFrame) -> tuple[pd.DataFrame, set, set]:
+        """
+        Gathers the instructors of every course in `df` that has sections without one. Per (term, campus, subject) the
+        course's class numbers are looked up and then requested together in as few `type=sections` calls as possible.
+
+        :return: A section table indexed by TERM, CAMPUS, SUBJECT, CATALOG_NBR and CLASS_SECTION holding NAME and
+            INTERNET_ID, covering auto-enroll children. Also the courses ScheduleBuilder has no sections for and the
+            courses whose lookups failed, both as (TERM, CAMPUS, SUBJECT, CATALOG_NBR) tuples.
+        """
+        courses = df.loc[df["NAME"].isnull(), ["INSTITUTION"] + COURSE_KEY].drop_duplicates(COURSE_KEY)
+        sections = []
+        no_sections = set()
+        failed = set()
+        for (term, campus, dept), subject in courses.groupby(["TERM", "CAMPUS", "SUBJECT"]):
+            institution = str(subject["INSTITUTION"].iloc[0])
+            base = {"institution": institution, "campus": campus, "term": str(term)}
+            # Class number -> catalog number for every section of the subject's courses.
+            class_nbrs = {}
+            lookups = scheduler.map(lambda catalog_nbr: self.fetch_sb({"type": "course", **base, "subject": dept, "catalog_nbr": catalog_nbr}, f"{dept} {catalog_nbr}"), subject["CATALOG_NBR"])
+            for catalog_nbr, data in zip(subject["CATALOG_NBR"], lookups):
+                if data is None:
+                    failed.add((term, campus, dept, catalog_nbr))
+                elif len(data["sections"]) == 0:
+                    no_sections.add((term, campus, dept, catalog_nbr))
+                else:
+                    class_nbrs.update({nbr: catalog_nbr for nbr in data["sections"]})
+
+            nbrs = list(class_nbrs)
+            chunks = [nbrs[start:start + self.SECTIONS_PER_CALL] for start in range(0, len(nbrs), self.SECTIONS_PER_CALL)]
+            responses = scheduler.map(lambda chunk: self.fetch_sb({"type": "sections", **base, "class_nbrs": ", ".join(str(nbr) for nbr in chunk)}, f"{dept} sections"), chunks)
+            for chunk, items in zip(chunks, responses):
+                if items is None:
+                    failed.update((term, campus, dept, class_nbrs[nbr]) for nbr in chunk)
+                    continue
+                root, children = self.section_instructors(items)
+                root_df = pd.DataFrame(root, columns=["id", "NAME", "INTERNET_ID", "CLASS_SECTION"])
+                children_df = pd.DataFrame(children, columns=["child_id", "CLASS_SECTION", "id"])
+                children_df = children_df.merge(root_df[["id", "NAME", "INTERNET_ID"]], on="id", how="inner")
+                for frame, id_column in ((root_df, "id"), (children_df, "child_id")):
+                    frame["CATALOG_NBR"] = frame[id_column].map(class_nbrs)
+                    sections.append(frame.assign(TERM=term, CAMPUS=campus, SUBJECT=dept)[SECTION_KEY + ["NAME", "INTERNET_ID"]])
+            metrics.item(f"[SB PREFETCH] Fetched {len(nbrs)} sections for {dept} in {term}")
+
+        table = pd.concat(sections, ignore_index=True) if sections else pd.DataFrame(columns=SECTION_KEY + ["NAME", "INTERNET_ID"])
+        table = table.dropna(subset=["CATALOG_NBR"]).drop_duplicates(SECTION_KEY).set_index(SECTION_KEY)
+        return table, no_sections, failed
+
+    def fill_unknown_profs(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Prefetch mode of `fetch_unknown_prof` for a whole term: builds one section table with `prefetch_sections` and
+        fills every missing instructor with a single merge. Courses ScheduleBuilder has no sections for fall back to
+        ClassInfo per section, and courses whose lookups failed are left as they are.
+        """
+        missing_courses = set(df.loc[df["NAME"].isnull(), COURSE_KEY].itertuples(index=False, name=None))
+        if not missing_courses:
+            return df
+        sections, no_sections, failed = self.prefetch_sections(df)
+
+        df = df.reset_index(drop=True)
+        found = df[SECTION_KEY].merge(sections, left_on=SECTION_KEY, right_index=True, how="left")
+        df["NAME"] = df["NAME"].fillna(found["NAME"])
+        df["INTERNET_ID"] = df["INTERNET_ID"].fillna(found["INTERNET_ID"])
+
+        course = pd.Series(list(df[COURSE_KEY].itertuples(index=False, name=None)), index=df.index)
+        fallback = course.isin(no_sections)
+        if fallback.any():
+            filled = df[fallback].groupby(["TERM", "FULL_NAME", "CAMPUS", "CLASS_SECTION"], group_keys=False).apply(super().fetch_unknown_prof)
+            df.loc[filled.index, "NAME"] = filled["NAME"]
+        resolved = course.isin(missing_courses - failed)
+        df.loc[resolved & df["NAME"].isnull(), "NAME"] = "Unknown Instructor"
+        metrics.item(f"[SB PREFETCH] Filled instructors for {len(missing_courses - failed)} courses")
+        return df
+
     def fetch_unknown_prof(self, x: pd.DataFrame) -> pd.DataFrame:
         dept = x["SUBJECT"].iloc[0]
         catalog_nbr = x["CATALOG_NBR"].iloc[0]
         if not x["NAME"].isnull().any():
-            print(f"[SB PRESENT] Skipping search for {dept} {catalog_nbr}")
+            metrics.item(f"[SB PRESENT] Skipping search for {dept} {catalog_nbr}")
             return x
         
         term = str(x["TERM"].iloc[0])
         institution = str(x["INSTITUTION"].iloc[0])
         campus = str(x["CAMPUS"].iloc[0])
 
-        course_resp = requests.get(
-            "https://schedulebuilder.umn.edu/api.php",
+        course_resp = scheduler.get(
+            SB_API,
             params={
                 "type": "course",
                 "institution": institution,
@@ -30,7 +136,7 @@ class ScheduleBuilderCleaner(CourseInfoCleaner):
         )
 
         if course_resp.status_code != 200:
-            print(f"Failed to fetch section data for {dept} {catalog_nbr}")
+            metrics.error(f"[SB SEARCH] Failed to fetch section data for {dept} {catalog_nbr}")
             return x
 
         data = course_resp.json()
@@ -44,8 +150,8 @@ class ScheduleBuilderCleaner(CourseInfoCleaner):
             retVal["NAME"].fillna("Unknown Instructor", inplace=True)
             return retVal
 
-        sections_resp = requests.get(
-            "https://schedulebuilder.umn.edu/api.php",
+        sections_resp = scheduler.get(
+            SB_API,
             params={
                 "type": "sections",
                 "institution": institution,
@@ -56,7 +162,7 @@ class ScheduleBuilderCleaner(CourseInfoCleaner):
         )
 
         if sections_resp.status_code != 200:
-            print(f"Failed to fetch section data for {dept} {catalog_nbr}")
+            metrics.error(f"[SB SEARCH] Failed to fetch section data for {dept} {catalog_nbr}")
             return x
 
         root = []
@@ -108,7 +214,7 @@ class ScheduleBuilderCleaner(CourseInfoCleaner):
 
         merged_total["NAME"].fillna("Unknown Instructor", inplace=True)
 
-        print(f"[SB SEARCH] Filled data for {dept} {catalog_nbr}")
+        metrics.item(f"[SB SEARCH] Filled data for {dept} {catalog_nbr}")
 
         return merged_total
 
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
-from db.Models import DepartmentDistribution
-from multiprocessing import Pool
+from sqlalchemy import Row
+from src.metrics.metrics import metrics
+from src.outbound.scheduler import scheduler
 
 class EnhanceBase(ABC):
     """Base class for data enhancement operations."""
@@ -9,11 +10,15 @@ class EnhanceBase(ABC):
         pass
 
     @abstractmethod
-    def enhance_helper(self, dept_dist: DepartmentDistribution) -> None:
-        """Abstract method to be implemented by subclasses for enhancing data."""
+    def enhance_helper(self, dept_dist: Row) -> None:
+        """Abstract method to be implemented by subclasses for enhancing data.
+
+        :param dept_dist: A (campus, dept_abbr) row selected with `DEPT_COLUMNS`.
+        """
         pass
 
-    def enhance(self, dept_dists: list[DepartmentDistribution]) -> None:
-        """Enhance the data for a list of department distributions in a multiprocessing pool."""
-        with Pool() as pool:
-            pool.map(self.enhance_helper, dept_dists)
\ No newline at end of file
+    def enhance(self, dept_dists: list[Row]) -> None:
+        """Enhance the data for a list of department distributions in threads, paced by the outbound scheduler."""
+        metrics.count(rows=len(dept_dists))
+        # Writes are short per course, a few threads keep the database connections from becoming the bottleneck.
+        scheduler.map(self.enhance_helper, dept_dists, threads=8)
\ No newline at end of file
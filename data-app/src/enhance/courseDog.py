@@ -1,45 +1,75 @@
 from .abstract import EnhanceBase
-from db.Models import DepartmentDistribution, ClassDistribution, Libed, Session, and_
-import requests
+from sqlalchemy import Row, delete, select, tuple_, update
+from db.Models import ClassDistribution, Libed, Session, and_, libedAssociationTable, write_lock
+from db.loader import get_loader
 from mapping.mappings import catalog_mapping, libed_mapping
+from src.metrics.metrics import metrics
+from src.outbound.scheduler import scheduler
 
 
 class CourseDogEnhance(EnhanceBase):
-    def enhance_helper(self, dept_dist: DepartmentDistribution) -> None:
+    def enhance_helper(self, dept_dist: Row) -> None:
         dept = dept_dist.dept_abbr
         campus = dept_dist.campus
 
         campus_str = str(campus)
         link=f"https://app.coursedog.com/api/v1/cm/umn_{'umntc_rochester' if campus_str == 'UMNRO' else campus_str.lower()}_peoplesoft/courses/?subjectCode={dept}"
 
-        with requests.get(link) as url:
+        with scheduler.get(link) as url:
             try:
                 req=url.json()
             except ValueError:
-                print("Json malformed, icky!")
+                metrics.error(f"[CD Enhance] Json malformed for [{campus}] {dept}, icky!")
                 req={}
                 return
             
-        for course in req.values():
-            course_nbr = course["courseNumber"]
-            session = Session()
-            class_dist = session.query(ClassDistribution).filter(and_(ClassDistribution.dept_abbr == dept, ClassDistribution.course_num == course_nbr, ClassDistribution.campus == campus)).first()
-            if class_dist:
-                class_dist.class_desc = course["longName"]
-                class_dist.onestop_desc = course["description"]
-                class_dist.cred_min = course["credits"]["creditHours"]["min"]
-                class_dist.cred_max = course["credits"]["creditHours"]["max"]
-                class_dist.onestop = f"https://{catalog_mapping.get(campus_str)}.catalog.prod.coursedog.com/courses/{course['sisId']}"
+        updates: dict[int, dict] = {}
+        wanted: set[tuple[int, int]] = set()
+        session = Session()
+        try:
+            class_ids = dict(session.execute(select(ClassDistribution.course_num, ClassDistribution.id).where(
+                and_(ClassDistribution.dept_abbr == dept, ClassDistribution.campus == campus))).all())
+            libed_ids = dict(session.execute(select(Libed.name, Libed.id)).all())
+            for course in req.values():
+                class_id = class_ids.get(course["courseNumber"])
+                if class_id is None:
+                    continue
+                updates[class_id] = {
+                    "id": class_id,
+                    "class_desc": course["longName"],
+                    "onestop_desc": course["description"],
+                    "cred_min": course["credits"]["creditHours"]["min"],
+                    "cred_max": course["credits"]["creditHours"]["max"],
+                    "onestop": f"https://{catalog_mapping.get(campus_str)}.catalog.prod.coursedog.com/courses/{course['sisId']}",
+                }
                 for attribute in course["attributes"]:
                     if attribute not in libed_mapping:
-                        print("[CD Enhance] Libed not found:", attribute)
-                        continue
-                    
-                    libed_dist = session.query(Libed).filter(Libed.name == libed_mapping[attribute]).first()
-                    if libed_dist == None:
-                        print("[CD Enhance] Libed not found:", attribute, libed_mapping[attribute])
-                    elif class_dist not in libed_dist.class_dists:
-                        libed_dist.class_dists.append(class_dist)
-                print(f"[CD Enhance] Updated [{class_dist.campus}] {class_dist.dept_abbr} {class_dist.course_num} ({class_dist.onestop}) : [{class_dist.cred_min} - {class_dist.cred_max}] credits : Libeds: ({class_dist.libeds})")
-            session.commit()
-            session.close()
\ No newline at end of file
+                        metrics.item(f"[CD Enhance] Libed not found: {attribute}")
+                    elif libed_mapping[attribute] not in libed_ids:
+                        metrics.error(f"[CD Enhance] Libed not found: {attribute} {libed_mapping[attribute]}")
+                    else:
+                        wanted.add((libed_ids[libed_mapping[attribute]], class_id))
+            if not updates:
+                return
+
+            with write_lock():
+                session.execute(update(ClassDistribution), list(updates.values()))
+                # Libeds of the classes CourseDog listed are replaced by what it lists now, one diff for the department.
+                links = libedAssociationTable.c
+                current = set(session.execute(select(links.left_id, links.right_id).where(links.right_id.in_(list(updates)))).tuples())
+                added = wanted - current
+                removed = current - wanted
+                if added:
+                    get_loader().insert(session.connection(), libedAssociationTable, [{"left_id": libed_id, "right_id": class_id} for libed_id, class_id in sorted(added)], keys=["left_id", "right_id"])
+                if removed:
+                    session.execute(delete(libedAssociationTable).where(tuple_(links.left_id, links.right_id).in_(list(removed))))
+                session.commit()
+            metrics.count(rows=len(updates))
+            if metrics.verbose:
+                names = {libed_id: name for name, libed_id in libed_ids.items()}
+                for update_row in updates.values():
+                    libeds = sorted(names[libed_id] for libed_id, class_id in wanted if class_id == update_row["id"])
+                    metrics.item(f"[CD Enhance] Updated [{campus}] {dept} {update_row['onestop']} : [{update_row['cred_min']} - {update_row['cred_max']}] credits : Libeds: ({libeds})")
+            metrics.item(f"[CD Enhance] [{campus}] {dept}: {len(updates)} classes, {len(added)} libed links added, {len(removed)} removed")
+        finally:
+            session.close()
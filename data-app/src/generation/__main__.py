@@ -0,0 +1,15 @@
+from src.generation.process import Process
+import sys
+
+def main():
+    if len(sys.argv) != 2 or sys.argv[1] != "recompute":
+        print("Usage: python -m src.generation recompute")
+        return 1
+
+    print("[GEN] Recomputing class distribution totals from term distributions...")
+    Process.recompute_aggregates()
+    print("[GEN] Finished recomputing class distribution totals.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+import time
+from collections import Counter
+import numpy as np
+import pandas as pd
+from mapping.mappings import dept_mapping, grade_mapping
+from src.metrics.metrics import metrics
+
+"""
+Preflight validation of a cleaned CSV before ingest writes anything.
+
+Every check is a vectorized mask over a whole chunk, so a file is read once with lenient dtypes and every violation in
+it is reported together instead of ingest stopping at the first bad row. Errors are rows ingest would fail on or load
+wrongly (unknown grade codes, terms `term_to_name` can't name, departments missing from dept_mapping, counts that
+aren't whole numbers); warnings are rows ingest handles but that are worth knowing about (rows without an instructor
+are dropped, rows sharing a key have their counts summed).
+"""
+
+REQUIRED_COLUMNS = ["TERM", "CAMPUS", "SUBJECT", "CATALOG_NBR", "DESCR", "CRSE_GRADE_OFF", "GRADE_HDCNT", "NAME", "FULL_NAME"]
+# Rows with the same key are summed into one grade count by `Process.build_dists`.
+DUPLICATE_KEY = ["TERM", "CAMPUS", "SUBJECT", "CATALOG_NBR", "CLASS_SECTION", "NAME", "CRSE_GRADE_OFF"]
+# Grades the frontend shows besides the letters in grade_mapping.
+NON_LETTER_GRADES = ["S", "N", "P", "W", "NG"]
+VALID_GRADES = set(grade_mapping) | set(NON_LETTER_GRADES)
+TERM_SEASONS = [3, 5, 9]
+KNOWN_DEPTS = pd.MultiIndex.from_tuples([(campus, dept) for campus, depts in dept_mapping.items() for dept in depts])
+CHUNK_ROWS = 250_000
+EXAMPLES = 5
+
+
+class Preflight:
+    def __init__(self, clean_filename: str):
+        self.clean_filename = clean_filename
+        self.rows = 0
+        self.seconds = 0.0
+        # (severity, check) -> [rows, Counter of offending values]
+        self.violations: dict[tuple[str, str], list] = {}
+
+    def add(self, severity: str, check: str, values: pd.Series) -> None:
+        if values.empty:
+            return
+        entry = self.violations.setdefault((severity, check), [0, Counter()])
+        entry[0] += len(values)
+        entry[1].update(values.astype(str).value_counts(dropna=False).to_dict())
+
+    @property
+    def errors(self) -> list[dict]:
+        return [v for v in self.report() if v["severity"] == "error"]
+
+    @property
+    def warnings(self) -> list[dict]:
+        return [v for v in self.report() if v["severity"] == "warning"]
+
+    def report(self) -> list[dict]:
+        return [
+            {"severity": severity, "check": check, "rows": rows, "examples": [value for value, _ in values.most_common(EXAMPLES)]}
+            for (severity, check), (rows, values) in sorted(self.violations.items())
+        ]
+
+    def summary(self) -> str:
+        lines = [f"[PREFLIGHT] {self.clean_filename}: {self.rows} rows checked in {self.seconds:.3f}s, "
+                 f"{len(self.errors)} errors, {len(self.warnings)} warnings."]
+        for v in self.report():
+            lines.append(f"  {v['severity']:<8}{v['check']} ({v['rows']} rows), e.g. {', '.join(v['examples'])}")
+        return "\n".join(lines)
+
+    def check_columns(self, columns: pd.Index) -> bool:
+        present = set(columns) | ({"NAME"} if "HR_NAME" in columns else set())
+        missing = [column for column in REQUIRED_COLUMNS if column not in present]
+        if missing:
+            self.add("error", "missing columns", pd.Series(missing))
+        return not missing
+
+    def check_chunk(self, df: pd.DataFrame) -> None:
+        """Runs the row checks over one chunk of strings. Duplicates are checked across chunks by `check_file`."""
+        self.rows += len(df)
+
+        term = pd.to_numeric(df["TERM"], errors="coerce")
+        bad_term = term.isna() | (term % 1 != 0) | (term < 1000) | (term > 9999) | ~(term % 10).isin(TERM_SEASONS)
+        self.add("error", "TERM is not a term code (4 digits ending in 3, 5 or 9)", df["TERM"][bad_term])
+
+        count = pd.to_numeric(df["GRADE_HDCNT"], errors="coerce")
+        self.add("error", "GRADE_HDCNT is missing or not a number", df["GRADE_HDCNT"][count.isna()])
+        self.add("error", "GRADE_HDCNT is negative or fractional", df["GRADE_HDCNT"][(count < 0) | (count % 1 > 0)])
+
+        grade = df["CRSE_GRADE_OFF"]
+        self.add("error", "CRSE_GRADE_OFF is not a known grade", grade[~grade.isin(VALID_GRADES)])
+
+        depts = pd.MultiIndex.from_frame(df[["CAMPUS", "SUBJECT"]])
+        unknown = ~depts.isin(KNOWN_DEPTS)
+        self.add("error", "CAMPUS/SUBJECT not in dept_mapping", df["CAMPUS"][unknown] + " " + df["SUBJECT"][unknown])
+
+        for column in ["CAMPUS", "SUBJECT", "CATALOG_NBR", "DESCR", "FULL_NAME"]:
+            self.add("error", f"{column} is missing", df["FULL_NAME"][df[column].isna()])
+        self.add("warning", "NAME is missing, rows are dropped", df["FULL_NAME"][df["NAME"].isna()])
+
+    def check_file(self, chunksize: int = CHUNK_ROWS) -> "Preflight":
+        """Checks the whole file, reading it once as strings so no value can fail before it is checked."""
+        start = time.perf_counter()
+        columns = pd.read_csv(self.clean_filename, nrows=0).columns
+        if self.check_columns(columns):
+            name_column = "NAME" if "NAME" in columns else "HR_NAME"
+            usecols = [name_column if column == "NAME" else column for column in REQUIRED_COLUMNS]
+            key = [column for column in DUPLICATE_KEY if column in columns or column == "NAME"]
+            usecols += [column for column in key if column not in REQUIRED_COLUMNS]
+            hashes = []
+            for chunk in pd.read_csv(self.clean_filename, usecols=usecols, dtype=str, chunksize=chunksize):
+                chunk = chunk.rename(columns={name_column: "NAME"})
+                self.check_chunk(chunk)
+                # Keys are kept as 64-bit hashes, 8 bytes a row, so duplicates are found across chunks without the rows.
+                hashes.append(pd.util.hash_pandas_object(chunk[key], index=False).to_numpy())
+            if hashes:
+                _, inverse, counts = np.unique(np.concatenate(hashes), return_inverse=True, return_counts=True)
+                repeated = int((counts[inverse] > 1).sum())
+                if repeated:
+                    self.violations[("warning", "rows share a key (" + ", ".join(key) + "), their counts are summed")] = \
+                        [repeated, Counter({f"{int((counts > 1).sum())} keys": repeated})]
+        self.seconds = time.perf_counter() - start
+        return self
+
+    @staticmethod
+    def run(clean_filename: str) -> "Preflight":
+        """Checks `clean_filename` under the preflight stage and raises a ValueError listing every error it found."""
+        with metrics.stage("preflight"):
+            preflight = Preflight(clean_filename).check_file()
+            metrics.count(rows=preflight.rows)
+            for v in preflight.errors:
+                metrics.error(f"{v['check']} ({v['rows']} rows)")
+        print(preflight.summary())
+        if preflight.errors:
+            raise ValueError(f"[PREFLIGHT Error] {len(preflight.errors)} checks failed for {clean_filename}, nothing was written.")
+        return preflight
@@ -1,105 +1,498 @@
-import pandas as pd
-from db.Models import Session, ClassDistribution, DepartmentDistribution, Professor, Distribution, Libed, TermDistribution, and_
+import os
+import re
 from collections import Counter
-from mapping.mappings import term_to_name, dept_mapping, libed_mapping
+import pandas as pd
+from multiprocessing import Pool
+from sqlalchemy import JSON, VARCHAR, Column, Connection, Integer, SmallInteger, and_, bindparam, func, literal, select, text, update
+from db.Models import Session, ClassDistribution, DepartmentDistribution, Professor, ProfessorAlias, Distribution, Libed, TermDistribution
+from db.loader import get_loader
+from mapping.mappings import dept_mapping, grade_mapping, libed_mapping
+from src.metrics.metrics import metrics
+
+DIST_KEYS = ["TERM", "NAME", "FULL_NAME", "CAMPUS"]
+# Rows are ordered by name and reduced to one record per resolved professor.
+GROUP_KEYS = DIST_KEYS + ["PROFESSOR_ID"]
+PROF_KEYS = ["TERM", "PROFESSOR_ID", "FULL_NAME", "CAMPUS"]
+UNKNOWN_INSTRUCTOR = "Unknown Instructor"
+
+# Builds one term series table from term distributions. Grade counts are summed per series key and grade, the GPA
+# averages the letter grades in grade_mapping and shares are each grade's fraction of the term's students.
+SERIES_SQL = """
+    WITH points(grade, value) AS (VALUES {points}),
+    grade_counts AS (
+        SELECT d.class_id, d.id AS dist_id, d.professor_id, t.term, g.key AS grade, SUM(g.value) AS n
+        FROM termdistribution t
+        JOIN distribution d ON d.id = t.dist_id, json_each(t.grades) g
+        {where}
+        GROUP BY {key}, g.key
+    ), graded AS (
+        SELECT grade_counts.*, SUM(n) OVER (PARTITION BY {key}) AS students, points.value AS points
+        FROM grade_counts LEFT JOIN points ON points.grade = grade_counts.grade
+    )
+    INSERT INTO {table} ({columns}, students, gpa, shares)
+    SELECT {columns}, MAX(students), ROUND(SUM(n * points) / SUM(CASE WHEN points IS NOT NULL THEN n END), 3),
+           json_group_object(grade, ROUND(CAST(n AS REAL) / students, 4))
+    FROM graded
+    WHERE true
+    GROUP BY {key}
+    ON CONFLICT ({key}) DO UPDATE SET students = excluded.students, gpa = excluded.gpa, shares = excluded.shares
+"""
+SERIES_TABLES = {
+    "classtermseries": ("class_id, term", "class_id, term"),
+    "classprofessortermseries": ("class_id, dist_id, professor_id, term", "class_id, dist_id, term"),
+}
+
+# Rebuilds the summaries of the professors selected by {where}, one row per campus they taught on. The histogram sums
+# every term distribution, the GPA averages its letter grades like the series, and the terms and class codes span all
+# of the professor's classes on the campus.
+PROFESSOR_SUMMARY_SQL = """
+    WITH points(grade, value) AS (VALUES {points}),
+    touched AS (
+        SELECT DISTINCT d.professor_id
+        FROM termdistribution t
+        JOIN distribution d ON d.id = t.dist_id
+        WHERE d.professor_id IS NOT NULL {where}
+    ), taught AS (
+        SELECT d.professor_id, c.campus, c.id AS class_id, c.dept_abbr || ' ' || c.course_num AS code, t.term, t.grades
+        FROM termdistribution t
+        JOIN distribution d ON d.id = t.dist_id
+        JOIN classdistribution c ON c.id = d.class_id
+        WHERE d.professor_id IN (SELECT professor_id FROM touched)
+    ), grade_counts AS (
+        SELECT professor_id, campus, g.key AS grade, SUM(g.value) AS n
+        FROM taught, json_each(taught.grades) g
+        GROUP BY professor_id, campus, g.key
+    ), grade_totals AS (
+        SELECT professor_id, campus, SUM(n) AS students, json_group_object(grade_counts.grade, n) AS grades,
+               ROUND(SUM(n * points.value) / SUM(CASE WHEN points.value IS NOT NULL THEN n END), 3) AS gpa
+        FROM grade_counts LEFT JOIN points ON points.grade = grade_counts.grade
+        GROUP BY professor_id, campus
+    ), class_totals AS (
+        SELECT professor_id, campus, COUNT(DISTINCT class_id) AS class_count, MIN(term) AS first_term, MAX(term) AS last_term
+        FROM taught
+        GROUP BY professor_id, campus
+    ), course_lists AS (
+        SELECT professor_id, campus, json_group_array(code) AS courses
+        FROM (SELECT DISTINCT professor_id, campus, code FROM taught ORDER BY professor_id, campus, code)
+        GROUP BY professor_id, campus
+    )
+    INSERT INTO professorsummary (professor_id, campus, total_students, total_grades, gpa, class_count, first_term, last_term, courses)
+    SELECT c.professor_id, c.campus, COALESCE(g.students, 0), COALESCE(g.grades, '{{}}'), g.gpa, c.class_count, c.first_term,
+           c.last_term, l.courses
+    FROM class_totals c
+    JOIN course_lists l ON l.professor_id = c.professor_id AND l.campus = c.campus
+    LEFT JOIN grade_totals g ON g.professor_id = c.professor_id AND g.campus = c.campus
+"""
+
 
 class Process:
     @staticmethod
-    def process_dist(x: pd.DataFrame) -> pd.DataFrame:
+    def build_dists(df: pd.DataFrame) -> pd.DataFrame:
         """
-        On a grouped element by FULL_NAME, TERM, and NAME (individual class taught by a specific professor) it will generate
-        a distribution and associate it with the appropriate class distribution and professor. Should neither of those two exist
-        then it will create them as well. If the department of the class doesn't exist then that will be created.
+        Reduces cleaned rows to one record per class taught by a specific professor in a term (a group of FULL_NAME,
+        TERM, PROFESSOR_ID and CAMPUS), holding its grade distribution. Records come out in (TERM, NAME, FULL_NAME,
+        CAMPUS) group order so that the first record of a class decides its description, as it did when groups were
+        inserted one at a time. Names a professor appears under in the same class and term are summed into the first.
 
-        :type x: pd.DataFrame
+        :param df: Cleaned rows with the PROFESSOR_ID column added by `sync_dimensions`.
         """
-        session = Session()
-        prof_name = x["NAME"].iloc[0]
-        dept_abbr = x["SUBJECT"].iloc[0]
-        catalog_num = x["CATALOG_NBR"].iloc[0]
-        class_descr = x["DESCR"].iloc[0]
-        term = x["TERM"].iloc[0]
-        campus = x["CAMPUS"].iloc[0]
-        grade_hash = {
-            'A':0, 
-            'A+':0,
-            'A-':0,
-            'B': 0, 
-            'B+': 0, 
-            'B-': 0, 
-            'C': 0, 
-            'C+': 0, 
-            'C-':0, 
-            'D':0,
-            'D+': 0, 
-            'D-':0,
-            'F':0,
-            'N': 0, 
-            'S': 0, 
-            'P':0,
-            'W': 0
-        }
-        grade_hash = x.groupby("CRSE_GRADE_OFF")["GRADE_HDCNT"].sum().to_dict()
-        num_students = sum(grade_hash.values())
-        # Begin Insertion
-        class_dist = session.query(ClassDistribution).filter(and_(ClassDistribution.dept_abbr == dept_abbr, ClassDistribution.course_num == catalog_num, ClassDistribution.campus == campus)).first()
-        # dept = session.query(DepartmentDistribution).filter(and_(DepartmentDistribution.dept_abbr == dept_abbr, DepartmentDistribution.campus == campus)).first()
-        prof = session.query(Professor).filter(Professor.name == prof_name).first() or session.query(Professor).filter(Professor.name == "Unknown Instructor").first()
-        if class_dist == None:
-            class_dist = ClassDistribution(campus=campus,dept_abbr=dept_abbr,course_num=catalog_num,class_desc=class_descr,total_students=num_students,total_grades=grade_hash)
-            session.add(class_dist)
-            session.flush()
-            print(f"[DIST Create] Created New Class Distribution {class_dist.dept_abbr} {class_dist.course_num}")
+        df = df.dropna(subset=DIST_KEYS)
+        records = df.drop_duplicates(GROUP_KEYS).set_index(GROUP_KEYS)[["SUBJECT", "CATALOG_NBR", "DESCR"]].sort_index().reset_index()
+        records = records[~records.duplicated(PROF_KEYS)]
+        grade_hash = {}
+        for (*group, grade), count in df.groupby(PROF_KEYS + ["CRSE_GRADE_OFF"], observed=True)["GRADE_HDCNT"].sum().items():
+            grade_hash.setdefault(tuple(group), {})[grade] = int(count)
+        grades = [grade_hash.get(group, {}) for group in zip(*(records[key] for key in PROF_KEYS))]
+        records = records.assign(grades=grades, students=[sum(g.values()) for g in grades])
+        return records
+
+    @staticmethod
+    def build_dists_partitioned(df: pd.DataFrame, workers: int | None = None) -> pd.DataFrame:
+        """
+        Runs `build_dists` over (campus, subject) partitions of `df` in a process pool. Every class falls in exactly one
+        partition and the records are put back in group order, so the result is the same for any number of workers.
+
+        :param workers: Pool size, defaults to the number of cores. With 1 the whole frame is built at once in this
+            process, which gives the same records without the per-partition overhead.
+        """
+        if (workers or os.cpu_count() or 1) == 1:
+            return Process.build_dists(df)
+        partitions = [part for _, part in df.groupby(["CAMPUS", "SUBJECT"], sort=True, dropna=False, observed=True)]
+        if not partitions:
+            return Process.build_dists(df)
+        workers = min(workers or os.cpu_count() or 1, len(partitions))
+        if workers == 1:
+            records = [Process.build_dists(part) for part in partitions]
         else:
-            class_dist.total_grades = Counter(class_dist.total_grades) + Counter(grade_hash)
-            class_dist.total_students += num_students
-            print(f"[DIST Update] Updated Class Distribution {class_dist.dept_abbr} {class_dist.course_num}")
-
-        dist = session.query(Distribution).filter(Distribution.class_id == class_dist.id, Distribution.professor_id == prof.id).first()
-        
-        if dist == None:
-            dist = Distribution(class_id = class_dist.id, professor_id = prof.id)
-            session.add(dist)
-            session.flush()
-            print(f"[DIST Create] Created New Distribution Linking {class_dist.dept_abbr} {class_dist.course_num} to {prof.name}")
-
-        if session.query(TermDistribution).filter(TermDistribution.term == term, TermDistribution.dist_id==dist.id).first() == None:
-            term_dist = TermDistribution(students=num_students,grades=grade_hash,dist_id=dist.id, term=int(term))
-            session.add(term_dist)
-            session.commit()
-            print(f"[TERM DIST Create] Added Term Distribution for {prof.name}'s {class_dist.dept_abbr} {class_dist.course_num} for {term_to_name(term)} with {term_dist.students} students.")
+            with Pool(workers) as pool:
+                records = pool.map(Process.build_dists, partitions, chunksize=max(1, len(partitions) // (workers * 4)))
+        metrics.count(rows=len(partitions))
+        return pd.concat(records, ignore_index=True).sort_values(GROUP_KEYS, kind="stable", ignore_index=True)
 
-        session.close()
-        return x
-    
     @staticmethod
-    def process_prof(prof_name: str) -> None:
-        session = Session()
-        professor = Professor(name=prof_name)
-        session.add(professor)
-        session.commit()
-        print(f"[PROF Create] Added New Professor {professor.name}.")
-        session.close()
+    def load_dists(records: pd.DataFrame) -> None:
+        """
+        Writes records from `build_dists` in one transaction. The records are copied into a staging table and merged
+        with three set-based statements: missing class distributions, then the distributions linking them to
+        professors, then the term distributions. Records carry the professor `sync_dimensions` resolved for them.
+        Anything that already exists is left untouched, and where records share a key the first one wins. The term
+        series of the loaded terms and the summaries of the professors who taught them are rebuilt in the same
+        transaction, so a term never counts as loaded without them.
+
+        Class totals are not maintained here, run `Process.recompute_aggregates` once all records have been loaded.
+        """
+        if records.empty:
+            return
+        loader = get_loader()
+        classes = ClassDistribution.__table__
+        dists = Distribution.__table__
+        rows = [
+            {"seq": seq, "campus": campus, "dept_abbr": dept_abbr, "course_num": course_num, "class_desc": class_desc,
+             "professor_id": int(professor_id), "term": int(term), "students": students, "grades": grades}
+            for seq, (campus, dept_abbr, course_num, class_desc, professor_id, term, students, grades) in enumerate(zip(
+                records["CAMPUS"], records["SUBJECT"], records["CATALOG_NBR"], records["DESCR"], records["PROFESSOR_ID"],
+                records["TERM"], records["students"], records["grades"]))
+        ]
+        with loader.engine.begin() as conn:
+            staging = loader.stage(conn, "staging_dist", [
+                Column("seq", Integer, primary_key=True), Column("campus", VARCHAR(8)), Column("dept_abbr", VARCHAR(4)),
+                Column("course_num", VARCHAR(8)), Column("class_desc", VARCHAR(255)), Column("professor_id", Integer),
+                Column("term", SmallInteger), Column("students", Integer), Column("grades", JSON),
+            ], rows)
+            s = staging.c
+
+            # Totals are filled in by recompute_aggregates after ingest.
+            firsts = select(func.min(s.seq).label("seq")).group_by(s.campus, s.dept_abbr, s.course_num).subquery()
+            new_classes = loader.merge(conn, classes,
+                select(s.campus, s.dept_abbr, s.course_num, s.class_desc, literal(0), literal({}, JSON))
+                .join(firsts, firsts.c.seq == s.seq).order_by(s.seq),
+                ["campus", "dept_abbr", "course_num", "class_desc", "total_students", "total_grades"],
+                keys=["campus", "dept_abbr", "course_num"])
+
+            linked = (
+                select(s.seq, s.term, s.students, s.grades, s.professor_id, classes.c.id.label("class_id"))
+                .join(classes, and_(classes.c.campus == s.campus, classes.c.dept_abbr == s.dept_abbr, classes.c.course_num == s.course_num))
+                .subquery()
+            )
+            loader.merge(conn, dists,
+                select(linked.c.class_id, linked.c.professor_id).group_by(linked.c.class_id, linked.c.professor_id).order_by(func.min(linked.c.seq)),
+                ["class_id", "professor_id"], keys=["class_id", "professor_id"])
+
+            new_terms = loader.merge(conn, TermDistribution.__table__,
+                select(dists.c.id, linked.c.term, linked.c.students, linked.c.grades)
+                .join(dists, and_(dists.c.class_id == linked.c.class_id, dists.c.professor_id == linked.c.professor_id))
+                .order_by(linked.c.seq),
+                ["dist_id", "term", "students", "grades"], keys=["dist_id", "term"])
+            loader.unstage(conn, staging)
+            terms = records["TERM"].unique().tolist()
+            Process.update_series(terms, conn)
+            Process.update_professor_summaries(terms, conn)
+        metrics.item(f"[DIST Create] Loaded {new_terms} term distributions and {new_classes} new classes.")
 
     @staticmethod
-    def process_dept(dept_tuple: tuple[str, str]) -> None:
+    def build_dept(dept_tuple: tuple[str, str]) -> dict:
         campus, dept_abbr = dept_tuple
         if campus not in dept_mapping:
             raise ValueError(f"[DEPT Error] Campus {campus} not found in department mapping.")
         if dept_abbr not in dept_mapping[campus]:
             raise ValueError(f"[DEPT Error] Department {dept_abbr} not found for campus {campus} in department mapping.")
-        session = Session()
-        dept = DepartmentDistribution(campus=campus, dept_abbr=dept_abbr,dept_name=dept_mapping[campus][dept_abbr])
-        session.add(dept)
-        session.commit()
-        print(f"[DEPT Create] Added New Department {dept.dept_name} ({dept.dept_abbr}) for {dept.campus}.")
-        session.close()
-    
+        return {"campus": campus, "dept_abbr": dept_abbr, "dept_name": dept_mapping[campus][dept_abbr]}
+
+    @staticmethod
+    def sync_dimensions(df: pd.DataFrame) -> None:
+        """
+        Adds the libeds in libed_mapping, the professors (plus the "Unknown Instructor" for non-attributed grades, see
+        `sync_professors`) and the departments that `df` needs but the database lacks. The missing rows are found with
+        set differences against one column-only read per table and written with one multi-row insert per table, all in
+        one transaction, so a department missing from dept_mapping leaves nothing half added. Adds the PROFESSOR_ID
+        column `build_dists` groups by to `df`.
+        """
+        loader = get_loader()
+        libeds = Libed.__table__
+        depts = DepartmentDistribution.__table__
+        with loader.engine.begin() as conn:
+            new_libeds = set(libed_mapping.values()) - set(conn.execute(select(libeds.c.name)).scalars())
+            new_depts = set(zip(df["CAMPUS"], df["SUBJECT"])) - set(conn.execute(select(depts.c.campus, depts.c.dept_abbr)).tuples())
+
+            dept_rows = []
+            missing_depts = []
+            for dept in sorted(new_depts):
+                try:
+                    dept_rows.append(Process.build_dept(dept))
+                except ValueError as e:
+                    metrics.error(str(e))
+                    missing_depts.append(dept)
+            if missing_depts:
+                raise ValueError(f"[DEPT Error] The following departments failed to process: {missing_depts}")
+
+            loader.insert(conn, libeds, [{"name": name} for name in sorted(new_libeds)], keys=["name"])
+            prof_ids, new_profs = Process.sync_professors(conn, df)
+            loader.insert(conn, depts, dept_rows, keys=["campus", "dept_abbr"])
+            metrics.count(rows=len(new_libeds) + len(new_profs) + len(new_depts))
+        keys = pd.MultiIndex.from_arrays([df["NAME"].astype(object), df["INTERNET_ID"].astype(object).fillna("")])
+        df["PROFESSOR_ID"] = pd.Series(prof_ids, dtype="float64").reindex(keys).to_numpy() if prof_ids else float("nan")
+        for name in new_profs:
+            metrics.item(f"[PROF Create] Added New Professor {name}.")
+        for dept in dept_rows:
+            metrics.item(f"[DEPT Create] Added New Department {dept['dept_name']} ({dept['dept_abbr']}) for {dept['campus']}.")
+
+    @staticmethod
+    def x500_fits(name: str, x500: str) -> bool:
+        """
+        Whether `x500` is spelled like one of the University's x500s for `name`: containing four letters of a name
+        word (or of two joined words, for "De Pellegrin" or "O'Loughlin"), starting with three letters of one
+        ("joh20235", "wan01871"), a short word padded with x ("wuxx0179", "nixxx008"), a word with an initial before or
+        after it ("xuz", "scwu"), or the name's initials ("twj", "rrf").
+        """
+        letters = re.sub(r"[^a-z]", "", x500.lower())
+        words = re.findall(r"[a-z]+", re.sub(r"['’.]", "", name.lower()))
+        if not letters or not words:
+            return False
+        parts = words + [first + second for first, second in zip(words, words[1:])]
+        return (any(word[:4] in letters or letters.startswith(word[:3]) for word in parts if len(word) >= 3)
+                or any(letters.rstrip("x").startswith(word) or letters.endswith(word) for word in parts if len(word) >= 2)
+                or (2 <= len(letters) <= 4 and letters[0] == words[0][0] and letters[-1] == words[-1][0]))
+
+    @staticmethod
+    def identified_pairs(pairs: list[tuple[str, str]]) -> list[tuple[str, str]]:
+        """
+        The (name, x500) pairs of one term whose x500 identifies the name. The registrar lists some sections under the
+        course coordinator's x500 with the section instructor's name, which shows up as one x500 with several names.
+        An x500 seen with a single name identifies it however it is spelled; a shared one only identifies the names
+        it fits (`x500_fits`), the others fall back to matching by name.
+        """
+        names = Counter(x500 for _, x500 in pairs if x500)
+        return [(name, x500) for name, x500 in pairs if x500 and (names[x500] == 1 or Process.x500_fits(name, x500))]
+
+    @staticmethod
+    def sync_professors(conn: Connection, df: pd.DataFrame, create: bool = True) -> tuple[dict[tuple[str, str], int], list[str]]:
+        """
+        Resolves the NAME and INTERNET_ID pairs of `df` against the professor identity index. An x500 seen for the first
+        time claims the professor of the same name that has no x500 yet, or otherwise becomes a new professor, and
+        every name it identifies (`identified_pairs`) is recorded as one of its aliases. Other rows are matched by name
+        through the aliases, adding a professor only for a name no one is known by. `df` should hold one term.
+
+        Returns the professor id of every (name, x500) pair, with "" for a missing x500, and the names added.
+
+        :param create: Add professors, or only claim x500s and record aliases (backfilling an existing database).
+        """
+        loader = get_loader()
+        profs = Professor.__table__
+        aliases = ProfessorAlias.__table__
+        people = df[["NAME", "INTERNET_ID"]].dropna(subset=["NAME"]).astype(object).fillna("").drop_duplicates()
+        pairs = sorted(set(zip(people["NAME"].astype(str), people["INTERNET_ID"].astype(str))))
+        identified = Process.identified_pairs(pairs)
+
+        by_x500 = dict(conn.execute(select(profs.c.x500, profs.c.id).where(profs.c.x500.is_not(None))).all())
+        unclaimed = dict(conn.execute(
+            select(aliases.c.name, func.min(aliases.c.professor_id)).join(profs, profs.c.id == aliases.c.professor_id)
+            .where(profs.c.x500.is_(None), aliases.c.name != UNKNOWN_INSTRUCTOR).group_by(aliases.c.name)).all())
+        known = set(conn.execute(select(aliases.c.name).distinct()).scalars())
+
+        claims = {}
+        new_rows = []
+        for name, x500 in identified:
+            if x500 in by_x500:
+                continue
+            # Each professor without an x500 is claimed once, another x500 under the same name is another person.
+            prof_id = unclaimed.pop(name, None)
+            if prof_id is not None and prof_id not in claims:
+                claims[prof_id] = x500
+                by_x500[x500] = prof_id
+            elif create:
+                new_rows.append({"name": name, "x500": x500})
+                by_x500[x500] = None
+        if create:
+            unnamed = ({name for name, _ in pairs} | {UNKNOWN_INSTRUCTOR}) - known - {name for name, _ in identified}
+            new_rows += [{"name": name, "x500": None} for name in sorted(unnamed)]
+
+        if claims:
+            conn.execute(update(profs).where(profs.c.id == bindparam("prof_id")).values(x500=bindparam("claimed")),
+                         [{"prof_id": prof_id, "claimed": x500} for prof_id, x500 in claims.items()])
+        loader.insert(conn, profs, new_rows)
+        x500_ids = dict(conn.execute(select(profs.c.x500, profs.c.id).where(profs.c.x500.in_({x500 for _, x500 in identified}))).all())
+        loader.insert(conn, aliases, [{"name": name, "professor_id": x500_ids[x500]} for name, x500 in identified if x500 in x500_ids],
+                      keys=["name", "professor_id"])
+        # Professors added without an x500 are known by their own name.
+        loader.merge(conn, aliases, select(profs.c.name, profs.c.id).where(profs.c.id.not_in(select(aliases.c.professor_id))),
+                     ["name", "professor_id"], keys=["name", "professor_id"])
+        for prof_id, x500 in claims.items():
+            metrics.item(f"[PROF Identity] Professor {prof_id} is {x500}.")
+
+        by_name = dict(conn.execute(select(aliases.c.name, func.min(aliases.c.professor_id)).where(
+            aliases.c.name.in_({name for name, _ in pairs})).group_by(aliases.c.name)).all()) if pairs else {}
+        ids = {}
+        identified = set(identified)
+        for name, x500 in pairs:
+            prof_id = x500_ids.get(x500) if (name, x500) in identified else by_name.get(name)
+            if prof_id is not None:
+                ids[(name, x500)] = prof_id
+        return ids, [row["name"] for row in new_rows]
+
     @staticmethod
-    def process_libeds() -> None:
-        """ Adds all libeds as defined in libed_mapping to the database if they do not already exist."""
+    def merge_professors() -> int:
+        """
+        Merges duplicate professors left by name-only ingests into the professor with an x500 that shares one of their
+        names, and returns how many were merged. A professor without an x500 is only merged when exactly one professor
+        with an x500 goes by one of its names. Distributions are re-pointed with set-based statements: missing
+        (class, survivor) distributions are added, term distributions are moved over with grades summed where the
+        survivor already has that term, then the duplicates' rows, aliases and RMP fields follow and the duplicates are
+        deleted. The term series and professor summaries of every affected term are rebuilt.
+        """
+        loader = get_loader()
+        with loader.engine.begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS temp.merge_map"))
+            conn.execute(text("CREATE TEMPORARY TABLE merge_map (old_id INTEGER PRIMARY KEY, new_id INTEGER NOT NULL)"))
+            merged = conn.execute(text("""
+                INSERT INTO merge_map (old_id, new_id)
+                SELECT old.id, MIN(new.id)
+                FROM professor old
+                JOIN professoralias a ON a.professor_id = old.id
+                JOIN professoralias b ON b.name = a.name AND b.professor_id != old.id
+                JOIN professor new ON new.id = b.professor_id
+                WHERE old.x500 IS NULL AND new.x500 IS NOT NULL AND old.name != :unknown
+                GROUP BY old.id
+                HAVING COUNT(DISTINCT new.id) = 1
+            """), {"unknown": UNKNOWN_INSTRUCTOR}).rowcount
+            if not merged:
+                return 0
+
+            conn.execute(text("""
+                INSERT INTO distribution (class_id, professor_id)
+                SELECT d.class_id, m.new_id FROM distribution d JOIN merge_map m ON m.old_id = d.professor_id
+                WHERE true
+                ON CONFLICT (class_id, professor_id) DO NOTHING
+            """))
+            conn.execute(text("DROP TABLE IF EXISTS temp.dist_map"))
+            conn.execute(text("""
+                CREATE TEMPORARY TABLE dist_map AS
+                SELECT old.id AS old_dist, new.id AS new_dist
+                FROM distribution old
+                JOIN merge_map m ON m.old_id = old.professor_id
+                JOIN distribution new ON new.class_id = old.class_id AND new.professor_id = m.new_id
+            """))
+            terms = list(conn.execute(text("SELECT DISTINCT term FROM termdistribution WHERE dist_id IN (SELECT old_dist FROM dist_map)")).scalars())
+            conn.execute(text("""
+                INSERT INTO termdistribution (dist_id, term, students, grades)
+                SELECT m.new_dist, t.term, t.students, t.grades FROM termdistribution t JOIN dist_map m ON m.old_dist = t.dist_id
+                WHERE true
+                ON CONFLICT (dist_id, term) DO UPDATE SET
+                    students = termdistribution.students + excluded.students,
+                    grades = (
+                        SELECT json_group_object(grade, n) FROM (
+                            SELECT key AS grade, SUM(value) AS n
+                            FROM (SELECT key, value FROM json_each(termdistribution.grades)
+                                  UNION ALL SELECT key, value FROM json_each(excluded.grades))
+                            GROUP BY key
+                        )
+                    )
+            """))
+            for table in ("classprofessortermseries", "termdistribution"):
+                conn.execute(text(f"DELETE FROM {table} WHERE dist_id IN (SELECT old_dist FROM dist_map)"))
+            conn.execute(text("DELETE FROM distribution WHERE id IN (SELECT old_dist FROM dist_map)"))
+
+            conn.execute(text("""
+                INSERT INTO professoralias (name, professor_id)
+                SELECT a.name, m.new_id FROM professoralias a JOIN merge_map m ON m.old_id = a.professor_id
+                WHERE true
+                ON CONFLICT (name, professor_id) DO NOTHING
+            """))
+            conn.execute(text("DELETE FROM professoralias WHERE professor_id IN (SELECT old_id FROM merge_map)"))
+            for column in ("RMP_score", "RMP_diff", "RMP_link"):
+                conn.execute(text(f"""
+                    UPDATE professor SET {column} = (
+                        SELECT MIN(old.{column}) FROM merge_map m JOIN professor old ON old.id = m.old_id WHERE m.new_id = professor.id
+                    )
+                    WHERE {column} IS NULL AND id IN (SELECT new_id FROM merge_map)
+                """))
+            conn.execute(text("DELETE FROM professorsummary WHERE professor_id IN (SELECT old_id FROM merge_map)"))
+            conn.execute(text("DELETE FROM professor WHERE id IN (SELECT old_id FROM merge_map)"))
+            conn.execute(text("DROP TABLE temp.dist_map"))
+            conn.execute(text("DROP TABLE temp.merge_map"))
+            Process.update_series(terms, conn)
+            Process.update_professor_summaries(terms, conn)
+        metrics.count(rows=merged)
+        metrics.item(f"[PROF Merge] Merged {merged} duplicate professors.")
+        return merged
+
+    @staticmethod
+    def update_series(terms: list[int] | None = None, conn: Connection | None = None) -> None:
+        """
+        Upserts the term series of `terms` into ClassTermSeries and ClassProfessorTermSeries. A term's rows only depend
+        on that term's distributions, so ingest passes just the terms it loaded. None rebuilds every term. Runs on
+        `conn` when given, so the series commit together with the writes they derive from, and in a transaction of its
+        own otherwise.
+        """
+        if terms is not None and not len(terms):
+            return
+        if conn is None:
+            with get_loader().engine.begin() as conn:
+                return Process.update_series(terms, conn)
+        points = ", ".join(f"('{grade}', {value})" for grade, value in grade_mapping.items())
+        for table, (columns, key) in SERIES_TABLES.items():
+            statement = text(SERIES_SQL.format(points=points, table=table, columns=columns, key=key,
+                                               where="WHERE t.term IN :terms" if terms is not None else ""))
+            if terms is not None:
+                statement = statement.bindparams(bindparam("terms", value=[int(term) for term in terms], expanding=True))
+            conn.execute(statement)
+        metrics.item(f"[DIST Series] Updated term series for {'all terms' if terms is None else ', '.join(map(str, sorted(terms)))}.")
+
+    @staticmethod
+    def update_professor_summaries(terms: list[int] | None = None, conn: Connection | None = None) -> None:
+        """
+        Rebuilds the ProfessorSummary rows of every professor who taught in `terms`. A summary spans all of a
+        professor's terms, so each touched professor is recomputed in full, but professors who didn't teach in `terms`
+        are left alone. None rebuilds every professor. Like `update_series`, runs on `conn` when given.
+        """
+        if terms is not None and not len(terms):
+            return
+        if conn is None:
+            with get_loader().engine.begin() as conn:
+                return Process.update_professor_summaries(terms, conn)
+        points = ", ".join(f"('{grade}', {value})" for grade, value in grade_mapping.items())
+        where = "AND t.term IN :terms" if terms is not None else ""
+        touched = f"SELECT d.professor_id FROM termdistribution t JOIN distribution d ON d.id = t.dist_id WHERE true {where}"
+        statements = [text(f"DELETE FROM professorsummary WHERE professor_id IN ({touched})" if terms is not None else "DELETE FROM professorsummary"),
+                      text(PROFESSOR_SUMMARY_SQL.format(points=points, where=where))]
+        for statement in statements:
+            if terms is not None:
+                statement = statement.bindparams(bindparam("terms", value=[int(term) for term in terms], expanding=True))
+            conn.execute(statement)
+        metrics.item(f"[PROF Summary] Updated professor summaries for {'all terms' if terms is None else ', '.join(map(str, sorted(terms)))}.")
+
+    @staticmethod
+    def recompute_aggregates() -> None:
+        """
+        Derives total_students and total_grades of every ClassDistribution from its TermDistributions in a single
+        grouped pass. Totals are rebuilt from scratch so they are correct regardless of insertion order or re-runs.
+        """
         session = Session()
-        if len(session.query(Libed).all()) == 0:
-            session.add_all([Libed(name=libed) for libed in set(libed_mapping.values())])
+        try:
+            session.execute(text("""
+                WITH grade_totals AS (
+                    SELECT d.class_id, g.key AS grade, SUM(g.value) AS n
+                    FROM termdistribution t
+                    JOIN distribution d ON d.id = t.dist_id, json_each(t.grades) g
+                    GROUP BY d.class_id, g.key
+                ), class_totals AS (
+                    SELECT class_id, SUM(n) AS students, json_group_object(grade, n) AS grades
+                    FROM grade_totals
+                    GROUP BY class_id
+                )
+                UPDATE classdistribution
+                SET total_students = class_totals.students, total_grades = class_totals.grades
+                FROM class_totals
+                WHERE classdistribution.id = class_totals.class_id
+            """))
+            # Classes whose term distributions have all been removed should not keep stale totals.
+            session.execute(text("""
+                UPDATE classdistribution
+                SET total_students = 0, total_grades = '{}'
+                WHERE id NOT IN (
+                    SELECT d.class_id FROM distribution d JOIN termdistribution t ON t.dist_id = d.id
+                )
+            """))
             session.commit()
-        session.close()
\ No newline at end of file
+        finally:
+            session.close()
+        metrics.item("[DIST Aggregate] Recomputed class distribution totals.")
@@ -0,0 +1,139 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from src.metrics.profiler import QueryProfiler
+
+"""
+Per-stage run metrics for the data pipeline.
+
+Stages are opened with `metrics.stage(name)` and everything counted while a stage is open is attributed to it:
+wall time, rows processed, DB statements, HTTP calls and retries, cache hits and errors. Per-item messages go through
+`metrics.item` and are only printed when verbose output has been asked for. Counting is safe from the scraper threads.
+Open stages are tracked per thread, so stages the pipeline runs side by side keep their own counts, and worker threads
+join their caller's stage with `metrics.attributed`.
+"""
+
+COUNTERS = ("rows", "db_statements", "http_calls", "http_retries", "cache_hits", "errors")
+MAX_ERROR_SAMPLES = 20
+
+
+class Metrics:
+    def __init__(self):
+        self.verbose = False
+        self.started = datetime.now(timezone.utc)
+        self.stages: dict[str, dict] = {}
+        self._local = threading.local()
+        self._engines: set[int] = set()
+        self.profiler: QueryProfiler | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def _stack(self) -> list[str]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @property
+    def current(self) -> str:
+        return self._stack[-1] if self._stack else "other"
+
+    def _stage(self, name: str) -> dict:
+        if name not in self.stages:
+            self.stages[name] = {"wall_seconds": 0.0, **{counter: 0 for counter in COUNTERS}, "error_samples": []}
+        return self.stages[name]
+
+    @contextmanager
+    def stage(self, name: str):
+        """Times the enclosed block and attributes all counts made inside it to `name`."""
+        with self._lock:
+            stats = self._stage(name)
+        self._stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stats["wall_seconds"] += elapsed
+            self._stack.pop()
+
+    @contextmanager
+    def attributed(self, name: str):
+        """Attributes counts made by this thread to `name` without timing it, for threads working for a stage."""
+        self._stack.append(name)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+
+    def count(self, stage: str | None = None, **counts: int) -> None:
+        with self._lock:
+            stats = self._stage(stage or self.current)
+            for counter, n in counts.items():
+                stats[counter] += n
+
+    def item(self, message: str) -> None:
+        """Per-item progress, only printed in verbose mode."""
+        if self.verbose:
+            print(message)
+
+    def error(self, message: str) -> None:
+        """Counts an error against the current stage and keeps a few samples for the report."""
+        with self._lock:
+            stats = self._stage(self.current)
+            stats["errors"] += 1
+            if len(stats["error_samples"]) < MAX_ERROR_SAMPLES:
+                stats["error_samples"].append(message)
+        self.item(message)
+
+    def attach(self, engine: Engine) -> None:
+        """Counts every statement executed on `engine` against the current stage."""
+        if id(engine) in self._engines:
+            return
+        self._engines.add(id(engine))
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            self.count(db_statements=1)
+
+    def profile(self, engine: Engine, slow_ms: float = 50.0, repeat_threshold: int = 50) -> QueryProfiler:
+        """Turns on SQL profiling for `engine`, its findings are added to the run report and summary."""
+        self.profiler = QueryProfiler(lambda: self.current, slow_ms, repeat_threshold)
+        self.profiler.attach(engine)
+        return self.profiler
+
+    def report(self) -> dict:
+        finished = datetime.now(timezone.utc)
+        report = {
+            "started": self.started.isoformat(timespec="seconds"),
+            "finished": finished.isoformat(timespec="seconds"),
+            "wall_seconds": round((finished - self.started).total_seconds(), 3),
+            "stages": {name: {**stats, "wall_seconds": round(stats["wall_seconds"], 3)} for name, stats in self.stages.items()},
+        }
+        if self.profiler:
+            report["sql"] = self.profiler.report()
+        return report
+
+    def write_report(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+
+    def summary(self) -> str:
+        lines = [f"{'stage':<20}{'seconds':>10}{'rows':>10}{'db':>10}{'http':>8}{'retry':>8}{'cache':>8}{'errors':>8}"]
+        for name, stats in self.stages.items():
+            lines.append(f"{name:<20}{stats['wall_seconds']:>10.2f}{stats['rows']:>10}{stats['db_statements']:>10}"
+                         f"{stats['http_calls']:>8}{stats['http_retries']:>8}{stats['cache_hits']:>8}{stats['errors']:>8}")
+        if self.profiler:
+            lines.append(self.profiler.summary())
+        return "\n".join(lines)
+
+
+metrics = Metrics()
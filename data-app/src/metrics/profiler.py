@@ -0,0 +1,132 @@
+import os
+import re
+import sys
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+"""
+Opt-in SQL profiling for the pipeline engine.
+
+Every statement is grouped by stage and by statement shape (the SQL text with bound value lists collapsed). Statements
+slower than a threshold are logged with their parameters, and a shape that runs many times within one stage from the
+same call site is flagged as a likely N+1 loop.
+"""
+
+MAX_SLOW_QUERIES = 100
+IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+WHITESPACE = re.compile(r"\s+")
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def statement_shape(statement: str) -> str:
+    return IN_LIST.sub("(?, ...)", WHITESPACE.sub(" ", statement).strip())
+
+
+def app_file(filename: str) -> str | None:
+    """`filename` relative to the data-app root if it is pipeline code, None for libraries and this module."""
+    if filename.startswith("<"):
+        return None
+    filename = os.path.abspath(filename)
+    if filename.startswith(APP_ROOT) and "site-packages" not in filename and filename != os.path.abspath(__file__):
+        return os.path.relpath(filename, APP_ROOT)
+    return None
+
+
+# Code file -> its app-relative path or None, so each file is only classified once.
+APP_FILES: dict[str, str | None] = {}
+
+
+def call_site() -> str:
+    """
+    The innermost pipeline frame that led to the statement, ignoring SQLAlchemy, pandas and this module. Walks the
+    live frames instead of formatting a traceback, so it is cheap enough to run for every statement.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename not in APP_FILES:
+            APP_FILES[filename] = app_file(filename)
+        if APP_FILES[filename] is not None:
+            return f"{APP_FILES[filename]}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+class QueryProfiler:
+    def __init__(self, stage_of, slow_ms: float = 50.0, repeat_threshold: int = 50):
+        """
+        :param stage_of: Callable returning the name of the stage currently running.
+        :param slow_ms: Statements slower than this are logged with their parameters.
+        :param repeat_threshold: A shape executed this often from the same call site within a stage is flagged as N+1.
+        """
+        self.stage_of = stage_of
+        self.slow_ms = slow_ms
+        self.repeat_threshold = repeat_threshold
+        self.shapes: dict[tuple[str, str, str], dict] = {}
+        self.slow: list[dict] = []
+        # Concurrent pipeline stages execute SQL from several threads.
+        self._lock = threading.Lock()
+
+    def attach(self, engine: Engine) -> None:
+        @event.listens_for(engine, "before_cursor_execute")
+        def start_timer(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def record(conn, cursor, statement, parameters, context, executemany):
+            elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+            self.record(statement, parameters, elapsed_ms)
+
+    def record(self, statement: str, parameters, elapsed_ms: float) -> None:
+        shape = statement_shape(statement)
+        stage = self.stage_of()
+        site = call_site()
+        with self._lock:
+            stats = self.shapes.setdefault((stage, shape, site), {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+            if elapsed_ms < self.slow_ms:
+                return
+            params = repr(parameters)
+            entry = {"stage": stage, "ms": round(elapsed_ms, 2), "statement": shape, "parameters": params[:500], "call_site": site}
+            if len(self.slow) < MAX_SLOW_QUERIES:
+                self.slow.append(entry)
+        print(f"[SQL SLOW] {entry['ms']}ms in {stage} at {site}: {shape[:200]} {params[:200]}")
+
+    def report(self) -> dict:
+        with self._lock:
+            recorded = {key: dict(stats) for key, stats in self.shapes.items()}
+            slow = list(self.slow)
+        stages = {}
+        for (stage, _, _), stats in recorded.items():
+            totals = stages.setdefault(stage, {"queries": 0, "total_ms": 0.0, "shapes": 0})
+            totals["queries"] += stats["count"]
+            totals["total_ms"] = round(totals["total_ms"] + stats["total_ms"], 2)
+            totals["shapes"] += 1
+
+        shapes = [
+            {"stage": stage, "statement": shape, "call_site": site, **stats, "total_ms": round(stats["total_ms"], 2), "max_ms": round(stats["max_ms"], 2)}
+            for (stage, shape, site), stats in recorded.items()
+        ]
+        shapes.sort(key=lambda s: s["total_ms"], reverse=True)
+        return {
+            "slow_ms": self.slow_ms,
+            "repeat_threshold": self.repeat_threshold,
+            "stages": stages,
+            "shapes": shapes,
+            "n_plus_one": [s for s in shapes if s["count"] >= self.repeat_threshold],
+            "slow": slow,
+        }
+
+    def summary(self, limit: int = 5) -> str:
+        suspects = self.report()["n_plus_one"][:limit]
+        if not suspects:
+            return "[SQL] No repeated query shapes found."
+        lines = ["[SQL] Repeated query shapes (likely N+1):"]
+        for s in suspects:
+            lines.append(f"  {s['count']:>7}x {s['total_ms']:>9.1f}ms  {s['stage']} at {s['call_site']}: {s['statement'][:120]}")
+        return "\n".join(lines)
@@ -0,0 +1,168 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import requests
+from src.metrics.metrics import metrics
+
+"""
+Shared scheduler for outbound HTTP requests.
+
+Every scraper sends its requests through `scheduler`, which keeps a concurrency limit per host. The limit grows
+additively while a host answers quickly and is cut multiplicatively on 429/503 responses, timeouts, connection errors
+and very slow answers. Throttled and failed requests are retried with jittered exponential backoff, honouring
+Retry-After. Callers fan their work out with `scheduler.map` and let the per-host limits decide how much actually runs
+at once, so each source runs near what it can take without hand-picked pool sizes.
+"""
+
+THROTTLE_STATUSES = {429, 503}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HostLimiter:
+    """AIMD concurrency limit for one host."""
+
+    def __init__(self, initial: float = 2, minimum: float = 1, maximum: float = 32, increase: float = 1.0,
+                 decrease: float = 0.5, slow_seconds: float = 10.0):
+        """
+        :param increase: Added to the limit over one limit's worth of successful requests.
+        :param decrease: Factor the limit is multiplied by when the host throttles, once per round of requests.
+        :param slow_seconds: Responses slower than this count as throttling.
+        """
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.slow_seconds = slow_seconds
+        self.in_flight = 0
+        self.resume_at = 0.0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> float:
+        """Waits for a free slot and returns when the request was let through, to be handed back to `release`."""
+        with self._cond:
+            while True:
+                wait = self.resume_at - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                elif self.in_flight >= int(self.limit):
+                    self._cond.wait()
+                else:
+                    break
+            self.in_flight += 1
+            return time.monotonic()
+
+    def release(self, started: float, throttled: bool, cooldown: float = 0.0) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                # Requests sent before the last cut were sent at the old limit, only newer ones cut it again.
+                if started >= self._last_decrease:
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    self._last_decrease = now
+                self.resume_at = max(self.resume_at, now + cooldown)
+            else:
+                self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+            self._cond.notify_all()
+
+
+def retry_after(resp: requests.Response) -> float:
+    value = getattr(resp, "headers", {}).get("Retry-After")
+    try:
+        return float(value) if value else 0.0
+    except ValueError:
+        return 0.0
+
+
+class Scheduler:
+    def __init__(self, retries: int = 4, backoff: float = 0.5, max_backoff: float = 30.0, timeout: float = 30.0):
+        """
+        :param retries: Attempts made after the first before giving up on a request.
+        :param backoff: Base of the exponential backoff between attempts, the actual sleep is drawn uniformly below it.
+        :param timeout: Default timeout in seconds for every request.
+        """
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.host_settings: dict[str, dict] = {}
+        self.hosts: dict[str, HostLimiter] = {}
+        self._lock = threading.Lock()
+
+    def configure_host(self, host: str, **settings) -> None:
+        """Overrides `HostLimiter` settings for one host, e.g. a lower maximum for a source known to ban."""
+        self.host_settings[host] = settings
+        self.hosts.pop(host, None)
+
+    def limiter(self, host: str) -> HostLimiter:
+        with self._lock:
+            if host not in self.hosts:
+                self.hosts[host] = HostLimiter(**self.host_settings.get(host, {}))
+            return self.hosts[host]
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Sends one request within the host's limit, retrying throttled and failed attempts. Returns the last response,
+        which may still be an error status, and only raises if every attempt failed to connect.
+        """
+        limiter = self.limiter(urlparse(url).netloc)
+        kwargs.setdefault("timeout", self.timeout)
+        resp = None
+        for attempt in range(self.retries + 1):
+            start = limiter.acquire()
+            metrics.count(http_calls=1)
+            try:
+                resp = getattr(requests, method)(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                limiter.release(start, throttled=True)
+                resp, error = None, e
+            else:
+                slow = time.monotonic() - start > limiter.slow_seconds
+                limiter.release(start, resp.status_code in THROTTLE_STATUSES or slow, retry_after(resp))
+                if resp.status_code not in RETRY_STATUSES:
+                    return resp
+            if attempt < self.retries:
+                metrics.count(http_retries=1)
+                time.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)))
+        if resp is None:
+            raise error
+        return resp
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("get", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("post", url, **kwargs)
+
+    def map(self, fn, items, threads: int = 16) -> list:
+        """
+        Runs `fn` over `items` in a thread pool and returns the results in order. `threads` only bounds how many calls
+        can wait at once, the host limits decide how many requests are actually sent.
+        """
+        items = list(items)
+        if len(items) <= 1:
+            return [fn(item) for item in items]
+        stage = metrics.current
+
+        def call(item):
+            with metrics.attributed(stage):
+                return fn(item)
+
+        with ThreadPoolExecutor(min(threads, len(items))) as pool:
+            return list(pool.map(call, items))
+
+
+# Hosts known to ban or throttle hard get a low ceiling, the adaptive limit only moves below it.
+HOST_MAXIMUMS = {
+    # RMP rate limits anything above five concurrent requests.
+    "www.ratemyprofessors.com": 5,
+    "app.coursedog.com": 8,
+}
+
+scheduler = Scheduler()
+for host, maximum in HOST_MAXIMUMS.items():
+    scheduler.configure_host(host, maximum=maximum)
@@ -0,0 +1,159 @@
+import hashlib
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from typing import Callable
+from sqlalchemy import select
+from db import Models
+from db.Models import StageCheckpoint, write_lock
+from db.loader import get_loader
+from src.metrics.metrics import metrics
+
+"""
+Runs pipeline stages as a graph of declared dependencies.
+
+Each `Stage` names the stages it runs after. Stages whose dependencies have finished run at once on a thread pool, so
+independent stages (CourseDog, RMP and SRT are mostly waiting on the network) overlap and a run takes about as long as
+its longest branch. Writes from concurrent stages take turns through `db.Models.write_lock`; an `exclusive` stage
+holds it for its whole run.
+
+Every finished stage is checkpointed in `stagecheckpoint` against a hash of the input file. A run can be limited to
+some stages (`only`), restarted at a stage and everything after it (`start`), or resumed by skipping what already
+finished for the same input (`resume`).
+"""
+
+
+class Stage:
+    def __init__(self, name: str, fn: Callable[[], None], after: tuple[str, ...] = (), exclusive: bool = False, changes_data: bool = True):
+        """
+        :param after: Stages that have to finish first.
+        :param exclusive: Hold the write lock for the whole stage, for bulk writers that are one long transaction.
+        :param changes_data: Whether finishing the stage calls for a new build stamp.
+        """
+        self.name = name
+        self.fn = fn
+        self.after = after
+        self.exclusive = exclusive
+        self.changes_data = changes_data
+
+    def run(self) -> float:
+        start = time.perf_counter()
+        if self.exclusive:
+            with write_lock():
+                self.fn()
+        else:
+            self.fn()
+        return time.perf_counter() - start
+
+
+def file_key(path: str) -> str:
+    """Checkpoint key of an input file, the SHA-256 of its contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def finished_stages(source: str) -> set[str]:
+    with Models.engine.connect() as conn:
+        return set(conn.execute(select(StageCheckpoint.stage).where(StageCheckpoint.source == source)).scalars())
+
+
+def checkpoint(source: str, stage: str, seconds: float) -> None:
+    row = {"source": source, "stage": stage, "finished_at": datetime.now(timezone.utc).replace(tzinfo=None), "seconds": seconds}
+    with write_lock(), Models.engine.begin() as conn:
+        get_loader().insert(conn, StageCheckpoint.__table__, [row], keys=["source", "stage"], update=["finished_at", "seconds"])
+
+
+class StageGraph:
+    def __init__(self, stages: list[Stage]):
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("[PIPELINE] Stage names must be unique.")
+        for stage in stages:
+            for dep in stage.after:
+                if dep not in self.stages:
+                    raise ValueError(f"[PIPELINE] Stage {stage.name} runs after unknown stage {dep}.")
+        self.order = self.topological_order()
+        self.finished: list[str] = []
+
+    def topological_order(self) -> list[str]:
+        order, visiting, done = [], set(), set()
+
+        def visit(name: str) -> None:
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"[PIPELINE] Stage {name} depends on itself.")
+            visiting.add(name)
+            for dep in self.stages[name].after:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def descendants(self, name: str) -> set[str]:
+        found = {name}
+        for other in self.order:
+            if any(dep in found for dep in self.stages[other].after):
+                found.add(other)
+        return found
+
+    def select(self, only: list[str] | None = None, start: str | None = None, skip: set[str] = frozenset()) -> list[str]:
+        """
+        Stages to run, in dependency order: `only` those named, or `start` and everything after it, or all of them,
+        less the stages in `skip`.
+        """
+        for name in (only or []) + ([start] if start else []):
+            if name not in self.stages:
+                raise ValueError(f"[PIPELINE] Unknown stage {name}, expected one of {', '.join(self.order)}.")
+        if only:
+            chosen = set(only)
+        elif start:
+            chosen = self.descendants(start)
+        else:
+            chosen = set(self.stages)
+        return [name for name in self.order if name in chosen and name not in skip]
+
+    def run(self, selected: list[str], source: str | None = None) -> list[str]:
+        """
+        Runs `selected`, each as soon as the selected stages it depends on are done, and returns them in the order they
+        finished (also kept in `finished`). Stages that aren't selected count as done. After a failure nothing new
+        starts, the running stages finish and the first error is raised.
+
+        :param source: Checkpoint key of the input, finished stages are recorded against it.
+        """
+        pending = list(selected)
+        running: dict[Future, str] = {}
+        finished = self.finished = []
+        error = None
+        with ThreadPoolExecutor(max(1, len(selected)), thread_name_prefix="stage") as pool:
+            while pending or running:
+                if error is None:
+                    for name in [name for name in pending if all(dep not in pending and dep not in running.values() for dep in self.stages[name].after)]:
+                        pending.remove(name)
+                        metrics.item(f"[PIPELINE] Starting {name}")
+                        running[pool.submit(self.stages[name].run)] = name
+                elif not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        seconds = future.result()
+                    except Exception as e:
+                        metrics.item(f"[PIPELINE] {name} failed: {e}")
+                        error = error or e
+                        continue
+                    finished.append(name)
+                    metrics.item(f"[PIPELINE] Finished {name} in {seconds:.1f}s")
+                    if source is not None:
+                        checkpoint(source, name, seconds)
+        if error is not None:
+            raise error
+        return finished
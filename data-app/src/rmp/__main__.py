@@ -1,4 +1,4 @@
-from rmp import RMP
+from src.rmp.rmp import RMP
 import sys
 
 def main():
@@ -8,4 +8,4 @@ def main():
     return 0
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
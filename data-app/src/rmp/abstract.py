@@ -1,9 +1,31 @@
 from abc import ABC, abstractmethod
-from db.Models import Professor, Session
-from multiprocessing import Pool
-from aiohttp import BasicAuth
-from gql.transport.aiohttp import AIOHTTPTransport
-from gql import Client, gql
+from sqlalchemy import Row, select
+from db.Models import Professor, Session, PROF_COLUMNS
+from src.metrics.metrics import metrics
+from src.outbound.scheduler import scheduler
+
+RMP_GRAPHQL = "https://www.ratemyprofessors.com/graphql"
+SEARCH_QUERY = """
+    query NewSearchTeachersQuery($professorName: String!, $schoolID: ID!){
+        newSearch{
+            teachers(query: {text: $professorName, schoolID: $schoolID}, first: 300){
+                edges{
+                    node{
+                        avgDifficulty
+                        avgRating
+                        id
+                        firstName
+                        lastName
+                        legacyId
+                        school{
+                            id
+                        }
+                    }
+                }
+            }
+        }
+    }
+"""
 
 class AbstractRMP(ABC):
     """Defines the interface to get reviews from Rate My Professor (RMP)."""
@@ -16,53 +38,36 @@ class AbstractRMP(ABC):
             {"id": "U2Nob29sLTQyODA=", "name": "University of Minnesota, Morris"},  # University of Minnesota, Morris
             {"id": "U2Nob29sLTQ2MDM=", "name": "University of Minnesota, Crookston"}  # University of Minnesota, Crookston
         ]
-        RMPHeaders = {
+        self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3",
             "Origin": "https://www.ratemyprofessors.com",
             "Referer": "https://www.ratemyprofessors.com/",
             "Sec-Fetch-Site": "same-origin",
             "Sec-Fetch-Mode": "cors",
         }
-        self.transport = AIOHTTPTransport(url="https://www.ratemyprofessors.com/graphql", auth=BasicAuth("test", "test"), ssl=False, headers=RMPHeaders)
-        self.gqlClient = Client(transport=self.transport, fetch_schema_from_transport=True)
 
-
-
-    def get_prof_by_school_and_name(self, college: dict[str, str], professor_name: str) -> dict[str, str | float | int]:
-        query = gql("""
-            query NewSearchTeachersQuery($professorName: String!, $schoolID: ID!){
-                newSearch{
-                    teachers(query: {text: $professorName, schoolID: $schoolID}, first: 300){
-                        edges{
-                            node{
-                                avgDifficulty
-                                avgRating
-                                id
-                                firstName
-                                lastName
-                                legacyId
-                                school{
-                                    id
-                                }
-                            }
-                        }
-                    }
-                }
-            }
-        """)
-        result = self.gqlClient.execute(query, variable_values={"professorName": professor_name, "schoolID": college["id"]})
-        print(f"[RMP GQL] Searched for {professor_name} at {college['name']}")
+    def get_prof_by_school_and_name(self, college: dict[str, str], professor_name: str) -> list[dict]:
+        # A plain POST to the GraphQL endpoint, so searches can run from threads and go through the scheduler.
+        resp = scheduler.post(RMP_GRAPHQL, json={"query": SEARCH_QUERY, "variables": {"professorName": professor_name, "schoolID": college["id"]}},
+                              headers=self.headers, auth=("test", "test"))
+        try:
+            result = resp.json()["data"]
+        except (ValueError, KeyError, TypeError):
+            metrics.error(f"[RMP GQL] Search for {professor_name} at {college['name']} failed with status {resp.status_code}")
+            return []
+        metrics.item(f"[RMP GQL] Searched for {professor_name} at {college['name']}")
         return result["newSearch"]["teachers"]["edges"]
 
 
     @abstractmethod
-    def update_prof_by_name(self, prof: Professor) -> None:
+    def update_prof_by_name(self, prof: Row) -> None:
+        """:param prof: An (id, name) row selected with `PROF_COLUMNS`."""
         pass
 
     def update_profs(self) -> None:
-        # Any higher gets rate limited by RMP
-        with Pool(5) as p:
-            session = Session()
-            profs = session.query(Professor).order_by(Professor.name).all()
-            session.close()
-            p.map(self.update_prof_by_name, profs)
\ No newline at end of file
+        session = Session()
+        profs = session.execute(select(*PROF_COLUMNS).order_by(Professor.name)).all()
+        session.close()
+        metrics.count(rows=len(profs))
+        # RMP rate limits aggressively, the scheduler backs off on its own when it does.
+        scheduler.map(self.update_prof_by_name, profs)
\ No newline at end of file
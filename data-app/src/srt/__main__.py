@@ -1,4 +1,4 @@
-from srt import SRT
+from src.srt.srt import SRT
 import sys
 
 def main():
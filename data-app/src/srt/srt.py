@@ -1,6 +1,8 @@
 from .abstract import AbstractSRT
 import pandas as pd
-from db.Models import Session, ClassDistribution
+from sqlalchemy import select, update
+from db.Models import Session, ClassDistribution, write_lock
+from src.metrics.metrics import metrics
 
 class SRT(AbstractSRT):
     """Implements the interface to get reviews from SRT (Student Rating of Teachers)."""
@@ -22,7 +24,7 @@ class SRT(AbstractSRT):
             "RECC",
             "RESP"
         ]
-        df["FULL_NAME"] = df["SUBJECT"] + " " + df["CATALOG_NBR"]
+        df["FULL_NAME"] = df["SUBJECT"] + " " + df["CATALOG_NBR"].astype(str)
         df.drop(["SUBJECT", "CATALOG_NBR", "TITLE", "TERM"], axis=1, inplace=True)
         grouped_df = df.groupby("FULL_NAME").aggregate(
             {
@@ -39,32 +41,33 @@ class SRT(AbstractSRT):
         SRT.dataframe = grouped_df
 
     @staticmethod
-    def insertHelper(row: pd.Series) -> pd.Series:
+    def insertReviews() -> None:
+        if SRT.dataframe is None:
+            raise ValueError("Dataframe is not initialized.")
+
+        metrics.count(rows=len(SRT.dataframe))
         session = Session()
         try:
-            subject, crse_nbr = str(row.name).split(" ", 1)
-            classDist = session.query(ClassDistribution).filter(
-                ClassDistribution.campus == "UMNTC",
-                ClassDistribution.dept_abbr == subject,
-                ClassDistribution.course_num == crse_nbr
-            ).first()
-            if classDist:
-                classDist.srt_vals = row.to_dict()
+            # SRT data only covers the Twin Cities, one projection maps its courses to class ids.
+            rows = session.execute(select(ClassDistribution.dept_abbr, ClassDistribution.course_num, ClassDistribution.id)
+                                   .where(ClassDistribution.campus == "UMNTC"))
+            class_ids = {(dept_abbr, course_num): class_id for dept_abbr, course_num, class_id in rows}
+            updates = []
+            for full_name, row in zip(SRT.dataframe.index, SRT.dataframe.to_dict("records")):
+                subject, crse_nbr = str(full_name).split(" ", 1)
+                class_id = class_ids.get((subject, crse_nbr))
+                if class_id is None:
+                    metrics.item(f"[SRT FAIL] ClassDistribution for {full_name} not found. Cannot update SRT data.")
+                    continue
+                updates.append({"id": class_id, "srt_vals": row})
+                metrics.item(f"[SRT UPDATE] Updated {full_name} with new SRT data")
+            with write_lock():
+                if updates:
+                    session.execute(update(ClassDistribution), updates)
                 session.commit()
-                print(f"[SRT UPDATE] Updated {row.name} with new SRT data")
-            else:
-                print(f"[SRT FAIL] ClassDistribution for {row.name} not found. Cannot update SRT data.")
         except Exception as e:
             session.rollback()
-            print(f"[SRT ERROR] Failed to update {row.name} with SRT data: {e}")
+            metrics.error(f"[SRT ERROR] Failed to update SRT data: {e}")
             raise e
         finally:
             session.close()
-        return row
-
-    @staticmethod
-    def insertReviews() -> None:
-        if SRT.dataframe is None:
-            raise ValueError("Dataframe is not initialized.")
-    
-        SRT.dataframe.apply(SRT.insertHelper, axis=1)
@@ -0,0 +1,46 @@
+from src.generation.process import Process
+
+
+# (name, x500) pairs shaped like the ones in CLASS_DATA.
+FITTING = [
+    ("Karen Ho", "karenho"),
+    ("Scott Johnson", "joh20235"),
+    ("Shuyan Wang", "wan01871"),
+    ("Michelle Anderson", "and04707"),
+    ("Thomas Jones", "twj"),
+    ("Renee Frontiera", "rrf"),
+    ("Terry Hurley", "tmh"),
+    ("Joel Wu", "wuxx0179"),
+    ("Min Ni", "nixxx008"),
+    ("Zhihua Xu", "xuz"),
+    ("Steven Wu", "scwu"),
+    ("Irene De Pellegrin Llorente", "depel001"),
+    ("Aila O'loughlin", "oloup001"),
+    ("Terrence Stanley", "stan0373"),
+]
+UNRELATED = [
+    ("Nan Li", "stan0373"),
+    ("Sagnik Mukherjee", "stan0373"),
+    ("Anja Wisniewski", "hburson"),
+    ("Yuna Liu", "ohara003"),
+]
+
+
+def test_x500_fits_standard_formats():
+    for name, x500 in FITTING:
+        assert Process.x500_fits(name, x500), (name, x500)
+
+
+def test_x500_fits_rejects_unrelated_names():
+    for name, x500 in UNRELATED:
+        assert not Process.x500_fits(name, x500), (name, x500)
+
+
+def test_identified_pairs_trusts_unshared_x500s():
+    pairs = [("Sara Knauz", "arnol535"), ("Bee Moua", "bvang"), ("Karen Ho", "")]
+    assert Process.identified_pairs(pairs) == [("Sara Knauz", "arnol535"), ("Bee Moua", "bvang")]
+
+
+def test_identified_pairs_keeps_coordinators_to_their_own_names():
+    pairs = [("Clara Buck", "stan0373"), ("Nan Li", "stan0373"), ("Sagnik Mukherjee", "stan0373"), ("Terrence Stanley", "stan0373")]
+    assert Process.identified_pairs(pairs) == [("Terrence Stanley", "stan0373")]